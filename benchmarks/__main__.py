@@ -0,0 +1,97 @@
+"""Benchmark suite of pychip8.
+
+Run from the top directory as: `python -m benchmarks`
+
+Results are printed as a table and can be saved as JSON with --output.
+Given a --baseline saved that way, the run fails with exit status 1 when a
+benchmark got slower than its baseline by more than --threshold. With
+--recompile, the speedup of the block translator on each ROM follows.
+"""
+import json
+import platform
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks import compare, macro, micro
+
+def main(cli_args: list=None) -> int:
+    parser = ArgumentParser(prog='python -m benchmarks', allow_abbrev=False)
+    parser.add_argument(
+        'suite', nargs='?', choices=('all', 'micro', 'macro'), default='all',
+        help='Benchmarks to run, all of them by default.'
+    )
+    parser.add_argument(
+        '--cycles', '-c', type=int, default=20000, metavar='',
+        help='Cycles to run on each ROM.'
+    )
+    parser.add_argument(
+        '--number', '-n', type=int, default=20000, metavar='',
+        help='Executions of each instruction per microbenchmark repeat.'
+    )
+    parser.add_argument(
+        '--repeat', '-r', type=int, default=3, metavar='',
+        help='Repeats of each benchmark, the best one is kept.'
+    )
+    parser.add_argument(
+        '--recompile', action='store_true',
+        help='Also run the ROMs through the block translator.'
+    )
+    parser.add_argument(
+        '--roms', nargs='+', type=Path, metavar='ROM',
+        help='ROM files to run, roms/ and the test ROMs by default.'
+    )
+    parser.add_argument(
+        '--output', '-o', type=Path, metavar='',
+        help='JSON file to save the results to.'
+    )
+    parser.add_argument(
+        '--baseline', '-b', type=Path, metavar='',
+        help='JSON file of earlier results to compare against.'
+    )
+    parser.add_argument(
+        '--threshold', '-t', type=float, default=0.1, metavar='',
+        help='Allowed slowdown against the baseline, 0.1 is 10%%.'
+    )
+    args = parser.parse_args(cli_args)
+
+    results = {}
+    if args.suite in ('all', 'micro'):
+        results.update(micro.run(args.number, args.repeat))
+    if args.suite in ('all', 'macro'):
+        results.update(macro.run(args.roms, args.cycles, args.repeat))
+        if args.recompile:
+            results.update(
+                macro.run(args.roms, args.cycles, args.repeat, recompile=True)
+            )
+
+    baseline = None
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())['results']
+    print(compare.format_table(results, baseline))
+    if args.recompile:
+        print()
+        print(compare.format_speedups(macro.speedups(results)))
+
+    if args.output is not None:
+        args.output.write_text(json.dumps({
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'results': results,
+        }, indent=2) + '\n')
+
+    if baseline is None:
+        return 0
+    slower = compare.regressions(results, baseline, args.threshold)
+    for name, before, after in slower:
+        print(
+            f'REGRESSION {name}: {before:.1f} ns -> {after:.1f} ns',
+            file=sys.stderr
+        )
+    return 1 if slower else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
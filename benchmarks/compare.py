@@ -0,0 +1,46 @@
+"""Comparison of benchmark results against a saved baseline.
+"""
+from statistics import geometric_mean
+
+def regressions(results: dict, baseline: dict, threshold: float) -> list:
+    """Benchmarks slower than their baseline by more than threshold.
+
+    Benchmarks missing from either side are ignored.
+
+    Args:
+        results: Benchmark name -> nanoseconds, as from micro.run.
+        baseline: Same format, from an earlier run.
+        threshold: Allowed slowdown, 0.1 lets a benchmark get 10% slower.
+
+    Returns:
+        (name, baseline ns, current ns) tuples, slowest first.
+    """
+    slower = [
+        (name, baseline[name], time) for name, time in results.items()
+        if name in baseline and time > baseline[name] * (1 + threshold)
+    ]
+    return sorted(slower, key=lambda entry: entry[2] / entry[1], reverse=True)
+
+def format_table(results: dict, baseline: dict = None) -> str:
+    """Human readable table of results, with changes against baseline."""
+    baseline = baseline or {}
+    width = max(map(len, results), default=4) + 2
+    lines = [f'{"name":<{width}}{"ns":>12}{"change":>10}']
+    for name, time in results.items():
+        change = ''
+        if name in baseline:
+            change = f'{(time / baseline[name] - 1) * 100:+.1f}%'
+        lines.append(f'{name:<{width}}{time:>12.1f}{change:>10}')
+    return '\n'.join(lines)
+
+def format_speedups(speedups: dict) -> str:
+    """Human readable table of speedups, with their geometric mean."""
+    if not speedups:
+        return ''
+    width = max(map(len, speedups)) + 2
+    lines = [f'{"name":<{width}}{"speedup":>10}']
+    for name, ratio in speedups.items():
+        lines.append(f'{name:<{width}}{ratio:>9.2f}x')
+    mean = geometric_mean(speedups.values())
+    lines.append(f'{"geometric mean":<{width}}{mean:>9.2f}x')
+    return '\n'.join(lines)
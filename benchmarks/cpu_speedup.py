@@ -0,0 +1,57 @@
+"""Per-cycle speed of cpu.Cpu against reference.ReferenceCpu.
+
+Run from the top directory as: `python -m benchmarks.cpu_speedup`
+"""
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from time import perf_counter
+
+from pychip8 import cpu, reference
+
+ROM_DIR = Path(__file__).resolve().parent.parent / 'roms'
+
+def time_per_cycle(cpu_class, rom_data: bytes, cycles: int) -> float:
+    """Returns the mean wall time of one run_cycle, in seconds.
+
+    The delay and sound timers tick every 10 cycles, and the ROM is
+    reloaded on a fresh CPU whenever it runs into the end of its code.
+    """
+    chip = cpu_class()
+    chip.load_rom(rom_data)
+    start = perf_counter()
+    for cycle in range(cycles):
+        try:
+            chip.run_cycle()
+        except ValueError:
+            chip = cpu_class()
+            chip.load_rom(rom_data)
+        if cycle % 10 == 0:
+            chip.decrease_timers()
+    return (perf_counter() - start) / cycles
+
+def main(cli_args: list=None):
+    parser = ArgumentParser(allow_abbrev=False)
+    parser.add_argument(
+        '--cycles', '-c', type=int, default=20000, metavar='',
+        help='Cycles to run on each ROM.'
+    )
+    parser.add_argument(
+        'roms', nargs='*', type=Path,
+        help='ROM files to run, every file in roms/ by default.'
+    )
+    args = parser.parse_args(cli_args)
+
+    roms = args.roms or sorted(ROM_DIR.iterdir())
+    print(f'{"rom":<12}{"reference":>14}{"scalar":>14}{"speedup":>10}')
+    for rom in roms:
+        rom_data = rom.read_bytes()
+        ref_time = time_per_cycle(reference.ReferenceCpu, rom_data, args.cycles)
+        new_time = time_per_cycle(cpu.Cpu, rom_data, args.cycles)
+        print(
+            f'{rom.name:<12}{ref_time*1e6:>11.2f} us{new_time*1e6:>11.2f} us'
+            f'{ref_time/new_time:>9.1f}x'
+        )
+
+if __name__ == '__main__':
+    sys.exit(main())
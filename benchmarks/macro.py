@@ -0,0 +1,68 @@
+"""Throughput of whole ROMs run headless for a fixed number of cycles.
+"""
+from pathlib import Path
+from time import perf_counter_ns
+
+from pychip8 import cpu, headless
+
+TOP_DIR = Path(__file__).resolve().parent.parent
+ROM_DIR = TOP_DIR / 'roms'
+TEST_DIR = TOP_DIR / 'tests'
+
+def default_roms() -> list:
+    """Every ROM in roms/ plus the test ROMs."""
+    return sorted(ROM_DIR.iterdir()) + sorted(TEST_DIR.glob('*.ch8'))
+
+def time_rom(rom_data: bytes, cycles: int, recompile: bool = False) -> float:
+    """Wall time of one cycle of the ROM, in nanoseconds.
+
+    The ROM is reloaded on a fresh Cpu whenever it halts, so every ROM runs
+    exactly cycles instructions. Idle loops are run, not skipped, so the
+    timings stay comparable with those of earlier baselines.
+    """
+    done = 0
+    elapsed = 0
+    while done < cycles:
+        chip = cpu.Cpu()
+        chip.load_rom(rom_data)
+        runner = headless.HeadlessRunner(
+            chip, recompile=recompile, skip_idle=False
+        )
+        start = perf_counter_ns()
+        runner.run(max_cycles=cycles - done)
+        elapsed += perf_counter_ns() - start
+        #A ROM halting on its first instruction would never finish
+        done += max(runner.cycles, 1)
+    return elapsed / done
+
+def run(
+    roms: list = None, cycles: int = 20000, repeat: int = 3,
+    recompile: bool = False
+) -> dict:
+    """Benchmarks every ROM, best of repeat runs.
+
+    Returns:
+        'macro/<rom>' -> nanoseconds per cycle, with a '/recompile' suffix
+        when run through the block translator.
+    """
+    suffix = '/recompile' if recompile else ''
+    results = {}
+    for rom in roms or default_roms():
+        rom_data = Path(rom).read_bytes()
+        results[f'macro/{Path(rom).name}{suffix}'] = min(
+            time_rom(rom_data, cycles, recompile) for _ in range(repeat)
+        )
+    return results
+
+def speedups(results: dict) -> dict:
+    """How many times faster the block translator ran each ROM.
+
+    Returns:
+        'macro/<rom>' -> interpreted ns over recompiled ns, for every ROM
+        of results timed both ways.
+    """
+    return {
+        name: time / results[f'{name}/recompile']
+        for name, time in results.items()
+        if f'{name}/recompile' in results
+    }
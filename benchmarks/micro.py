@@ -0,0 +1,138 @@
+"""Microbenchmarks of every instruction handler of cpu.Cpu.
+"""
+from time import perf_counter_ns
+
+from pychip8 import cpu
+
+#Instruction words benchmarked for each handler, by handler name.
+#Dxyn gets one entry per sprite height, plus a sprite clipped at the edge.
+BENCH_WORDS = {
+    '_op_00e0': [0x00E0],
+    '_op_00ee': [0x00EE],
+    '_op_00cn': [0x00C4],
+    '_op_00fb': [0x00FB],
+    '_op_00fc': [0x00FC],
+    '_op_00fe': [0x00FE],
+    '_op_00ff': [0x00FF],
+    '_op_1nnn': [0x1300],
+    '_op_2nnn': [0x2300],
+    '_op_3xnn': [0x3105],
+    '_op_4xnn': [0x4105],
+    '_op_5xy0': [0x5120],
+    '_op_6xnn': [0x61AB],
+    '_op_7xnn': [0x71AB],
+    '_op_8xy0': [0x8120],
+    '_op_8xy1': [0x8121],
+    '_op_8xy2': [0x8122],
+    '_op_8xy3': [0x8123],
+    '_op_8xy4': [0x8124],
+    '_op_8xy5': [0x8125],
+    '_op_8xy6': [0x8126],
+    '_op_8xy7': [0x8127],
+    '_op_8xye': [0x812E],
+    '_op_9xy0': [0x9120],
+    '_op_annn': [0xA300],
+    '_op_bnnn': [0xB300],
+    '_op_cxnn': [0xC1FF],
+    '_op_dxyn': [0xD121, 0xD125, 0xD128, 0xD12F, 0xD34F],
+    '_op_ex9e': [0xE19E],
+    '_op_exa1': [0xE1A1],
+    '_op_fx07': [0xF107],
+    '_op_fx0a': [0xF10A],
+    '_op_fx15': [0xF115],
+    '_op_fx18': [0xF118],
+    '_op_fx1e': [0xF11E],
+    '_op_fx29': [0xF129],
+    '_op_fx30': [0xF130],
+    '_op_fx33': [0xF133],
+    '_op_fx55': [0xF055, 0xFF55],
+    '_op_fx65': [0xF065, 0xFF65],
+    '_op_fx75': [0xF775],
+    '_op_fx85': [0xF785],
+}
+
+#Words also timed on the 128x64 SUPER-CHIP screen, where D120 draws 16x16
+HIRES_BENCH_WORDS = {
+    '_op_00cn': [0x00C4],
+    '_op_00fb': [0x00FB],
+    '_op_00fc': [0x00FC],
+    '_op_dxyn': [0xD120, 0xD12F, 0xDEF0],
+}
+
+#Handlers that cannot run back to back without resetting some state
+_RESETS = {
+    '_op_00ee': lambda chip: setattr(chip, '_stack_pointer', 1),
+    '_op_2nnn': lambda chip: setattr(chip, '_stack_pointer', 0),
+    '_op_fx55': lambda chip: setattr(chip, '_i_reg', 0x300),
+    '_op_fx65': lambda chip: setattr(chip, '_i_reg', 0x300),
+}
+
+def handler_names(chip: cpu.Cpu) -> list:
+    """Names of every handler reachable from the opcode tables, once each.
+
+    Handlers like _op_00cn fill several table entries, one per operand.
+    """
+    names = []
+    for entry in chip._opcode_main_table.values():
+        handlers = entry.values() if isinstance(entry, dict) else [entry]
+        names += [handler.__name__ for handler in handlers]
+    return list(dict.fromkeys(names))
+
+def _bench_chip(hires: bool = False) -> cpu.Cpu:
+    """A Cpu in a state every benchmarked word can run in.
+
+    V registers hold their own index, so they double as key numbers,
+    with VE holding 62 and VF 30 to draw a sprite clipped at the edge.
+    """
+    chip = cpu.Cpu()
+    if hires:
+        chip._set_resolution(True)
+    chip._v_regs[:] = bytes(range(16))
+    chip._v_regs[0xE] = 62
+    chip._v_regs[0xF] = 30
+    chip._i_reg = 0x300
+    chip._program_counter = 0x200
+    return chip
+
+def time_word(
+    word: int, number: int, repeat: int, hires: bool = False
+) -> float:
+    """Best time of one execution of word, in nanoseconds.
+    """
+    chip = _bench_chip(hires)
+    handler, operands = chip._decode(word)
+    reset = _RESETS.get(handler.__name__)
+    best = float('inf')
+    for _ in range(repeat):
+        if reset is None:
+            start = perf_counter_ns()
+            for _ in range(number):
+                handler(*operands)
+            end = perf_counter_ns()
+        else:
+            start = perf_counter_ns()
+            for _ in range(number):
+                reset(chip)
+                handler(*operands)
+            end = perf_counter_ns()
+        best = min(best, (end - start) / number)
+    return best
+
+def run(number: int = 20000, repeat: int = 5) -> dict:
+    """Benchmarks every handler of the opcode tables.
+
+    Returns:
+        'micro/<handler>/<word>' -> nanoseconds per execution.
+    """
+    results = {}
+    for name in handler_names(_bench_chip()):
+        #0000 and 00FD only raise the end of code
+        if name in ('_op_0000', '_op_00fd'):
+            continue
+        for word in BENCH_WORDS.get(name, []):
+            results[f'micro/{name}/{word:04X}'] = time_word(word, number, repeat)
+        for word in HIRES_BENCH_WORDS.get(name, []):
+            results[f'micro/hires/{name}/{word:04X}'] = time_word(
+                word, number, repeat, hires=True
+            )
+    return results
@@ -0,0 +1,94 @@
+"""Cold start time of pychip8, checked against a budget.
+
+Run from the top directory as: `python -m benchmarks.startup`
+
+Every measurement runs in a fresh interpreter: the import time of each
+module comes from `python -X importtime`, and the whole start from the
+wall time of a one-cycle headless run. The run fails with exit status 1
+when the median start exceeds --budget, or when starting imports a GUI
+library.
+"""
+import statistics
+import subprocess
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from time import perf_counter
+
+TOP_DIR = Path(__file__).resolve().parent.parent
+ROM = TOP_DIR / 'tests' / 'test_opcode.ch8'
+
+#Modules a headless start must never import
+GUI_MODULES = ('sdl2', 'tkinter')
+
+def import_times(module: str) -> dict:
+    """Self import time of every module imported by module, in ms.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=TOP_DIR, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(self_us) / 1000
+    return times
+
+def start_time() -> float:
+    """Wall time of a one-cycle headless run, in ms.
+    """
+    start = perf_counter()
+    subprocess.run(
+        [sys.executable, '-m', 'pychip8', str(ROM), '--headless', '-c', '1'],
+        cwd=TOP_DIR, capture_output=True, check=True
+    )
+    return (perf_counter() - start) * 1000
+
+def main(cli_args: list=None) -> int:
+    parser = ArgumentParser(
+        prog='python -m benchmarks.startup', allow_abbrev=False
+    )
+    parser.add_argument(
+        '--budget', type=float, default=400.0, metavar='',
+        help='Allowed median start time, in ms (default: 400).'
+    )
+    parser.add_argument(
+        '--repeat', '-r', type=int, default=5, metavar='',
+        help='Starts measured, the median one is kept.'
+    )
+    parser.add_argument(
+        '--top', type=int, default=10, metavar='',
+        help='Slowest modules to list.'
+    )
+    args = parser.parse_args(cli_args)
+
+    times = import_times('pychip8.chip8')
+    total = sum(times.values())
+    print(f'import pychip8.chip8: {total:.1f} ms')
+    for name, ms in sorted(times.items(), key=lambda item: -item[1])[:args.top]:
+        print(f'  {ms:8.2f} ms  {name}')
+
+    status = 0
+    gui = [
+        name for name in times
+        if name.split('.')[0] in GUI_MODULES
+    ]
+    if gui:
+        print(f'GUI modules imported: {", ".join(gui)}', file=sys.stderr)
+        status = 1
+
+    #Imports cached by the first start are not counted
+    start_time()
+    median = statistics.median(start_time() for _ in range(args.repeat))
+    print(f'headless start: {median:.1f} ms (budget {args.budget:.0f} ms)')
+    if median > args.budget:
+        print(
+            f'OVER BUDGET: start took {median:.1f} ms', file=sys.stderr
+        )
+        status = 1
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,27 @@
-from pychip8 import chip8
+import importlib
+import sys
 
-instance = chip8.Chip8()
-instance.run()
\ No newline at end of file
+#Sub-commands, run as `python -m pychip8 <command> ...`, and the module
+#whose main function runs each one, imported only when it is picked
+commands = {
+    'farm': 'pychip8.farm',
+    'export': 'pychip8.recorder',
+    'disasm': 'pychip8.disasm',
+    'serve': 'pychip8.server',
+    'fuzz': 'pychip8.fuzz',
+    'debug': 'pychip8.debugger',
+}
+
+def main(cli_args: list=None) -> int:
+    if cli_args is None:
+        cli_args = sys.argv[1:]
+    if cli_args and cli_args[0] in commands:
+        return importlib.import_module(commands[cli_args[0]]).main(cli_args[1:])
+
+    from pychip8 import chip8
+    instance = chip8.Chip8(cli_args)
+    instance.run()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
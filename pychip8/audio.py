@@ -0,0 +1,99 @@
+"""The Chip8 beep: a square wave gated by the sound timer.
+
+The wave is computed once, as a buffer a whole number of periods long
+plus the largest chunk ever asked for, so every chunk of the tone is a
+slice of it and playing sound never allocates sample buffers.
+"""
+import wave
+
+import numpy as np
+
+from pychip8 import backends
+
+SAMPLE_RATE = 44100
+#441 Hz makes a period of exactly 100 samples
+FREQUENCY = 441
+VOLUME = 0.2
+
+class SquareWave:
+    """Precomputed square wave, read in consecutive chunks.
+
+    Args:
+        max_chunk: Largest number of samples read at once.
+        sample_rate: Samples per second.
+        frequency: Tone frequency, should divide sample_rate.
+        volume: Amplitude, as a fraction of the 16-bit range.
+    """
+
+    def __init__(
+        self, max_chunk: int, sample_rate: int = SAMPLE_RATE,
+        frequency: int = FREQUENCY, volume: float = VOLUME
+    ):
+        self.period = sample_rate // frequency
+        amplitude = int(volume * 0x7FFF)
+        high = np.arange(self.period + max_chunk) % self.period < self.period // 2
+        self.samples = np.where(high, amplitude, -amplitude).astype(np.int16)
+        self.max_chunk = max_chunk
+        self.phase = 0
+
+    def next_chunk(self, count: int) -> np.array:
+        """The next count samples of the tone, a view into samples.
+        """
+        start = self.phase
+        self.phase = (start + count) % self.period
+        return self.samples[start:start+count]
+
+
+class WaveRecorder(backends.AudioBackend):
+    """Audio backend writing the beep into a WAV file, frame by frame.
+
+    Every update_sound call writes one frame worth of samples, tone or
+    silence, so the file follows emulated time, not wall time, and
+    audio timing can be checked without a sound device.
+
+    Args:
+        path: WAV file to write, 16-bit mono.
+        frame_rate: Frames per second of the emulator.
+        sample_rate: Samples per second.
+
+    Attributes:
+        frames: Frames written so far.
+        sounding_frames: Frames written with the tone on.
+    """
+
+    def __init__(
+        self, path: str, frame_rate: int = 60, sample_rate: int = SAMPLE_RATE
+    ):
+        self._samples_per_frame = sample_rate // frame_rate
+        self._wave = SquareWave(self._samples_per_frame, sample_rate)
+        self._silence = np.zeros(self._samples_per_frame, dtype=np.int16)
+        self._file = wave.open(str(path), 'wb')
+        self._file.setnchannels(1)
+        self._file.setsampwidth(2)
+        self._file.setframerate(sample_rate)
+        self.frames = 0
+        self.sounding_frames = 0
+
+    def update_sound(self, active: bool):
+        if active:
+            chunk = self._wave.next_chunk(self._samples_per_frame)
+            self.sounding_frames += 1
+        else:
+            chunk = self._silence
+        self._file.writeframesraw(chunk)
+        self.frames += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return (
+            f'WaveRecorder(frames={self.frames!r}, '
+            f'sounding_frames={self.sounding_frames!r})'
+        )
@@ -0,0 +1,181 @@
+import numpy as np
+
+def screen_shape(pixel_buffer: np.array) -> tuple:
+    """Returns the (rows, columns) of a flat screen from its size.
+
+    Screens are always twice as wide as they are high: 64x32 pixels, or
+    128x64 in SUPER-CHIP high resolution.
+    """
+    height = int(round((pixel_buffer.size // 2) ** 0.5))
+    return height, 2 * height
+
+def dirty_rows(previous: np.array, current: np.array):
+    """Returns the (start, end) row range where two screens differ.
+
+    Both screens are 2D arrays indexed [row, column]. None is returned
+    when they are equal.
+    """
+    rows = np.flatnonzero((previous != current).any(axis=1))
+    if rows.size == 0:
+        return None
+    return int(rows[0]), int(rows[-1]) + 1
+
+
+class DisplayBackend:
+    """Interface for graphical output backends.
+
+    Every display used by the emulator loop implements this interface,
+    the SDL window in display.Display being the interactive one.
+    """
+
+    def update_pixel_grid(self, pixel_buffer: np.array):
+        """Updates graphical output to show the current game state.
+        """
+        raise NotImplementedError
+
+    def present(self):
+        """Shows the latest game state, called once per frame.
+
+        Displays that show every update as it comes need not override it.
+        """
+        pass
+
+
+class InputBackend:
+    """Interface for keyboard input backends.
+
+    Args:
+        key_presses: The Cpu key state array, written in place.
+
+    Attributes:
+        fast_forward: Set while the fast-forward key is held.
+    """
+
+    def __init__(self, key_presses: np.array):
+        self._key_array = key_presses
+        self._exit_status = False
+        self.fast_forward = False
+
+    def process_events(self):
+        """Polls pending input and updates the key state array.
+        """
+        raise NotImplementedError
+
+    def update_exit_status(self):
+        return self._exit_status
+
+
+class AudioBackend:
+    """Interface for sound output backends.
+
+    The Chip8 beeps for as long as its sound timer is not zero.
+    """
+
+    def update_sound(self, active: bool):
+        """Turns the beep on or off, called once per frame, after the
+        frame ran and before the timers tick.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Releases the device or file, once the emulator stops.
+        """
+        pass
+
+
+class NullDisplay(DisplayBackend):
+    """Display that discards every frame.
+    """
+
+    def update_pixel_grid(self, pixel_buffer: np.array):
+        pass
+
+    def __repr__(self):
+        return 'NullDisplay()'
+
+
+class NullAudio(AudioBackend):
+    """Audio backend that stays silent.
+    """
+
+    def update_sound(self, active: bool):
+        pass
+
+    def __repr__(self):
+        return 'NullAudio()'
+
+
+class MemoryDisplay(DisplayBackend):
+    """Display that keeps a copy of the last frame it was given.
+
+    Attributes:
+        frame: Copy of the last pixel buffer drawn.
+        frame_count: Number of updates received so far.
+    """
+
+    def __init__(self):
+        self.frame = None
+        self.frame_count = 0
+
+    def update_pixel_grid(self, pixel_buffer: np.array):
+        self.frame = pixel_buffer.copy()
+        self.frame_count += 1
+
+    def __repr__(self):
+        return f'MemoryDisplay(frame_count={self.frame_count!r})'
+
+
+class TeeDisplay(DisplayBackend):
+    """Display forwarding every frame to several others.
+    """
+
+    def __init__(self, *displays: DisplayBackend):
+        self.displays = displays
+
+    def update_pixel_grid(self, pixel_buffer: np.array):
+        for display in self.displays:
+            display.update_pixel_grid(pixel_buffer)
+
+    def present(self):
+        for display in self.displays:
+            display.present()
+
+    def __repr__(self):
+        return 'TeeDisplay({})'.format(', '.join(map(repr, self.displays)))
+
+
+class NullKeyInput(InputBackend):
+    """Input backend that never presses a key.
+    """
+
+    def process_events(self):
+        pass
+
+
+class MemoryKeyInput(InputBackend):
+    """Input backend driven programmatically.
+
+    Key changes are queued by press/release and applied to the key state
+    array on the next call to process_events, like real events would be.
+    """
+
+    def __init__(self, key_presses: np.array):
+        super().__init__(key_presses)
+        self._pending = []
+
+    def press(self, key: int):
+        self._pending.append((key, True))
+
+    def release(self, key: int):
+        self._pending.append((key, False))
+
+    def request_exit(self):
+        self._pending.append((None, True))
+
+    def process_events(self):
+        for key, state in self._pending:
+            if key is None:
+                self._exit_status = True
+            else:
+                self._key_array[key] = state
+        self._pending.clear()
@@ -0,0 +1,391 @@
+import numpy as np
+
+from pychip8 import cpu, fontset
+
+class BatchCpu:
+    """Steps many Chip8 machines in lockstep with vectorized NumPy.
+
+    State is kept as a struct of arrays with one row per instance. On every
+    step the instances are grouped by the instruction they are about to
+    run, and each group runs as a handful of whole-array operations.
+    Instruction semantics mirror the cpu.Cpu handlers of the same name.
+
+    An instance stops instead of raising where cpu.Cpu would raise;
+    its row in halted is set and halt_reasons says why.
+
+    Args:
+        count: Number of instances.
+        seed: Seed of the generator used by Cxnn.
+
+    Attributes:
+        pixel_buffer: (count, 32, 64) array of bools, one screen per instance.
+        draw_flag: Set for the instances that changed their screen.
+        key_presses: (count, 16) array of bools with the key states.
+        halted: Set for the instances that stopped.
+        halt_reasons: Instance index -> reason it stopped.
+    """
+
+    def __init__(self, count: int, seed: int = None):
+        self._count = count
+        self._memory = np.zeros((count, 4096), dtype=np.uint8)
+        self._v_regs = np.zeros((count, 16), dtype=np.uint8)
+        #Wider than needed, values are masked to their register width
+        self._i_reg = np.zeros(count, dtype=np.int32)
+        self._delay_timer = np.zeros(count, dtype=np.int32)
+        self._sound_timer = np.zeros(count, dtype=np.int32)
+        self._program_counter = np.zeros(count, dtype=np.int32)
+        self._stack_pointer = np.zeros(count, dtype=np.int32)
+        self._stack = np.zeros((count, 16), dtype=np.int32)
+        self._rng = np.random.default_rng(seed)
+
+        self.pixel_buffer = np.zeros((count, 32, 64), dtype=np.bool)
+        self.draw_flag = np.zeros(count, dtype=np.bool)
+        self.key_presses = np.zeros((count, 16), dtype=np.bool)
+        self.halted = np.zeros(count, dtype=np.bool)
+        self.halt_reasons = {}
+
+        self._setup_opcode_table()
+        fonts = np.concatenate((fontset.fontset, fontset.big_fontset))
+        self._memory[:, :len(fonts)] = fonts
+
+    def _setup_opcode_table(self):
+        """Maps each instruction class to its vectorized handler.
+
+        A class is the opcode family times 256 plus, for the families with
+        a secondary table in cpu.Cpu, the bits in Cpu._opcode_sub_masks.
+        """
+        handlers = {
+            0x1: self._op_1nnn, 0x2: self._op_2nnn, 0x3: self._op_3xnn,
+            0x4: self._op_4xnn, 0x5: self._op_5xy0, 0x6: self._op_6xnn,
+            0x7: self._op_7xnn, 0x9: self._op_9xy0, 0xA: self._op_annn,
+            0xB: self._op_bnnn, 0xC: self._op_cxnn, 0xD: self._op_dxyn,
+        }
+        self._opcode_table = {
+            family << 8: handler for family, handler in handlers.items()
+        }
+        sub_tables = {
+            0x0: {0x00: self._op_0000, 0xe0: self._op_00e0, 0xee: self._op_00ee},
+            0x8: {
+                0x0: self._op_8xy0, 0x1: self._op_8xy1, 0x2: self._op_8xy2,
+                0x3: self._op_8xy3, 0x4: self._op_8xy4, 0x5: self._op_8xy5,
+                0x6: self._op_8xy6, 0x7: self._op_8xy7, 0xe: self._op_8xye,
+            },
+            0xE: {0x9e: self._op_ex9e, 0xa1: self._op_exa1},
+            0xF: {
+                0x07: self._op_fx07, 0x0a: self._op_fx0a, 0x15: self._op_fx15,
+                0x18: self._op_fx18, 0x1e: self._op_fx1e, 0x29: self._op_fx29,
+                0x33: self._op_fx33, 0x55: self._op_fx55, 0x65: self._op_fx65,
+            },
+        }
+        for family, table in sub_tables.items():
+            for sub_key, handler in table.items():
+                self._opcode_table[family << 8 | sub_key] = handler
+
+        #Secondary table bits of every family, zero for the direct ones
+        self._sub_masks = np.zeros(16, dtype=np.int32)
+        for family, mask in cpu.Cpu._opcode_sub_masks.items():
+            self._sub_masks[family] = mask
+
+    def load_rom(self, rom_data: bytes, index=slice(None)):
+        """Inserts rom code into the memory of the instances in index.
+
+        Every instance is loaded by default.
+        """
+
+        rom = np.frombuffer(rom_data, dtype=np.uint8)
+        self._memory[index, 0x200:0x200+len(rom)] = rom
+        self._program_counter[index] = 0x200
+
+    def decrease_timers(self):
+        """Runs down both delay and sound timers of every instance.
+        """
+        np.subtract(self._delay_timer, 1, out=self._delay_timer,
+                    where=self._delay_timer > 0)
+        np.subtract(self._sound_timer, 1, out=self._sound_timer,
+                    where=self._sound_timer > 0)
+
+    def run(self, cycles: int):
+        """Runs cycles steps, stopping early once every instance halted.
+        """
+        for _ in range(cycles):
+            if not self.step():
+                break
+
+    def step(self) -> int:
+        """Runs one instruction on every instance that has not halted.
+
+        Returns:
+            The number of instances that ran an instruction.
+        """
+        active = np.flatnonzero(~self.halted)
+        if active.size == 0:
+            return 0
+        pc = self._program_counter[active]
+        fetchable = pc < 4095
+        if not fetchable.all():
+            self._halt(active[~fetchable], 'program counter out of memory')
+            active, pc = active[fetchable], pc[fetchable]
+
+        memory = self._memory
+        words = memory[active, pc].astype(np.int32) << 8 | memory[active, pc+1]
+        families = words >> 12
+        classes = families << 8 | (words & self._sub_masks[families])
+
+        #Sort once, then split into runs of the same instruction class
+        order = np.argsort(classes, kind='stable')
+        sorted_classes = classes[order]
+        bounds = np.flatnonzero(np.diff(sorted_classes)) + 1
+        for group in np.split(order, bounds):
+            handler = self._opcode_table.get(int(classes[group[0]]))
+            if handler is None:
+                self._halt(active[group], 'invalid opcode')
+                continue
+            handler(active[group], words[group])
+
+        running = active[~self.halted[active]]
+        self._program_counter[running] = (self._program_counter[running] + 2) & 0xFFFF
+        return active.size
+
+    def _halt(self, index: np.ndarray, reason: str):
+        self.halted[index] = True
+        for instance in index.tolist():
+            self.halt_reasons[instance] = reason
+
+    def _skip_if(self, index: np.ndarray, condition: np.ndarray):
+        skip = index[condition]
+        self._program_counter[skip] = (self._program_counter[skip] + 2) & 0xFFFF
+
+    """Here starts the definitions of the different opcodes.
+
+    Each handler gets the instance indices of its group and their words.
+    """
+    def _op_0000(self, index, words):
+        self._halt(index, 'END OF CODE')
+
+    def _op_00e0(self, index, words):
+        self.pixel_buffer[index] = False
+        self.draw_flag[index] = True
+
+    def _op_00ee(self, index, words):
+        stack_pointer = (self._stack_pointer[index] - 1) & 0xFF
+        valid = stack_pointer < 16
+        self._halt(index[~valid], 'stack underflow')
+        index, stack_pointer = index[valid], stack_pointer[valid]
+        self._stack_pointer[index] = stack_pointer
+        self._program_counter[index] = self._stack[index, stack_pointer]
+
+    def _op_1nnn(self, index, words):
+        self._program_counter[index] = ((words & 0x0FFF) - 2) & 0xFFFF
+
+    def _op_2nnn(self, index, words):
+        stack_pointer = self._stack_pointer[index]
+        valid = stack_pointer < 16
+        self._halt(index[~valid], 'stack overflow')
+        index, words = index[valid], words[valid]
+        stack_pointer = stack_pointer[valid]
+        self._stack[index, stack_pointer] = self._program_counter[index]
+        self._stack_pointer[index] = (stack_pointer + 1) & 0xFF
+        self._program_counter[index] = ((words & 0x0FFF) - 2) & 0xFFFF
+
+    def _op_3xnn(self, index, words):
+        vx = self._v_regs[index, (words & 0x0F00) >> 8]
+        self._skip_if(index, vx == (words & 0x00FF))
+
+    def _op_4xnn(self, index, words):
+        vx = self._v_regs[index, (words & 0x0F00) >> 8]
+        self._skip_if(index, vx != (words & 0x00FF))
+
+    def _op_5xy0(self, index, words):
+        vx = self._v_regs[index, (words & 0x0F00) >> 8]
+        vy = self._v_regs[index, (words & 0x00F0) >> 4]
+        self._skip_if(index, vx == vy)
+
+    def _op_6xnn(self, index, words):
+        self._v_regs[index, (words & 0x0F00) >> 8] = words & 0x00FF
+
+    def _op_7xnn(self, index, words):
+        x = (words & 0x0F00) >> 8
+        self._v_regs[index, x] = (self._v_regs[index, x] + (words & 0x00FF)) & 0xFF
+
+    def _op_8xy0(self, index, words):
+        x, y = (words & 0x0F00) >> 8, (words & 0x00F0) >> 4
+        self._v_regs[index, x] = self._v_regs[index, y]
+
+    def _op_8xy1(self, index, words):
+        x, y = (words & 0x0F00) >> 8, (words & 0x00F0) >> 4
+        self._v_regs[index, x] |= self._v_regs[index, y]
+
+    def _op_8xy2(self, index, words):
+        x, y = (words & 0x0F00) >> 8, (words & 0x00F0) >> 4
+        self._v_regs[index, x] &= self._v_regs[index, y]
+
+    def _op_8xy3(self, index, words):
+        x, y = (words & 0x0F00) >> 8, (words & 0x00F0) >> 4
+        self._v_regs[index, x] ^= self._v_regs[index, y]
+
+    #Like Cpu, VF is written before VX, which is read again afterwards
+    def _op_8xy4(self, index, words):
+        x, y = (words & 0x0F00) >> 8, (words & 0x00F0) >> 4
+        v_regs = self._v_regs
+        v_regs[index, 15] = v_regs[index, x].astype(np.int32) + v_regs[index, y] > 0xFF
+        v_regs[index, x] = (v_regs[index, x].astype(np.int32) + v_regs[index, y]) & 0xFF
+
+    def _op_8xy5(self, index, words):
+        x, y = (words & 0x0F00) >> 8, (words & 0x00F0) >> 4
+        v_regs = self._v_regs
+        v_regs[index, 15] = v_regs[index, x] >= v_regs[index, y]
+        v_regs[index, x] = (v_regs[index, x].astype(np.int32) - v_regs[index, y]) & 0xFF
+
+    def _op_8xy6(self, index, words):
+        x, y = (words & 0x0F00) >> 8, (words & 0x00F0) >> 4
+        v_regs = self._v_regs
+        v_regs[index, 15] = v_regs[index, y] & 0x0F
+        v_regs[index, x] = v_regs[index, y] >> 1
+
+    def _op_8xy7(self, index, words):
+        x, y = (words & 0x0F00) >> 8, (words & 0x00F0) >> 4
+        v_regs = self._v_regs
+        v_regs[index, 15] = v_regs[index, y] >= v_regs[index, x]
+        v_regs[index, x] = (v_regs[index, y].astype(np.int32) - v_regs[index, x]) & 0xFF
+
+    def _op_8xye(self, index, words):
+        x, y = (words & 0x0F00) >> 8, (words & 0x00F0) >> 4
+        v_regs = self._v_regs
+        v_regs[index, 15] = v_regs[index, y] & 0xF0
+        v_regs[index, x] = (v_regs[index, y].astype(np.int32) << 1) & 0xFF
+
+    def _op_9xy0(self, index, words):
+        vx = self._v_regs[index, (words & 0x0F00) >> 8]
+        vy = self._v_regs[index, (words & 0x00F0) >> 4]
+        self._skip_if(index, vx != vy)
+
+    def _op_annn(self, index, words):
+        self._i_reg[index] = words & 0x0FFF
+
+    def _op_bnnn(self, index, words):
+        jump = self._v_regs[index, 0].astype(np.int32) + (words & 0x0FFF) - 2
+        self._program_counter[index] = jump & 0xFFFF
+
+    def _op_cxnn(self, index, words):
+        self._v_regs[index, (words & 0x0F00) >> 8] = self._rng.integers(
+            0x100, size=index.size, dtype=np.uint8
+        )
+
+    def _op_dxyn(self, index, words):
+        """Draws every sprite of the group at once.
+
+        Each sprite is laid out as a (16, 8) block of pixels, with rows
+        past its height and pixels past the screen edges masked out.
+        """
+        height = words & 0x000F
+        ireg = self._i_reg[index]
+        valid = ireg + height <= 4096
+        self._halt(index[~valid], 'sprite data past the end of memory')
+        index, words = index[valid], words[valid]
+        height, ireg = height[valid], ireg[valid]
+        x_pos = self._v_regs[index, (words & 0x0F00) >> 8].astype(np.int32) % 64
+        y_pos = self._v_regs[index, (words & 0x00F0) >> 4].astype(np.int32) % 32
+
+        rows = np.arange(16)
+        addresses = np.minimum(ireg[:, np.newaxis] + rows, 4095)
+        sprite_bytes = self._memory[index[:, np.newaxis], addresses]
+        pixels = cpu._SPRITE_PIXELS[sprite_bytes]
+        pixel_y = (y_pos[:, np.newaxis] + rows)[:, :, np.newaxis]
+        pixel_x = (x_pos[:, np.newaxis] + np.arange(8))[:, np.newaxis, :]
+        visible = (
+            pixels
+            & (rows < height[:, np.newaxis])[:, :, np.newaxis]
+            & (pixel_y < 32) & (pixel_x < 64)
+        )
+
+        owner = np.broadcast_to(np.arange(index.size)[:, None, None], visible.shape)
+        owner = owner[visible]
+        instance = index[owner]
+        pixel_y = np.broadcast_to(pixel_y, visible.shape)[visible]
+        pixel_x = np.broadcast_to(pixel_x, visible.shape)[visible]
+        lit = self.pixel_buffer[instance, pixel_y, pixel_x]
+        collision = np.zeros(index.size, dtype=np.bool)
+        collision[owner[lit]] = True
+        self.pixel_buffer[instance, pixel_y, pixel_x] = ~lit
+        self._v_regs[index, 15] = collision
+        self.draw_flag[index] = True
+
+    def _key_operand(self, index, words, reason='key out of range'):
+        keys = self._v_regs[index, (words & 0x0F00) >> 8]
+        valid = keys < 16
+        self._halt(index[~valid], reason)
+        return index[valid], keys[valid]
+
+    def _op_ex9e(self, index, words):
+        index, keys = self._key_operand(index, words)
+        self._skip_if(index, self.key_presses[index, keys])
+
+    def _op_exa1(self, index, words):
+        index, keys = self._key_operand(index, words)
+        self._skip_if(index, ~self.key_presses[index, keys])
+
+    def _op_fx07(self, index, words):
+        self._v_regs[index, (words & 0x0F00) >> 8] = self._delay_timer[index]
+
+    def _op_fx0a(self, index, words):
+        keys = self.key_presses[index]
+        pressed = keys.any(axis=1)
+        first_key = keys.argmax(axis=1)
+        x = (words & 0x0F00) >> 8
+        self._v_regs[index[pressed], x[pressed]] = first_key[pressed]
+        waiting = index[~pressed]
+        self._program_counter[waiting] = (self._program_counter[waiting] - 2) & 0xFFFF
+
+    def _op_fx15(self, index, words):
+        self._delay_timer[index] = self._v_regs[index, (words & 0x0F00) >> 8]
+
+    def _op_fx18(self, index, words):
+        self._sound_timer[index] = self._v_regs[index, (words & 0x0F00) >> 8]
+
+    def _op_fx1e(self, index, words):
+        vx = self._v_regs[index, (words & 0x0F00) >> 8]
+        self._i_reg[index] = (self._i_reg[index] + vx) & 0xFFFF
+
+    def _op_fx29(self, index, words):
+        vx = self._v_regs[index, (words & 0x0F00) >> 8].astype(np.int32)
+        self._i_reg[index] = (5*vx) & 0xFF
+
+    def _op_fx33(self, index, words):
+        ireg = self._i_reg[index]
+        valid = ireg + 3 <= 4096
+        self._halt(index[~valid], 'memory out of range')
+        index, words, ireg = index[valid], words[valid], ireg[valid]
+        vx = self._v_regs[index, (words & 0x0F00) >> 8]
+        self._memory[index, ireg] = vx // 100
+        self._memory[index, ireg+1] = (vx % 100) // 10
+        self._memory[index, ireg+2] = vx % 10
+
+    def _op_fx55(self, index, words):
+        index, count, ireg = self._register_range(index, words)
+        for reg in range(16):
+            selected = count > reg
+            self._memory[index[selected], ireg[selected] + reg] = (
+                self._v_regs[index[selected], reg]
+            )
+        self._i_reg[index] = (ireg + count) & 0xFFFF
+
+    def _op_fx65(self, index, words):
+        index, count, ireg = self._register_range(index, words)
+        for reg in range(16):
+            selected = count > reg
+            self._v_regs[index[selected], reg] = (
+                self._memory[index[selected], ireg[selected] + reg]
+            )
+        self._i_reg[index] = (ireg + count) & 0xFFFF
+
+    def _register_range(self, index, words):
+        """Instances, register count and I for Fx55 and Fx65.
+        """
+        count = ((words & 0x0F00) >> 8) + 1
+        ireg = self._i_reg[index]
+        valid = ireg + count <= 4096
+        self._halt(index[~valid], 'memory out of range')
+        return index[valid], count[valid], ireg[valid]
+
+    def __repr__(self):
+        return f'BatchCpu({self._count!r})'
@@ -0,0 +1,63 @@
+import ctypes
+
+import sdl2
+import sdl2.ext
+
+from pychip8 import audio, backends
+
+class Beeper(backends.AudioBackend):
+    """Plays the beep through the SDL audio callback.
+
+    The callback runs on the SDL audio thread and only reads the flag
+    set by update_sound: it copies the next chunk of the precomputed
+    square wave into the device buffer, or fills it with silence. With
+    chunks of 256 samples, about 6 ms, a beep starts well within the
+    frame after the Fx18 that set the sound timer.
+
+    Args:
+        chunk: Samples per callback, the device buffer size.
+    """
+
+    def __init__(self, chunk: int = 256):
+        if sdl2.SDL_InitSubSystem(sdl2.SDL_INIT_AUDIO) < 0:
+            raise sdl2.ext.SDLError()
+        self._active = False
+        #Kept referenced, SDL only holds a pointer to it
+        self._callback = sdl2.SDL_AudioCallback(self._fill)
+
+        wanted = sdl2.SDL_AudioSpec(
+            audio.SAMPLE_RATE, sdl2.AUDIO_S16SYS, 1, chunk, self._callback
+        )
+        obtained = sdl2.SDL_AudioSpec(0, 0, 0, 0)
+        self._device = sdl2.SDL_OpenAudioDevice(
+            None, 0, ctypes.byref(wanted), ctypes.byref(obtained), 0
+        )
+        if not self._device:
+            raise sdl2.ext.SDLError()
+        self._wave = audio.SquareWave(
+            max(chunk, obtained.samples), obtained.freq
+        )
+        self._samples = self._wave.samples.ctypes.data
+        sdl2.SDL_PauseAudioDevice(self._device, 0)
+
+    def _fill(self, userdata, stream, length):
+        """SDL audio callback, fills length bytes at stream.
+        """
+        if self._active:
+            start = self._wave.phase
+            count = length // 2
+            self._wave.phase = (start + count) % self._wave.period
+            ctypes.memmove(stream, self._samples + 2*start, length)
+        else:
+            ctypes.memset(stream, 0, length)
+
+    def update_sound(self, active: bool):
+        self._active = active
+
+    def close(self):
+        if self._device:
+            sdl2.SDL_CloseAudioDevice(self._device)
+            self._device = 0
+
+    def __repr__(self):
+        return f'Beeper(active={self._active!r})'
@@ -1,50 +1,273 @@
-from time import perf_counter, sleep
+import hashlib
+import random
+import sys
 
 import numpy as np
-import sdl2
-import sdl2.ext
 
-from pychip8 import cli, cpu, display, key_input
+from pychip8 import (
+    backends, cli, cpu, disasm, headless, idle, scheduler
+)
 
 class Chip8:
+    """Runs a ROM as set up by the command line.
+
+    Modules only some runs need, like the SDL backends, the profiler or
+    the input movies, are imported once a run asks for them, so that
+    starting a headless run stays cheap.
     """
-    """
 
-    def __init__(self):
-        self._cli = cli.CmdLineInterface()
+    #Timer ticks per second
+    _frame_rate = 60
+    #Emulated frames per displayed frame while fast-forwarding
+    _fast_forward_frames = 4
+
+    def __init__(self, cli_args: list=None):
+        self._cli = cli.CmdLineInterface(cli_args)
         self._args = self._cli.parsed_args
-        self._cpu = cpu.Cpu()
-        self._display = display.Display(self._args['display_scale'])
-        self._fps = 1.0 / 60.0
-        self._key_input = key_input.KeyInput(self._cpu.key_presses)
-        self._open_rom()
+        #Instructions run between two timer ticks
+        self._cycles_per_frame = max(
+            1, self._args['ips'] // Chip8._frame_rate
+        )
+        seed = self._args['seed']
+        self._movie = None
+        if self._args['play'] or self._args['record']:
+            from pychip8 import movie
+        if self._args['play']:
+            #Replays run headless, with the settings they were recorded with
+            self._args['headless'] = True
+            self._movie = movie.Movie.load(self._args['play'])
+            seed = self._movie.seed
+            self._cycles_per_frame = self._movie.cycles_per_frame
+        elif self._args['record'] and seed is None:
+            seed = random.getrandbits(64)
+
+        cpu_class = cpu.Cpu
+        if self._args['packed']:
+            from pychip8 import packed
+            cpu_class = packed.PackedCpu
+        self._cpu = cpu_class(seed)
+        self._display, self._key_input = self._setup_backends()
+        self._audio = self._setup_audio()
+        rom_data = self._open_rom()
+        self._capture = None
+        if self._args['capture']:
+            from pychip8 import recorder
+            #SUPER-CHIP programs are captured at their high resolution,
+            #others switch to it if they reach 00FF after all
+            shape = cpu.LORES_SHAPE
+            if self._analysis.uses_hires():
+                shape = cpu.HIRES_SHAPE
+            #Fed once per emulated frame, not once per frame shown
+            self._capture = recorder.FrameRecorder(
+                self._args['capture'], shape
+            )
+        self._profiler = None
+        if self._args['profile']:
+            from pychip8 import profiler
+            self._profiler = profiler.Profiler(self._cpu)
+
+        if self._movie is not None:
+            if self._movie.rom_sha1 != hashlib.sha1(rom_data).digest():
+                print(
+                    'Warning: the movie was recorded on another ROM',
+                    file=sys.stderr
+                )
+            self._key_input = movie.MoviePlayback(
+                self._cpu.key_presses, self._movie
+            )
+        elif self._args['record']:
+            self._key_input = movie.MovieRecorder(self._key_input, movie.Movie(
+                hashlib.sha1(rom_data).digest(), seed, self._cycles_per_frame
+            ))
+
+    def _setup_backends(self):
+        """Picks the display and input backends.
+
+        The SDL modules are only imported for interactive runs,
+        so headless runs work on machines without SDL installed.
+        Threaded runs read the SDL keys into an array of their own,
+        handed to the Cpu through a threaded.KeyHandoff.
+        """
+        self._ui_input = None
+        if self._args['headless']:
+            return (
+                backends.NullDisplay(),
+                backends.NullKeyInput(self._cpu.key_presses)
+            )
+
+        from pychip8 import display, key_input
+        if self._args['threaded']:
+            from pychip8 import threaded
+            self._ui_input = key_input.KeyInput(np.zeros(16, dtype=np.bool))
+            self._handoff = threaded.KeyHandoff(self._cpu.key_presses)
+            return display.Display(self._args['display_scale']), self._handoff
+        return (
+            display.Display(self._args['display_scale']),
+            key_input.KeyInput(self._cpu.key_presses)
+        )
+
+    def _setup_audio(self):
+        """Picks the audio backend: a WAV file with --wav, the SDL beeper
+        for windowed runs, silence for headless or --mute runs and on
+        machines without a sound device.
+        """
+        if self._args['wav']:
+            from pychip8 import audio
+            return audio.WaveRecorder(self._args['wav'], Chip8._frame_rate)
+        if self._args['headless'] or self._args['mute']:
+            return backends.NullAudio()
+
+        import sdl2.ext
+        from pychip8 import beeper
+        try:
+            return beeper.Beeper()
+        except sdl2.ext.SDLError as err:
+            print(f'Warning: no sound ({err})', file=sys.stderr)
+            return backends.NullAudio()
 
-    def _open_rom(self):
+    def _open_rom(self) -> bytes:
+        """Loads the ROM, predecoding the code found by its cached analysis.
+        """
         with open(self._args['Game'], 'rb') as f_rom:
-            self._cpu.load_rom(f_rom.read())
+            rom_data = f_rom.read()
+        self._cpu.load_rom(rom_data)
+        self._analysis = disasm.load_or_analyze(rom_data)
+        disasm.warm_decode_cache(self._cpu, self._analysis)
+        return rom_data
 
     def run(self):
+        """Runs the emulator, saving the profile, the recorded input movie
+        and the screen capture on exit if asked to.
+        """
+        if self._profiler is not None:
+            self._profiler.attach()
+        try:
+            self._run()
+        finally:
+            if self._profiler is not None:
+                self._profiler.detach()
+                self._profiler.save(self._args['profile'])
+            if self._args['record'] and self._movie is None:
+                self._key_input.movie.save(self._args['record'])
+            if self._capture is not None:
+                self._capture.close()
+            self._audio.close()
+
+    def _run(self):
         """Runs the emulator loop.
         """
 
+        if self._args['headless']:
+            self._run_headless()
+            return
+        if self._ui_input is not None:
+            self._run_threaded()
+            return
+
+        #Profiles count every instruction, idle loops included
+        self._skipper = None
+        if self._profiler is None:
+            self._skipper = idle.IdleSkipper(self._cpu)
+        pacer = scheduler.FrameScheduler(Chip8._frame_rate)
+        pacer.turbo = self._args['turbo']
         self._exit = False
         while not self._exit:
-            start_frame = perf_counter()
-            delta_time = 0.0
-            while delta_time < self._fps:
-                self._key_input.process_events()
-                self._cpu.run_cycle()
-                if self._cpu.draw_flag:
-                    np.copyto(self._cpu.draw_flag, False)
-                    self._display.update_pixel_grid(self._cpu.pixel_buffer)
-                sleep(self._fps/6)
-                delta_time = perf_counter() - start_frame
-            self._cpu.decrease_timers()
+            frames = 1
+            if self._key_input.fast_forward:
+                frames = Chip8._fast_forward_frames
+            for _ in range(frames):
+                self._run_frame()
+            self._display.present()
             self._exit = self._key_input.update_exit_status()
+            pacer.wait()
+
+    def _run_frame(self):
+        """Reads the input and runs one frame worth of instructions,
+        then ticks the timers.
+        """
+        self._key_input.process_events()
+        chip = self._cpu
+        if self._skipper is None:
+            for _ in range(self._cycles_per_frame):
+                chip.run_cycle()
+        else:
+            self._skipper.run(self._cycles_per_frame)
+        if chip.draw_flag:
+            chip.draw_flag = False
+            self._display.update_pixel_grid(chip.pixel_buffer)
+            if self._capture is not None:
+                self._capture.update_pixel_grid(chip.pixel_buffer)
+        if self._capture is not None:
+            self._capture.present()
+        self._audio.update_sound(chip._sound_timer > 0)
+        chip.decrease_timers()
+
+    def _run_threaded(self):
+        """Runs the Cpu on a worker thread while this one shows its frames
+        and forwards the keys, once per frame.
+        """
+        from pychip8 import threaded
+        frames = threaded.TripleBuffer(self._cpu.pixel_buffer.shape)
+        worker = threaded.CpuWorker(
+            self._cpu, frames, self._key_input, self._cycles_per_frame,
+            turbo=self._args['turbo'],
+            fast_forward_frames=Chip8._fast_forward_frames,
+            audio=self._audio, capture=self._capture,
+            skip_idle=self._profiler is None
+        )
+        pacer = scheduler.FrameScheduler(Chip8._frame_rate)
+        worker.start()
+        try:
+            while worker.is_alive():
+                self._ui_input.process_events()
+                self._handoff.publish(self._ui_input)
+                frame = frames.latest()
+                if frame is not None:
+                    self._display.update_pixel_grid(frame)
+                self._display.present()
+                if self._ui_input.update_exit_status():
+                    break
+                pacer.wait()
+        finally:
+            worker.stop()
+            worker.join()
+        if worker.error is not None:
+            raise worker.error
+
+    def _run_headless(self):
+        """Runs the CPU unthrottled and prints the achieved speed.
+        """
+
+        #Headless runs present once per emulated frame
+        display = self._display
+        if self._capture is not None:
+            display = backends.TeeDisplay(display, self._capture)
+        runner = headless.HeadlessRunner(
+            self._cpu, display, self._key_input,
+            cycles_per_frame=self._cycles_per_frame,
+            recompile=self._args['recompile'] and self._profiler is None,
+            skip_idle=self._profiler is None,
+            block_starts=self._analysis.blocks, audio=self._audio
+        )
+        runner.run(max_cycles=self._args['cycles'])
+        print(
+            f'{runner.cycles} instructions in {runner.elapsed:.3f} s '
+            f'({runner.instructions_per_second:,.0f} instructions/s)',
+            file=sys.stderr
+        )
+        if runner.idle_cycles:
+            print(
+                f'{runner.idle_cycles} instructions '
+                f'({100 * runner.idle_cycles / runner.cycles:.1f}%) '
+                'skipped in idle loops',
+                file=sys.stderr
+            )
+        if runner.halt_reason:
+            print(f'Halted: {runner.halt_reason}', file=sys.stderr)
 
     def __repr__(self):
         params = [f'{param}: {value!r}' for param, value in self._args.items()]
         return 'Chip8({})'.format(', '.join(params))
 
 if __name__ == '__main__':
-    instance = Chip8()
\ No newline at end of file
+    instance = Chip8()
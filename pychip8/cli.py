@@ -1,5 +1,15 @@
 import sys
-from argparse import ArgumentParser
+from argparse import ArgumentParser, ArgumentTypeError
+
+
+def _seed(text: str) -> int:
+    """Seeds fit the unsigned 64-bit field of input movies.
+    """
+    value = int(text)
+    if not 0 <= value < 2**64:
+        raise ArgumentTypeError(f'{text} is not between 0 and 2**64 - 1')
+    return value
+
 
 class CmdLineInterface:
     """
@@ -23,10 +33,351 @@ class CmdLineInterface:
             '--scale', '-s', type=int, default=10,
             metavar='', dest='display_scale',
             help=(
-                'Set a scale factor to resize the graphical display.',
+                'Set a scale factor to resize the graphical display. '
                 'The original Chip8 display was 64x32 pixels,'
                 ' scaling by x10 to 640x320 is the default.'
             )
         )
 
-        self.parsed_args = vars(self._parser.parse_args(cli_args))
\ No newline at end of file
+        self._parser.add_argument(
+            '--ips', type=int, default=600, metavar='',
+            help=(
+                'Instructions per second, run in 60 equal batches, one per '
+                'timer tick (default: 600).'
+            )
+        )
+
+        self._parser.add_argument(
+            '--turbo', action='store_true',
+            help=(
+                'Run uncapped, without waiting for the end of each frame. '
+                'Holding Tab fast-forwards instead.'
+            )
+        )
+
+        self._parser.add_argument(
+            '--threaded', action='store_true',
+            help=(
+                'Run the CPU on a thread of its own, so a busy window '
+                'never holds the emulation back.'
+            )
+        )
+
+        self._parser.add_argument(
+            '--mute', action='store_true',
+            help='Run without sound.'
+        )
+
+        self._parser.add_argument(
+            '--wav', type=str, default=None, metavar='FILE',
+            help=(
+                'Write the sound into a WAV file instead of playing it, '
+                'one frame of samples per emulated frame.'
+            )
+        )
+
+        self._parser.add_argument(
+            '--headless', action='store_true',
+            help=(
+                'Run without a window or keyboard, as fast as possible, '
+                'and report the instructions per second on exit.'
+            )
+        )
+
+        self._parser.add_argument(
+            '--cycles', '-c', type=int, default=None, metavar='',
+            help=(
+                'Stop after this many instructions. '
+                'Without it a headless run only stops at the end of code.'
+            )
+        )
+
+        self._parser.add_argument(
+            '--recompile', action='store_true',
+            help=(
+                'Headless only: translate the ROM code into cached Python '
+                'functions, one per basic block.'
+            )
+        )
+
+        self._parser.add_argument(
+            '--packed', action='store_true',
+            help='Keep the screen as one 64-bit word per row.'
+        )
+
+        self._parser.add_argument(
+            '--seed', type=_seed, default=None, metavar='',
+            help='Seed of the random numbers, for reproducible runs.'
+        )
+
+        self._parser.add_argument(
+            '--record', type=str, default=None, metavar='FILE',
+            help='Record the key presses of the run into an input movie.'
+        )
+
+        self._parser.add_argument(
+            '--play', type=str, default=None, metavar='FILE',
+            help=(
+                'Replay an input movie headless and unthrottled, with the '
+                'seed and speed it was recorded with.'
+            )
+        )
+
+        self._parser.add_argument(
+            '--capture', type=str, default=None, metavar='FILE',
+            help=(
+                'Stream every changed frame into a screen capture, see '
+                '`python -m pychip8 export`.'
+            )
+        )
+
+        self._parser.add_argument(
+            '--profile', type=str, default=None, metavar='FILE',
+            help=(
+                'Count and time every instruction, and save the profile to '
+                'FILE on exit: as JSON if FILE ends in .json, as a text '
+                'report otherwise. Turns off --recompile and the skipping '
+                'of idle loops.'
+            )
+        )
+
+        self.parsed_args = vars(self._parser.parse_args(cli_args))
+
+
+class FarmInterface:
+    """Command line of `python -m pychip8 farm`.
+    """
+
+    def __init__(self, cli_args: list=None):
+        if cli_args is None:
+            cli_args = sys.argv[2:]
+
+        self._parser = ArgumentParser(prog='pychip8 farm', allow_abbrev=False)
+
+        self._parser.add_argument(
+            'rom_dir', metavar='dir', type=str,
+            help='Directory of ROMs to run, searched recursively.'
+        )
+
+        self._parser.add_argument(
+            '--cycles', '-c', type=int, default=100000, metavar='',
+            help='Instruction budget of every ROM (default: 100000).'
+        )
+
+        self._parser.add_argument(
+            '--frames', '-f', type=int, default=None, metavar='',
+            help='Frame budget of every ROM, on top of the instruction budget.'
+        )
+
+        self._parser.add_argument(
+            '--workers', '-w', type=int, default=None, metavar='',
+            help='Worker processes, one per core by default.'
+        )
+
+        self._parser.add_argument(
+            '--output', '-o', type=str, default='-', metavar='',
+            help='JSON Lines file to write the results to (default: stdout).'
+        )
+
+        self._parser.add_argument(
+            '--recompile', action='store_true',
+            help='Run the ROMs through the basic-block translator.'
+        )
+
+        self.parsed_args = vars(self._parser.parse_args(cli_args))
+
+
+class ExportInterface:
+    """Command line of `python -m pychip8 export`.
+    """
+
+    def __init__(self, cli_args: list=None):
+        if cli_args is None:
+            cli_args = sys.argv[2:]
+
+        self._parser = ArgumentParser(prog='pychip8 export', allow_abbrev=False)
+
+        self._parser.add_argument(
+            'capture', metavar='capture', type=str,
+            help='Screen capture written by --capture.'
+        )
+
+        self._parser.add_argument(
+            'output', metavar='output', type=str,
+            help=(
+                'Animated GIF to write if it ends in .gif, '
+                'otherwise directory to write one PNG per changed frame to.'
+            )
+        )
+
+        self._parser.add_argument(
+            '--scale', '-s', type=int, default=4, metavar='',
+            help='Scale factor of the pixels (default: 4).'
+        )
+
+        self.parsed_args = vars(self._parser.parse_args(cli_args))
+
+
+class DisasmInterface:
+    """Command line of `python -m pychip8 disasm`.
+    """
+
+    def __init__(self, cli_args: list=None):
+        if cli_args is None:
+            cli_args = sys.argv[2:]
+
+        self._parser = ArgumentParser(prog='pychip8 disasm', allow_abbrev=False)
+
+        self._parser.add_argument(
+            'rom', metavar='rom', type=str,
+            help='ROM to disassemble.'
+        )
+
+        self._parser.add_argument(
+            '--json', action='store_true',
+            help='Print the whole analysis as JSON instead of a listing.'
+        )
+
+        self._parser.add_argument(
+            '--no-cache', action='store_true',
+            help='Analyze the ROM again, without reading or writing the cache.'
+        )
+
+        self.parsed_args = vars(self._parser.parse_args(cli_args))
+
+
+class ServeInterface:
+    """Command line of `python -m pychip8 serve`.
+    """
+
+    def __init__(self, cli_args: list=None):
+        if cli_args is None:
+            cli_args = sys.argv[2:]
+
+        self._parser = ArgumentParser(prog='pychip8 serve', allow_abbrev=False)
+
+        self._parser.add_argument(
+            '--socket', type=str, default=None, metavar='PATH',
+            help='Listen on a Unix domain socket instead of TCP.'
+        )
+
+        self._parser.add_argument(
+            '--host', type=str, default='127.0.0.1', metavar='',
+            help='TCP address to listen on (default: 127.0.0.1).'
+        )
+
+        self._parser.add_argument(
+            '--port', type=int, default=8765, metavar='',
+            help='TCP port to listen on (default: 8765).'
+        )
+
+        self._parser.add_argument(
+            '--ips', type=int, default=600, metavar='',
+            help='Instructions per second of every session (default: 600).'
+        )
+
+        self.parsed_args = vars(self._parser.parse_args(cli_args))
+
+
+class FuzzInterface:
+    """Command line of `python -m pychip8 fuzz`.
+    """
+
+    #Keys of fuzz.ENGINES, listed here so the parser imports no engine
+    engines = [
+        'reference', 'cpu', 'packed', 'idle', 'translator', 'batch',
+        'packed-batch',
+    ]
+
+    def __init__(self, cli_args: list=None):
+        if cli_args is None:
+            cli_args = sys.argv[2:]
+
+        self._parser = ArgumentParser(prog='pychip8 fuzz', allow_abbrev=False)
+
+        self._parser.add_argument(
+            'first', choices=FuzzInterface.engines,
+            help='Engine to check.'
+        )
+
+        self._parser.add_argument(
+            'second', choices=FuzzInterface.engines,
+            help='Engine to check it against.'
+        )
+
+        self._parser.add_argument(
+            '--cases', type=int, default=100000, metavar='',
+            help='Programs to run before giving up (default: 100000).'
+        )
+
+        self._parser.add_argument(
+            '--batch', type=int, default=256, metavar='',
+            help='Programs run together in each job (default: 256).'
+        )
+
+        self._parser.add_argument(
+            '--frames', type=int, default=100, metavar='',
+            help='Frames of 10 instructions each program runs (default: 100).'
+        )
+
+        self._parser.add_argument(
+            '--workers', '-j', type=int, default=None, metavar='',
+            help='Worker processes (default: one per core).'
+        )
+
+        self._parser.add_argument(
+            '--seed', type=int, default=0, metavar='',
+            help='Seed of the first batch (default: 0).'
+        )
+
+        self._parser.add_argument(
+            '--corpus', nargs='*', default=['tests', 'roms'], metavar='PATH',
+            help='ROMs, or directories of ROMs, to mutate into programs '
+            '(default: tests roms).'
+        )
+
+        self._parser.add_argument(
+            '--repro', type=str, default=None, metavar='FILE',
+            help='Write the minimized diverging program into FILE.'
+        )
+
+        self.parsed_args = vars(self._parser.parse_args(cli_args))
+
+
+class DebugInterface:
+    """Command line of `python -m pychip8 debug`.
+    """
+
+    def __init__(self, cli_args: list=None):
+        if cli_args is None:
+            cli_args = sys.argv[2:]
+
+        self._parser = ArgumentParser(prog='pychip8 debug', allow_abbrev=False)
+
+        self._parser.add_argument(
+            'rom', type=str,
+            help='Path to the ROM to debug.'
+        )
+
+        self._parser.add_argument(
+            '--seed', type=int, default=None, metavar='',
+            help='Seed of the random number generator used by Cxnn.'
+        )
+
+        self._parser.add_argument(
+            '--ips', type=int, default=600, metavar='',
+            help='Instructions per second, sets the instructions per timer '
+            'tick (default: 600).'
+        )
+
+        self._parser.add_argument(
+            '--break', '-b', action='append', default=[], metavar='ADDR',
+            help='Hexadecimal address to stop at, can be given several times.'
+        )
+
+        self._parser.add_argument(
+            '--trace-size', type=int, default=4096, metavar='',
+            help='Instructions kept by the trace (default: 4096).'
+        )
+
+        self.parsed_args = vars(self._parser.parse_args(cli_args))
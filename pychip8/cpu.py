@@ -1,39 +1,119 @@
+import random
+import struct
+from functools import lru_cache
+from inspect import signature
+
 import numpy as np
 
 from pychip8 import fontset
 
+#Extracts each named operand from a 16-bit instruction word.
+#Instruction handlers name their parameters after these fields.
+_OPERAND_FIELDS = {
+    'x': lambda word: (word & 0x0F00) >> 8,
+    'y': lambda word: (word & 0x00F0) >> 4,
+    'n': lambda word: word & 0x000F,
+    'nn': lambda word: word & 0x00FF,
+    'nnn': lambda word: word & 0x0FFF,
+}
+
+#Pixels of every sprite byte, most significant bit first
+_SPRITE_PIXELS = np.unpackbits(
+    np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1
+).astype(np.bool)
+
+#(rows, columns) of the screen in low and high resolution
+LORES_SHAPE = (32, 64)
+HIRES_SHAPE = (64, 128)
+#Bytes of a screen packed to one bit per pixel, in high resolution
+_PACKED_SCREEN_SIZE = HIRES_SHAPE[0] * HIRES_SHAPE[1] // 8
+
+#Header of save states: magic, V0-VF, I, PC, SP, stack, delay and sound
+#timers, high resolution flag, RPL flags
+_STATE_HEADER = struct.Struct('<4s16sHHB16HBBB16s')
+_STATE_MAGIC = b'C8S2'
+_STATE_SIZE = _STATE_HEADER.size + 4096 + _PACKED_SCREEN_SIZE
+
+@lru_cache(maxsize=None)
+def _method_operands(func) -> tuple:
+    """Operand names of a Cpu method, past self, read once per method.
+    """
+    return tuple(signature(func).parameters)[1:]
+
 class Cpu:
     """Class handling CPU and memory operations.
+
+    Registers are plain Python ints masked to their 8, 12 or 16-bit width
+    by the instructions that write them, and memory is a memoryview over
+    a bytearray, so no opcode pays NumPy's per-call overhead.
+    reference.ReferenceCpu keeps the original NumPy-backed implementation.
+
+    Instructions are decoded once per address into a handler and its
+    operands, see _predecode.
+
+    The SUPER-CHIP instructions are supported too: 00FF switches the
+    screen to 128x64 pixels, where Dxy0 draws 16x16 sprites, and 00FE
+    back to 64x32. pixel_buffer is replaced by a new array on every
+    switch, so its size always gives the current resolution.
+
+    Args:
+        seed: Seed of the random numbers of Cxnn, runs with the same seed
+            and the same input are identical.
+
+    Attributes:
+        pixel_buffer: Array of bools storing the current state of the pixel grid.
+        draw_flag: Set when an instruction changed pixel_buffer.
+        key_presses: Array of bools with the state of the 16 keys.
     """
 
-    def __init__(self):
+    __slots__ = (
+        '_memory', '_memory_array', '_v_regs', '_i_reg', '_delay_timer', '_sound_timer',
+        '_program_counter', '_stack_pointer', '_stack', '_rng',
+        '_hires', '_rpl_flags',
+        '_opcode_main_table', '_opcode_0nnn_table', '_opcode_8xyn_table',
+        '_opcode_exnn_table', '_opcode_fxnn_table',
+        '_decode_cache', '_decoded_words', '_code_write_hooks',
+        'pixel_buffer', '_screen', 'draw_flag', 'key_presses',
+    )
+
+    #Bits selecting the entry of the secondary table of each opcode family
+    _opcode_sub_masks = {0x0: 0x00FF, 0x8: 0x000F, 0xE: 0x00FF, 0xF: 0x00FF}
+
+    def __init__(self, seed: int = None):
         #Allocate the 4KB max memory available to Chip8
-        self._memory = np.zeros(4096, dtype=np.uint8)
+        self._memory = memoryview(bytearray(4096))
+        #NumPy view of the same bytes, for bulk reads
+        self._memory_array = np.frombuffer(self._memory, dtype=np.uint8)
 
         #The 16 general-purpose 8-bit registers
-        self._v_regs = np.zeros(16, dtype=np.uint8)
+        self._v_regs = bytearray(16)
 
         #16-bit memory register
-        self._i_reg = np.zeros(1, dtype=np.uint16)
+        self._i_reg = 0
 
         #Special delay and sound timers
-        self._delay_timer = np.zeros(1, dtype=np.uint8)
-        self._sound_timer = np.zeros(1, dtype=np.uint8)
+        self._delay_timer = 0
+        self._sound_timer = 0
 
         #Special registers and stack
-        self._program_counter = np.zeros(1, dtype=np.uint16)
-        self._stack_pointer = np.zeros(1, dtype=np.uint8)
-        self._stack = np.zeros(16, dtype=np.uint16)
+        self._program_counter = 0
+        self._stack_pointer = 0
+        self._stack = [0] * 16
+
+        #Random number stream of Cxnn
+        self._rng = random.Random(seed)
+
+        #SUPER-CHIP persistent flags of Fx75/Fx85
+        self._rpl_flags = bytearray(16)
 
         self._setup_opcode_table()
-        self._opcode = np.zeros(1, dtype=np.uint16)
-        #Helper variables to avoid multiple definitions in opcode definitions
-        self._vx = np.zeros(1, dtype=np.uint8)
-        self._vy = np.zeros(1, dtype=np.uint8)
+        #Callables told about every write into memory, see _invalidate_code
+        self._code_write_hooks = []
+        self._flush_decode_cache()
 
         #Variables that are accessed by the IO
-        self.pixel_buffer = np.zeros(32*64, dtype=np.bool)
-        self.draw_flag = np.zeros(1, dtype=np.bool)
+        self._set_resolution(False)
+        self.draw_flag = False
         self.key_presses = np.zeros(16, dtype=np.bool)
 
         #Load the font set at the start of memory block
@@ -41,32 +121,24 @@ class Cpu:
 
     def _setup_opcode_table(self):
         """Creates a lookup dictionary of opcode instructions.
+
+        Families with several instructions map to a secondary table,
+        indexed by the word bits in _opcode_sub_masks.
         """
 
-        self._opcode_main_table = {
-            0x0: self._lookup_opcode_0nnn,
-            0x1: self._op_1nnn,
-            0x2: self._op_2nnn,
-            0x3: self._op_3xnn,
-            0x4: self._op_4xnn,
-            0x5: self._op_5xy0,
-            0x6: self._op_6xnn,
-            0x7: self._op_7xnn,
-            0x8: self._lookup_opcode_8xyn,
-            0x9: self._op_9xy0,
-            0xA: self._op_annn,
-            0xB: self._op_bnnn,
-            0xC: self._op_cxnn,
-            0xD: self._op_dxyn,
-            0xE: self._lookup_opcode_exnn,
-            0xF: self._lookup_opcode_fxnn,
-        }
-    
         self._opcode_0nnn_table = {
             0x00: self._op_0000,
             0xe0: self._op_00e0,
             0xee: self._op_00ee,
+            0xfb: self._op_00fb,
+            0xfc: self._op_00fc,
+            0xfd: self._op_00fd,
+            0xfe: self._op_00fe,
+            0xff: self._op_00ff,
         }
+        #00Cn scrolls down by n rows
+        for n in range(16):
+            self._opcode_0nnn_table[0xc0 | n] = self._op_00cn
 
         self._opcode_8xyn_table = {
             0x0: self._op_8xy0,
@@ -92,23 +164,117 @@ class Cpu:
             0x18: self._op_fx18,
             0x1e: self._op_fx1e,
             0x29: self._op_fx29,
+            0x30: self._op_fx30,
             0x33: self._op_fx33,
             0x55: self._op_fx55,
             0x65: self._op_fx65,
+            0x75: self._op_fx75,
+            0x85: self._op_fx85,
+        }
+
+        self._opcode_main_table = {
+            0x0: self._opcode_0nnn_table,
+            0x1: self._op_1nnn,
+            0x2: self._op_2nnn,
+            0x3: self._op_3xnn,
+            0x4: self._op_4xnn,
+            0x5: self._op_5xy0,
+            0x6: self._op_6xnn,
+            0x7: self._op_7xnn,
+            0x8: self._opcode_8xyn_table,
+            0x9: self._op_9xy0,
+            0xA: self._op_annn,
+            0xB: self._op_bnnn,
+            0xC: self._op_cxnn,
+            0xD: self._op_dxyn,
+            0xE: self._opcode_exnn_table,
+            0xF: self._opcode_fxnn_table,
         }
 
     def _load_fontset(self):
-        fonts = fontset.fontset
-        self._memory[:len(fonts)] = fonts
+        fonts = np.concatenate((fontset.fontset, fontset.big_fontset))
+        self._memory[:len(fonts)] = fonts.tobytes()
+
+    def _set_resolution(self, hires: bool):
+        """Switches to a blank screen of the low or high resolution.
+        """
+        self._hires = hires
+        height, width = HIRES_SHAPE if hires else LORES_SHAPE
+        self.pixel_buffer = np.zeros(height*width, dtype=np.bool)
+        #2D view of pixel_buffer, indexed [row, column]
+        self._screen = self.pixel_buffer.reshape(height, width)
+        self.draw_flag = True
 
     def load_rom(self, rom_data: bytes):
         """Inserts rom code into memory, starting at byte 512
         """
 
         rom_size = len(rom_data)
-        self._memory[0x200:rom_size+0x200] = np.frombuffer(rom_data, dtype=np.uint8)
-        np.copyto(self._program_counter, 0x200)
-    
+        self._memory[0x200:rom_size+0x200] = rom_data
+        self._program_counter = 0x200
+        self._flush_decode_cache()
+
+    def save_state(self) -> bytes:
+        """Snapshots the machine state into a fixed-size blob.
+
+        The blob holds the registers, stack, timers, the whole memory and
+        the framebuffer packed to one bit per pixel, padded to the size of
+        a high resolution one. Key presses are
+        input, not machine state, and are left out, as is the state of
+        the random number stream.
+        """
+        header = _STATE_HEADER.pack(
+            _STATE_MAGIC, bytes(self._v_regs), self._i_reg,
+            self._program_counter, self._stack_pointer, *self._stack,
+            self._delay_timer, self._sound_timer, self._hires,
+            bytes(self._rpl_flags)
+        )
+        screen = self._packed_screen().ljust(_PACKED_SCREEN_SIZE, b'\0')
+        return b''.join((header, self._memory, screen))
+
+    def load_state(self, state: bytes):
+        """Restores a blob made by save_state.
+
+        Only the decoded instructions of memory that actually changed are
+        dropped, so restoring a recent state keeps most of the cache.
+        """
+        if len(state) != _STATE_SIZE:
+            raise ValueError(f'save state must be {_STATE_SIZE} bytes long')
+        fields = _STATE_HEADER.unpack_from(state)
+        if fields[0] != _STATE_MAGIC:
+            raise ValueError('not a save state')
+        self._v_regs[:] = fields[1]
+        self._i_reg, self._program_counter, self._stack_pointer = fields[2:5]
+        self._stack = list(fields[5:21])
+        self._delay_timer, self._sound_timer = fields[21:23]
+        self._rpl_flags[:] = fields[24]
+        if fields[23] != self._hires:
+            self._set_resolution(bool(fields[23]))
+
+        memory = np.frombuffer(
+            state, dtype=np.uint8, count=4096, offset=_STATE_HEADER.size
+        )
+        changed = np.flatnonzero(memory != self._memory_array)
+        if changed.size:
+            self._memory_array[:] = memory
+            self._invalidate_code(int(changed[0]), int(changed[-1]) + 1)
+
+        height, width = HIRES_SHAPE if self._hires else LORES_SHAPE
+        offset = _STATE_HEADER.size + 4096
+        self._load_packed_screen(state[offset:offset + height*width//8])
+        self.draw_flag = True
+
+    def _packed_screen(self) -> bytes:
+        """The screen at one bit per pixel, rows top to bottom, most
+        significant bit leftmost.
+        """
+        return np.packbits(self.pixel_buffer).tobytes()
+
+    def _load_packed_screen(self, packed: bytes):
+        self.pixel_buffer[:] = np.unpackbits(
+            np.frombuffer(packed, dtype=np.uint8)
+        )
+
     def decrease_timers(self):
         """Runs down both delay and sound timers.
         """
@@ -120,10 +286,14 @@ class Cpu:
     def run_cycle(self):
         """Run a full CPU cycle (fetch-decode-execute).
         """
-        self._fetch_opcode()
-        self._execute_opcode()
-
-    def _fetch_opcode(self):
+        decoded = self._decode_cache[self._program_counter]
+        if decoded is None:
+            decoded = self._predecode(self._program_counter)
+        handler, operands = decoded
+        handler(*operands)
+        self._program_counter = (self._program_counter + 2) & 0xFFFF
+
+    def _fetch_opcode(self, address: int) -> int:
         """ Combines two bytes to make an opcode.
 
         Take byte in location memory[x], e.g 0b00001000.
@@ -131,45 +301,69 @@ class Cpu:
         OR byte in memory[x+1], e.g. 0b00000010
         Resulting in opcode 0b0000100000000010 or 0x0802
         """
-        np.copyto(
-            self._opcode,
-            self._memory[self._program_counter].astype(self._opcode.dtype) << 8 
-            | self._memory[self._program_counter+1]
-        )
-        #print(hex(self._opcode[0]))
+        return self._memory[address] << 8 | self._memory[address+1]
+
+    def _predecode(self, address: int) -> tuple:
+        """Decodes the instruction at address and caches the result.
 
-        #Enough opcodes use these to be worth initialising here once
-        vx = (self._opcode & 0x0F00) >> 8
-        vy = (self._opcode & 0x00F0) >> 4
-        np.copyto(self._vx, vx.astype(np.uint8))
-        np.copyto(self._vy, vy.astype(np.uint8))
+        Each distinct 16-bit word is decoded once, the address cache then
+        points at the shared (handler, operands) pair until a write into
+        that address invalidates it.
+        """
+        word = self._fetch_opcode(address)
+        decoded = self._decoded_words.get(word)
+        if decoded is None:
+            decoded = self._decode(word)
+            self._decoded_words[word] = decoded
+        self._decode_cache[address] = decoded
+        return decoded
+
+    def _decode(self, word: int) -> tuple:
+        """Returns the handler for word along with its operands.
+
+        A KeyError is raised for words that are not valid instructions.
+        """
+        handler = self._lookup_opcode(word)
+        func = getattr(handler, '__func__', None)
+        #Wrappers, like those of the profiler, are read on each decode
+        if func is None:
+            fields = signature(handler).parameters
+        else:
+            fields = _method_operands(func)
+        operands = tuple(_OPERAND_FIELDS[field](word) for field in fields)
+        return handler, operands
 
-    def _execute_opcode(self):
+    def _lookup_opcode(self, word: int):
         """Associates the opcodes with the corresponding instructions
         """
+        family = word >> 12
+        handler = self._opcode_main_table[family]
+        if isinstance(handler, dict):
+            handler = handler[word & Cpu._opcode_sub_masks[family]]
+        return handler
 
-        self._lookup_opcode()
-        self._program_counter += 2
-
-    def _lookup_opcode(self):
-        idx = (self._opcode & 0xF000) >> 12
-        self._opcode_main_table[idx[0]]()
-    
-    def _lookup_opcode_0nnn(self):
-        idx = self._opcode & 0x00FF
-        self._opcode_0nnn_table[idx[0]]()
-    
-    def _lookup_opcode_8xyn(self):
-        idx = self._opcode & 0x000F
-        self._opcode_8xyn_table[idx[0]]()
-
-    def _lookup_opcode_exnn(self):
-        idx = self._opcode & 0x00FF
-        self._opcode_exnn_table[idx[0]]()
-
-    def _lookup_opcode_fxnn(self):
-        idx = self._opcode & 0x00FF
-        self._opcode_fxnn_table[idx[0]]()
+    def _invalidate_code(self, start: int, end: int):
+        """Drops the decoded instructions overlapping memory[start:end].
+
+        Hooks in _code_write_hooks get the same range, so code derived
+        from memory elsewhere, like translated blocks, can be dropped too.
+        """
+        #The instruction starting one byte earlier also reads memory[start]
+        start = max(start - 1, 0)
+        end = min(end, len(self._decode_cache))
+        self._decode_cache[start:end] = [None] * (end - start)
+        for hook in self._code_write_hooks:
+            hook(start, end)
+
+    def _flush_decode_cache(self):
+        """Forgets every decoded instruction.
+
+        Needed whenever memory is reloaded or the opcode tables change.
+        """
+        self._decode_cache = [None] * len(self._memory)
+        self._decoded_words = {}
+        for hook in self._code_write_hooks:
+            hook(0, len(self._memory))
 
     """Here starts the definitions of the different opcodes"""
     def _op_0000(self):
@@ -178,208 +372,260 @@ class Cpu:
     #Clear the screen
     def _op_00e0(self):
         self.pixel_buffer[:] = False
-        np.copyto(self.draw_flag, True)
+        self.draw_flag = True
+
+    #Scroll the screen down by n rows
+    def _op_00cn(self, n):
+        """Scrolls n pixels of the current resolution, like later
+        SUPER-CHIP interpreters, and shifts the whole screen as one slice.
+        """
+        if n:
+            self._screen[n:] = self._screen[:-n]
+            self._screen[:n] = False
+        self.draw_flag = True
+
+    #Scroll the screen right by 4 columns
+    def _op_00fb(self):
+        self._screen[:, 4:] = self._screen[:, :-4]
+        self._screen[:, :4] = False
+        self.draw_flag = True
+
+    #Scroll the screen left by 4 columns
+    def _op_00fc(self):
+        self._screen[:, :-4] = self._screen[:, 4:]
+        self._screen[:, -4:] = False
+        self.draw_flag = True
+
+    #Exit the interpreter
+    def _op_00fd(self):
+        raise ValueError('\n\nEXIT\n\n')
+
+    #Switch to the 64x32 screen
+    def _op_00fe(self):
+        self._set_resolution(False)
+
+    #Switch to the 128x64 screen
+    def _op_00ff(self):
+        self._set_resolution(True)
 
     #Return from subroutine
     def _op_00ee(self):
-        self._stack_pointer -= 1
-        np.copyto(self._program_counter, self._stack[self._stack_pointer])
+        self._stack_pointer = (self._stack_pointer - 1) & 0xFF
+        self._program_counter = self._stack[self._stack_pointer]
 
     #Jump to address
-    def _op_1nnn(self):
-        np.copyto(self._program_counter, (self._opcode & 0x0FFF) - 2)
-    
+    def _op_1nnn(self, nnn):
+        self._program_counter = (nnn - 2) & 0xFFFF
+
     #Execute sub-routine
-    def _op_2nnn(self):
+    def _op_2nnn(self, nnn):
         self._stack[self._stack_pointer] = self._program_counter
-        self._stack_pointer += 1
-        np.copyto(self._program_counter, (self._opcode & 0x0FFF) - 2)
-    
+        self._stack_pointer = (self._stack_pointer + 1) & 0xFF
+        self._program_counter = (nnn - 2) & 0xFFFF
+
     #Skip instruction if VX value == nn
-    def _op_3xnn(self):
-        if self._v_regs[self._vx] == self._opcode & 0x00FF:
-            self._program_counter += 2
+    def _op_3xnn(self, x, nn):
+        if self._v_regs[x] == nn:
+            self._program_counter = (self._program_counter + 2) & 0xFFFF
 
     #Skip instruction if VX value != nn
-    def _op_4xnn(self):
-        if self._v_regs[self._vx] != self._opcode & 0x00FF:
-            self._program_counter += 2
-    
+    def _op_4xnn(self, x, nn):
+        if self._v_regs[x] != nn:
+            self._program_counter = (self._program_counter + 2) & 0xFFFF
+
     #Skip instruction if VX == VY
-    def _op_5xy0(self):
-        if self._v_regs[self._vx] == self._v_regs[self._vy]:
-            self._program_counter += 2
-    
+    def _op_5xy0(self, x, y):
+        if self._v_regs[x] == self._v_regs[y]:
+            self._program_counter = (self._program_counter + 2) & 0xFFFF
+
     #Store nn in VX
-    def _op_6xnn(self):
-        self._v_regs[self._vx] = self._opcode & 0x00FF
-    
+    def _op_6xnn(self, x, nn):
+        self._v_regs[x] = nn
+
     #Add nn to VX
-    def _op_7xnn(self):
-        self._v_regs[self._vx] += self._opcode & 0x00FF
+    def _op_7xnn(self, x, nn):
+        self._v_regs[x] = (self._v_regs[x] + nn) & 0xFF
 
     #Store VY in VX
-    def _op_8xy0(self):
-        self._v_regs[self._vx] = self._v_regs[self._vy]
-    
+    def _op_8xy0(self, x, y):
+        self._v_regs[x] = self._v_regs[y]
+
     #Set VX to (VX | VY)
-    def _op_8xy1(self):
-        new_vx = self._v_regs[self._vx] | self._v_regs[self._vy]
-        self._v_regs[self._vx] = new_vx
-        
+    def _op_8xy1(self, x, y):
+        self._v_regs[x] |= self._v_regs[y]
+
     #Set VX to (VX & VY)
-    def _op_8xy2(self):
-        new_vx = self._v_regs[self._vx] & self._v_regs[self._vy]
-        self._v_regs[self._vx] = new_vx
+    def _op_8xy2(self, x, y):
+        self._v_regs[x] &= self._v_regs[y]
 
     #Set VX to (VX XOR VY)
-    def _op_8xy3(self):
-        new_vx = self._v_regs[self._vx] ^ self._v_regs[self._vy]
-        self._v_regs[self._vx] = new_vx
+    def _op_8xy3(self, x, y):
+        self._v_regs[x] ^= self._v_regs[y]
 
     #Add VY to VX; set VF = 1 if carry else 0
-    def _op_8xy4(self):
+    def _op_8xy4(self, x, y):
+        v_regs = self._v_regs
         #Carry if VX > 0xFF - VY
-        carry = self._v_regs[self._vx] >  0xFF - self._v_regs[self._vy]
-        self._v_regs[-1] = carry
-        self._v_regs[self._vx] += self._v_regs[self._vy]
+        carry = v_regs[x] > 0xFF - v_regs[y]
+        v_regs[15] = carry
+        v_regs[x] = (v_regs[x] + v_regs[y]) & 0xFF
 
     #Subtract VY from VX; set VF = 0 if borrow else 1
-    def _op_8xy5(self):
-        borrow = self._v_regs[self._vx] < self._v_regs[self._vy]
-        self._v_regs[-1] = not borrow
-        self._v_regs[self._vx] -= self._v_regs[self._vy]
+    def _op_8xy5(self, x, y):
+        v_regs = self._v_regs
+        borrow = v_regs[x] < v_regs[y]
+        v_regs[15] = not borrow
+        v_regs[x] = (v_regs[x] - v_regs[y]) & 0xFF
 
     #Store (VY >> 1) in VX; set VF = (VY & 0x0F)
-    def _op_8xy6(self):
-        self._v_regs[-1] = self._v_regs[self._vy] & 0x0F
-        self._v_regs[self._vx] = self._v_regs[self._vy] >> 1
+    def _op_8xy6(self, x, y):
+        v_regs = self._v_regs
+        v_regs[15] = v_regs[y] & 0x0F
+        v_regs[x] = v_regs[y] >> 1
 
     #Store (VY - VX) in VX; set VF = 0 if borrow else 1
-    def _op_8xy7(self):
-        borrow = self._v_regs[self._vy] < self._v_regs[self._vx]
-        self._v_regs[-1] = not borrow
-        self._v_regs[self._vx] = self._v_regs[self._vy] - self._v_regs[self._vx]
+    def _op_8xy7(self, x, y):
+        v_regs = self._v_regs
+        borrow = v_regs[y] < v_regs[x]
+        v_regs[15] = not borrow
+        v_regs[x] = (v_regs[y] - v_regs[x]) & 0xFF
 
     #Store (VY << 1) in VX; set VF = (VY & 0xF0)
-    def _op_8xye(self):
-        self._v_regs[-1] = self._v_regs[self._vy] & 0xF0
-        self._v_regs[self._vx] = self._v_regs[self._vy] << 1
+    def _op_8xye(self, x, y):
+        v_regs = self._v_regs
+        v_regs[15] = v_regs[y] & 0xF0
+        v_regs[x] = (v_regs[y] << 1) & 0xFF
 
     #Skip next instruction if VX != VY
-    def _op_9xy0(self):
-        if self._v_regs[self._vx] != self._v_regs[self._vy]:
-            self._program_counter += 2
+    def _op_9xy0(self, x, y):
+        if self._v_regs[x] != self._v_regs[y]:
+            self._program_counter = (self._program_counter + 2) & 0xFFFF
 
     #Store address nnn in I
-    def _op_annn(self):
-        np.copyto(self._i_reg, self._opcode & 0x0FFF)
+    def _op_annn(self, nnn):
+        self._i_reg = nnn
 
     #Jump to address (nnn + V0)
-    def _op_bnnn(self):
-        np.copyto(
-            self._program_counter, self._v_regs[0] + (self._opcode & 0x0FFF) - 2
-            )
+    def _op_bnnn(self, nnn):
+        self._program_counter = (self._v_regs[0] + nnn - 2) & 0xFFFF
 
     #Set VX to random number nn
-    def _op_cxnn(self):
-        rand_nn = np.random.default_rng().integers(0x100, dtype=np.uint8)
-        self._v_regs[self._vx] = rand_nn
+    def _op_cxnn(self, x):
+        self._v_regs[x] = self._rng.getrandbits(8)
 
     #Draw sprite at pos (VX,VY) with n bytes start at address in I
     #Set VF = 1 if (set pixels are unset) else 0
-    def _op_dxyn(self):
-        sprite_height = self._opcode[0] & 0x000F
+    def _op_dxyn(self, x, y, n):
+        """Each sprite byte expands to 8 pixels through _SPRITE_PIXELS, so
+        the whole sprite is XORed into the screen as a single slice.
+
+        In high resolution Dxy0 draws a 16x16 sprite of 32 bytes, two per
+        row, expanded the same way into 16 rows of 16 pixels.
+        """
+        ireg = self._i_reg
+        screen_height, screen_width = self._screen.shape
+        sprite_width = 8
+        size = n
+        if n == 0 and self._hires:
+            n, sprite_width, size = 16, 16, 32
+        if ireg + size > len(self._memory):
+            raise IndexError('sprite data past the end of memory')
         #Position should wrap around if vx, vy larger than screen
-        x_pos = self._v_regs[self._vx][0] % 64
-        y_pos = self._v_regs[self._vy][0] % 32
-
-        #Reshape buffer for easier handling
-        buffer = self.pixel_buffer.reshape(32, 64)
-
-        #Set VF = 0 unless any ON pixel is turned OFF
-        self._v_regs[-1] = 0
-        #Reminder that each sprite in the fontset is a column of 5 bytes
-        for row in range(sprite_height):
-            sprite_byte = self._memory[self._i_reg+row]
-            for pixel_bit in range(8):
-                #(128 >> pixel_bit) -> 128, 64, 32, 16...
-                #so this picks up each bit in sprite_byte one by one
-                if (sprite_byte & (128 >> pixel_bit)) != 0:
-                    #if already set, XOR will unset it so make VF = 1
-                    if y_pos + row >= buffer.shape[0]:
-                        continue
-                    if x_pos + pixel_bit >= buffer.shape[1]:
-                        continue
-                    if buffer[y_pos+row][x_pos+pixel_bit] != 0:
-                        self._v_regs[-1] = 1
-                    #XOR with current pixel value
-                    buffer[y_pos+row][x_pos+pixel_bit] ^= 1
-
-        np.copyto(self.draw_flag, True)
-                    
+        x_pos = self._v_regs[x] % screen_width
+        y_pos = self._v_regs[y] % screen_height
+        #...but the sprite itself is clipped at the screen edges
+        height = min(n, screen_height - y_pos)
+        width = min(sprite_width, screen_width - x_pos)
+
+        sprite_bytes = self._memory_array[ireg:ireg+size]
+        sprite = _SPRITE_PIXELS[sprite_bytes].reshape(n, sprite_width)
+        sprite = sprite[:height, :width]
+        region = self._screen[y_pos:y_pos+height, x_pos:x_pos+width]
+        #VF = 1 if any ON pixel is turned OFF
+        self._v_regs[15] = bool((region & sprite).any())
+        region ^= sprite
+
+        self.draw_flag = True
 
     #Skip next instruction if key pressed == hex value in VX
-    def _op_ex9e(self):
-        key = self._v_regs[self._vx]
+    def _op_ex9e(self, x):
+        key = self._v_regs[x]
         if self.key_presses[key]:
-            self._program_counter += 2
+            self._program_counter = (self._program_counter + 2) & 0xFFFF
 
     #Skip next instruction if key == hex in VX is NOT pressed
-    def _op_exa1(self):
-        key = self._v_regs[self._vx]
+    def _op_exa1(self, x):
+        key = self._v_regs[x]
         if not self.key_presses[key]:
-            self._program_counter += 2
+            self._program_counter = (self._program_counter + 2) & 0xFFFF
 
     #Store delay_timer in VX
-    def _op_fx07(self):
-        self._v_regs[self._vx] = self._delay_timer
+    def _op_fx07(self, x):
+        self._v_regs[x] = self._delay_timer
 
     #Wait for keypress and store key in VX
-    def _op_fx0a(self):
-        #np.where returns a tuple of arrays
-        #hence why accessing the index requires two indices
-        key_array = np.where(self.key_presses == True)[0]
-        if key_array.size > 0:
-            self._v_regs[self._vx] = key_array[0]
+    def _op_fx0a(self, x):
+        #argmax finds the first pressed key, but is also 0 when none is
+        if self.key_presses.any():
+            self._v_regs[x] = int(self.key_presses.argmax())
         else:
-            self._program_counter -= 2
+            self._program_counter = (self._program_counter - 2) & 0xFFFF
 
     #Set delay_timer to value in VX
-    def _op_fx15(self):
-        np.copyto(self._delay_timer, self._v_regs[self._vx])
+    def _op_fx15(self, x):
+        self._delay_timer = self._v_regs[x]
 
     #Set sound_timer to value in VX
-    def _op_fx18(self):
-        np.copyto(self._sound_timer, self._v_regs[self._vx])
+    def _op_fx18(self, x):
+        self._sound_timer = self._v_regs[x]
 
     #Add value in VX to value in register I
-    def _op_fx1e(self):
-        self._i_reg += self._v_regs[self._vx]
+    def _op_fx1e(self, x):
+        self._i_reg = (self._i_reg + self._v_regs[x]) & 0xFFFF
 
     #Set I to address of sprite data corresponding to hex in VX
-    def _op_fx29(self):
+    def _op_fx29(self, x):
         """The fontset starts at._memory[0], each digit is 5 bytes long
         so the address of each digit sprite is simply the digit*5
+
+        The product is kept 8-bit wide, like the register it comes from.
         """
-        np.copyto(self._i_reg, 5*self._v_regs[self._vx])
+        self._i_reg = (5*self._v_regs[x]) & 0xFF
+
+    #Set I to the address of the big sprite of the digit in VX
+    def _op_fx30(self, x):
+        self._i_reg = fontset.big_font_address + 10*(self._v_regs[x] & 0xF)
 
     #Store binary-coded decimal of value in VX in._memory at I, I+1, and I+2
-    def _op_fx33(self):
-        self._memory[self._i_reg] = (self._v_regs[self._vx] % 1000) // 100
-        self._memory[self._i_reg+1] = (self._v_regs[self._vx] % 100) // 10
-        self._memory[self._i_reg+2] = (self._v_regs[self._vx] % 10)
+    def _op_fx33(self, x):
+        vx = self._v_regs[x]
+        self._memory[self._i_reg] = (vx % 1000) // 100
+        self._memory[self._i_reg+1] = (vx % 100) // 10
+        self._memory[self._i_reg+2] = (vx % 10)
+        self._invalidate_code(self._i_reg, self._i_reg+3)
 
     #Store values V0 to VX (inclusive) in _memory at I, I+1, ...; set I to I+X+1
-    def _op_fx55(self):
-        ireg = self._i_reg[0]
-        vx = self._vx[0] + 1
+    def _op_fx55(self, x):
+        ireg = self._i_reg
+        vx = x + 1
         self._memory[ireg:ireg+vx] = self._v_regs[:vx]
-        np.copyto(self._i_reg, self._i_reg + self._vx + 1)
+        self._invalidate_code(ireg, ireg+vx)
+        self._i_reg = (ireg + vx) & 0xFFFF
 
     #Fill V0 to VX (inc.) with values in memory at I, I+1, ...; set I to I+X+1
-    def _op_fx65(self):
-        ireg = self._i_reg[0]
-        vx = self._vx[0] + 1
+    def _op_fx65(self, x):
+        ireg = self._i_reg
+        vx = x + 1
+        #A short slice would resize the bytearray instead of failing
+        if ireg + vx > len(self._memory):
+            raise IndexError('register load past the end of memory')
         self._v_regs[:vx] = self._memory[ireg:ireg+vx]
-        np.copyto(self._i_reg, self._i_reg + self._vx + 1)
\ No newline at end of file
+        self._i_reg = (ireg + vx) & 0xFFFF
+
+    #Store V0 to VX (inclusive) in the RPL flags
+    def _op_fx75(self, x):
+        self._rpl_flags[:x+1] = self._v_regs[:x+1]
+
+    #Fill V0 to VX (inclusive) from the RPL flags
+    def _op_fx85(self, x):
+        self._v_regs[:x+1] = self._rpl_flags[:x+1]
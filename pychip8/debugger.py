@@ -0,0 +1,581 @@
+"""Breakpoints, watchpoints and instruction tracing for cpu.Cpu.
+
+Run from the top directory as: `python -m pychip8 debug ./roms/ROMNAME`
+
+Like profiling, debugging swaps the handlers of the opcode tables for
+instrumented wrappers, but only while a breakpoint, watchpoint or trace is
+armed. Otherwise the Cpu runs its usual tables, with idle loops skipped,
+and pays nothing.
+"""
+import cmd
+import shlex
+from functools import wraps
+
+import numpy as np
+
+from pychip8 import cli, cpu, disasm, idle
+
+#Registers that can be watched besides V0-VF, and the Cpu attribute of each
+_REGISTERS = {
+    'I': '_i_reg', 'DT': '_delay_timer', 'ST': '_sound_timer',
+    'SP': '_stack_pointer',
+}
+
+def read_register(chip: cpu.Cpu, name: str) -> int:
+    """Value of V0-VF, I, DT, ST, SP or PC.
+    """
+    name = name.upper()
+    if name == 'PC':
+        return chip._program_counter
+    if name in _REGISTERS:
+        return getattr(chip, _REGISTERS[name])
+    if len(name) == 2 and name[0] == 'V':
+        return chip._v_regs[int(name[1], 16)]
+    raise ValueError(f'unknown register {name!r}')
+
+def registers(chip: cpu.Cpu) -> dict:
+    """Name -> value of every register, the names conditions can use.
+    """
+    values = {f'V{x:X}': value for x, value in enumerate(chip._v_regs)}
+    for name in ('PC', *_REGISTERS):
+        values[name] = read_register(chip, name)
+    return values
+
+
+class _Break(Exception):
+    """Raised by an instrumented handler before running a breakpoint.
+    """
+
+
+class TraceBuffer:
+    """Ring of the last instructions run, preallocated.
+
+    Args:
+        size: Instructions kept, older ones are overwritten.
+
+    Attributes:
+        count: Instructions recorded so far, including overwritten ones.
+    """
+
+    dtype = np.dtype([
+        ('pc', '<u2'), ('word', '<u2'), ('i', '<u2'), ('v', 'u1', (16,)),
+    ])
+
+    def __init__(self, size: int = 4096):
+        self._records = np.zeros(size, dtype=TraceBuffer.dtype)
+        self.count = 0
+
+    def append(self, pc: int, word: int, i_reg: int, v_regs: bytearray):
+        record = self._records[self.count % len(self._records)]
+        record['pc'] = pc
+        record['word'] = word
+        record['i'] = i_reg
+        record['v'] = v_regs
+        self.count += 1
+
+    def last(self, count: int = None) -> np.array:
+        """The last count records, oldest first, every record kept by default.
+        """
+        size = len(self._records)
+        kept = min(self.count, size)
+        count = kept if count is None else min(count, kept)
+        start = self.count - count
+        return self._records[np.arange(start, self.count) % size]
+
+    def clear(self):
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, len(self._records))
+
+
+class Debugger:
+    """Runs a Cpu a frame at a time, stopping on breakpoints and watchpoints.
+
+    Breakpoints stop before the instruction at their address runs, and
+    only when their condition, a Python expression over the register
+    names of registers, holds. Watchpoints stop after the instruction that
+    changed a register or wrote into a watched memory range. Timers tick
+    at the end of every frame of cycles_per_frame instructions, as in a
+    headless run.
+
+    Args:
+        chip: The Cpu to debug, with its ROM already loaded.
+        cycles_per_frame: Instructions run between two timer ticks.
+        trace_size: Instructions kept by the trace.
+
+    Attributes:
+        breakpoints: Address -> condition source, None when unconditional.
+        watched_registers: Names of the watched registers.
+        watched_memory: (start, end) address ranges watched.
+        trace: The TraceBuffer, filled while tracing.
+        trace_range: (start, end) addresses traced, None when not tracing.
+        cycles: Instructions run so far.
+        frames: Frames completed so far.
+        stop_reason: Why the last run or step stopped early, None if not.
+        halt_reason: Why the program stopped, None while it runs.
+        attached: Whether the instrumented tables are in place.
+    """
+
+    def __init__(
+        self, chip: cpu.Cpu, cycles_per_frame: int = 10,
+        trace_size: int = 4096
+    ):
+        self._cpu = chip
+        self._cycles_per_frame = cycles_per_frame
+        self._skipper = idle.IdleSkipper(chip)
+        self._conditions = {}
+        #Address whose breakpoint is stepped over when resuming from it
+        self._resume = None
+        self._memory_values = {}
+        self._frame_cycles = 0
+        self.breakpoints = {}
+        self.watched_registers = []
+        self.watched_memory = []
+        self.trace = TraceBuffer(trace_size)
+        self.trace_range = None
+        self.cycles = 0
+        self.frames = 0
+        self.stop_reason = None
+        self.halt_reason = None
+        self.attached = False
+
+    @property
+    def armed(self) -> bool:
+        return bool(
+            self.breakpoints or self.watched_registers or self.watched_memory
+            or self.trace_range is not None
+        )
+
+    def add_breakpoint(self, address: int, condition: str = None):
+        """Stops before address runs, if condition holds.
+
+        A SyntaxError is raised for conditions that do not parse.
+        """
+        code = None
+        if condition is not None:
+            code = compile(condition, '<condition>', 'eval')
+        self.breakpoints[address] = condition
+        self._conditions[address] = code
+        self._update()
+
+    def remove_breakpoint(self, address: int = None):
+        """Removes the breakpoint at address, every breakpoint by default.
+        """
+        if address is None:
+            self.breakpoints.clear()
+            self._conditions.clear()
+        else:
+            self.breakpoints.pop(address, None)
+            self._conditions.pop(address, None)
+        self._update()
+
+    def watch_register(self, name: str):
+        name = name.upper()
+        read_register(self._cpu, name)
+        if name not in self.watched_registers:
+            self.watched_registers.append(name)
+        self._update()
+
+    def watch_memory(self, start: int, length: int = 1):
+        self.watched_memory.append((start, start + length))
+        self._snapshot_memory()
+        self._update()
+
+    def unwatch(self, name: str = None):
+        """Stops watching a register, or the memory ranges starting at an
+        address, everything by default.
+        """
+        if name is None:
+            self.watched_registers.clear()
+            self.watched_memory.clear()
+        elif name.upper() in self.watched_registers:
+            self.watched_registers.remove(name.upper())
+        else:
+            start = int(name, 16)
+            self.watched_memory = [
+                watched for watched in self.watched_memory
+                if watched[0] != start
+            ]
+        self._snapshot_memory()
+        self._update()
+
+    def start_trace(self, start: int = 0, end: int = 0x1000):
+        """Records the instructions run from addresses in [start, end).
+        """
+        self.trace_range = (start, end)
+        self._update()
+
+    def stop_trace(self):
+        self.trace_range = None
+        self._update()
+
+    def _update(self):
+        """Swaps the instrumented tables in or out as needed.
+        """
+        if self.armed:
+            self._attach()
+        else:
+            self._detach()
+
+    def _attach(self):
+        if self.attached:
+            return
+        chip = self._cpu
+        for family, entry in chip._opcode_main_table.items():
+            if isinstance(entry, dict):
+                for key, handler in entry.items():
+                    entry[key] = self._wrap(handler)
+            else:
+                chip._opcode_main_table[family] = self._wrap(entry)
+        chip._code_write_hooks.append(self._memory_written)
+        chip._flush_decode_cache()
+        self.attached = True
+
+    def _detach(self):
+        if not self.attached:
+            return
+        chip = self._cpu
+        chip._code_write_hooks.remove(self._memory_written)
+        chip._setup_opcode_table()
+        chip._flush_decode_cache()
+        self._resume = None
+        self.attached = False
+
+    def _wrap(self, handler):
+        """Returns an instrumented wrapper of handler.
+
+        The wrapper keeps the signature of handler, which Cpu._decode
+        reads to extract the operands.
+        """
+        chip = self._cpu
+        breakpoints = self._conditions
+        trace = self.trace
+
+        @wraps(handler)
+        def instrumented(*operands):
+            address = chip._program_counter
+            resume, self._resume = self._resume, None
+            if address in breakpoints and address != resume:
+                if self._condition_holds(address):
+                    raise _Break(address)
+            if self.trace_range is not None:
+                start, end = self.trace_range
+                if start <= address < end:
+                    memory = chip._memory
+                    trace.append(
+                        address, memory[address] << 8 | memory[address+1],
+                        chip._i_reg, chip._v_regs
+                    )
+            watched = self.watched_registers
+            if watched:
+                before = [read_register(chip, name) for name in watched]
+            handler(*operands)
+            if watched:
+                for name, old in zip(watched, before):
+                    new = read_register(chip, name)
+                    if new != old:
+                        self.stop_reason = (
+                            f'watch {name}: {old} -> {new} at {address:#05x}'
+                        )
+        return instrumented
+
+    def _condition_holds(self, address: int) -> bool:
+        code = self._conditions[address]
+        if code is None:
+            return True
+        values = registers(self._cpu)
+        values['mem'] = self._cpu._memory
+        values['keys'] = self._cpu.key_presses
+        return bool(eval(code, {'__builtins__': {}}, values))
+
+    def _snapshot_memory(self):
+        memory = self._cpu._memory
+        self._memory_values = {
+            (start, end): bytes(memory[start:end])
+            for start, end in self.watched_memory
+        }
+
+    def _memory_written(self, start: int, end: int):
+        """Code write hook, checks the watched ranges overlapping the write.
+        """
+        memory = self._cpu._memory
+        for (watch_start, watch_end), old in self._memory_values.items():
+            if watch_start < end and start < watch_end:
+                new = bytes(memory[watch_start:watch_end])
+                if new != old:
+                    self._memory_values[watch_start, watch_end] = new
+                    self.stop_reason = (
+                        f'watch memory {watch_start:#05x}: '
+                        f'{old.hex()} -> {new.hex()} '
+                        f'at {self._cpu._program_counter:#05x}'
+                    )
+
+    def step(self, count: int = 1) -> str:
+        """Runs count instructions, stopping early like run.
+
+        Returns:
+            stop_reason
+        """
+        self.stop_reason = None
+        while count > 0 and self.stop_reason is None and self.halt_reason is None:
+            count -= self._advance(count)
+        return self.stop_reason
+
+    def run(self, max_frames: int = None) -> str:
+        """Runs until a breakpoint or watchpoint stops it, the program
+        stops or max_frames frames end.
+
+        Returns:
+            stop_reason
+        """
+        self.stop_reason = None
+        start = self.frames
+        while self.stop_reason is None and self.halt_reason is None:
+            if max_frames is not None and self.frames - start >= max_frames:
+                break
+            self._advance(self._cycles_per_frame)
+        return self.stop_reason
+
+    def _advance(self, budget: int) -> int:
+        """Runs up to budget instructions within the current frame.
+
+        Returns:
+            The number of instructions run.
+        """
+        budget = min(budget, self._cycles_per_frame - self._frame_cycles)
+        chip = self._cpu
+        done = 0
+        try:
+            if self.attached:
+                run_cycle = chip.run_cycle
+                while done < budget:
+                    run_cycle()
+                    done += 1
+                    if self.stop_reason is not None:
+                        break
+            else:
+                before = self._skipper.cycles
+                try:
+                    self._skipper.run(budget)
+                finally:
+                    done = self._skipper.cycles - before
+        except _Break as hit:
+            self._resume = chip._program_counter
+            self.stop_reason = f'breakpoint {hit.args[0]:#05x}'
+        except Exception as err:
+            self.halt_reason = f'{type(err).__name__}: {str(err).strip()}'
+        self.cycles += done
+        self._frame_cycles += done
+        if self._frame_cycles >= self._cycles_per_frame:
+            chip.decrease_timers()
+            self._frame_cycles = 0
+            self.frames += 1
+        return done
+
+    def listing(self, address: int = None, count: int = 8) -> str:
+        """Disassembly of count instructions from address, the program
+        counter by default.
+        """
+        chip = self._cpu
+        if address is None:
+            address = chip._program_counter
+        lines = []
+        for pc in range(address, min(address + 2*count, 4095), 2):
+            word = chip._fetch_opcode(pc)
+            lines.append(f'{self._marks(pc)} {pc:#05x}  {word:04x}  {_mnemonic(chip, word)}')
+        return '\n'.join(lines)
+
+    def _marks(self, address: int) -> str:
+        pc_mark = '>' if address == self._cpu._program_counter else ' '
+        break_mark = '*' if address in self.breakpoints else ' '
+        return pc_mark + break_mark
+
+    def trace_listing(self, count: int = 16) -> str:
+        lines = []
+        for record in self.trace.last(count):
+            word = int(record['word'])
+            lines.append(
+                f'{int(record["pc"]):#05x}  {word:04x}  '
+                f'{_mnemonic(self._cpu, word):<20} I={int(record["i"]):03x} '
+                f'V={bytes(record["v"]).hex()}'
+            )
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return (
+            f'Debugger(cycles={self.cycles!r}, breakpoints={len(self.breakpoints)!r}, '
+            f'attached={self.attached!r})'
+        )
+
+
+def _mnemonic(chip: cpu.Cpu, word: int) -> str:
+    try:
+        handler, _ = chip._decode(word)
+    except KeyError:
+        return 'DW'
+    return disasm.mnemonic(handler.__name__, word)
+
+def _address(text: str) -> int:
+    """Addresses are hexadecimal, with or without 0x.
+    """
+    return int(text, 16)
+
+
+class DebuggerShell(cmd.Cmd):
+    """Command line of a Debugger. `help` lists the commands.
+    """
+
+    intro = 'pychip8 debugger, type help for the commands.'
+    prompt = '(pychip8) '
+
+    def __init__(self, debugger: Debugger, stdin=None, stdout=None):
+        super().__init__(stdin=stdin, stdout=stdout)
+        if stdin is not None:
+            self.use_rawinput = False
+        self._debugger = debugger
+        self._cpu = debugger._cpu
+
+    def _print(self, text: str = ''):
+        self.stdout.write(text + '\n')
+
+    def onecmd(self, line: str):
+        try:
+            return super().onecmd(line)
+        except (ValueError, IndexError, SyntaxError) as err:
+            self._print(f'error: {err}')
+        return False
+
+    def emptyline(self):
+        pass
+
+    def _stopped(self):
+        debugger = self._debugger
+        if debugger.halt_reason is not None:
+            self._print(f'program stopped: {debugger.halt_reason}')
+        elif debugger.stop_reason is not None:
+            self._print(debugger.stop_reason)
+        self._print(debugger.listing(count=1))
+
+    def do_break(self, arg):
+        """break ADDR [if CONDITION]: stop before ADDR runs, if CONDITION
+        holds, like `break 2a0 if V3 == 5 and DT == 0`."""
+        address, _, condition = arg.partition(' if ')
+        self._debugger.add_breakpoint(_address(address), condition.strip() or None)
+
+    def do_delete(self, arg):
+        """delete [ADDR]: remove the breakpoint at ADDR, all by default."""
+        self._debugger.remove_breakpoint(_address(arg) if arg else None)
+
+    def do_watch(self, arg):
+        """watch REGISTER | watch ADDR [LENGTH]: stop when an instruction
+        changes V0-VF, I, DT, ST or SP, or writes into memory at ADDR."""
+        args = shlex.split(arg)
+        if args[0].upper() in registers(self._cpu):
+            self._debugger.watch_register(args[0])
+        else:
+            length = int(args[1]) if len(args) > 1 else 1
+            self._debugger.watch_memory(_address(args[0]), length)
+
+    def do_unwatch(self, arg):
+        """unwatch [REGISTER | ADDR]: stop watching, everything by default."""
+        self._debugger.unwatch(arg or None)
+
+    def do_step(self, arg):
+        """step [N]: run N instructions, 1 by default."""
+        self._debugger.step(int(arg) if arg else 1)
+        self._stopped()
+
+    def do_continue(self, arg):
+        """continue [FRAMES]: run until something stops it, or FRAMES end."""
+        try:
+            self._debugger.run(int(arg) if arg else None)
+        except KeyboardInterrupt:
+            self._print('interrupted')
+        self._stopped()
+
+    def do_regs(self, arg):
+        """regs: print the registers."""
+        values = registers(self._cpu)
+        self._print(' '.join(f'{name}={value:02x}' for name, value in values.items()))
+        self._print(
+            f'cycles={self._debugger.cycles} frames={self._debugger.frames} '
+            f'stack={[f"{addr:03x}" for addr in self._cpu._stack[:self._cpu._stack_pointer]]}'
+        )
+
+    def do_mem(self, arg):
+        """mem ADDR [LENGTH]: dump LENGTH bytes of memory, 16 by default."""
+        args = shlex.split(arg)
+        start = _address(args[0])
+        length = int(args[1]) if len(args) > 1 else 16
+        memory = self._cpu._memory
+        for row in range(start, min(start + length, 4096), 16):
+            end = min(row + 16, start + length, 4096)
+            self._print(f'{row:03x}  {bytes(memory[row:end]).hex(" ")}')
+
+    def do_list(self, arg):
+        """list [ADDR [N]]: disassemble N instructions from ADDR, or around
+        the program counter."""
+        args = shlex.split(arg)
+        address = _address(args[0]) if args else None
+        count = int(args[1]) if len(args) > 1 else 8
+        self._print(self._debugger.listing(address, count))
+
+    def do_trace(self, arg):
+        """trace on [START END] | trace off | trace [N]: record the
+        instructions run between START and END, or show the last N."""
+        args = shlex.split(arg)
+        if args and args[0] == 'on':
+            bounds = [_address(value) for value in args[1:3]]
+            self._debugger.start_trace(*bounds)
+        elif args and args[0] == 'off':
+            self._debugger.stop_trace()
+        else:
+            self._print(self._debugger.trace_listing(int(args[0]) if args else 16))
+
+    def do_key(self, arg):
+        """key K [up]: hold key K down, or release it."""
+        args = shlex.split(arg)
+        self._cpu.key_presses[int(args[0], 16)] = args[1:] != ['up']
+
+    def do_screen(self, arg):
+        """screen: print the screen."""
+        for row in self._cpu._screen:
+            self._print(''.join('#' if pixel else '.' for pixel in row))
+
+    def do_info(self, arg):
+        """info: list the breakpoints, watchpoints and trace."""
+        debugger = self._debugger
+        for address, condition in sorted(debugger.breakpoints.items()):
+            suffix = f' if {condition}' if condition else ''
+            self._print(f'break {address:#05x}{suffix}')
+        for name in debugger.watched_registers:
+            self._print(f'watch {name}')
+        for start, end in debugger.watched_memory:
+            self._print(f'watch {start:#05x} {end - start}')
+        if debugger.trace_range is not None:
+            start, end = debugger.trace_range
+            self._print(f'trace {start:#05x}-{end:#05x}, {len(debugger.trace)} kept')
+
+    def do_quit(self, arg):
+        """quit: leave the debugger."""
+        return True
+
+    do_EOF = do_q = do_quit
+    do_b = do_break
+    do_s = do_step
+    do_c = do_continue
+
+
+def main(cli_args: list=None) -> int:
+    args = cli.DebugInterface(cli_args).parsed_args
+    with open(args['rom'], 'rb') as f_in:
+        rom_data = f_in.read()
+    chip = cpu.Cpu(args['seed'])
+    chip.load_rom(rom_data)
+    debugger = Debugger(chip, max(1, args['ips'] // 60), args['trace_size'])
+    for address in args['break']:
+        debugger.add_breakpoint(_address(address))
+    shell = DebuggerShell(debugger)
+    shell.cmdloop()
+    return 0
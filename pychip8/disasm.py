@@ -0,0 +1,384 @@
+"""Static analysis and disassembly of ROMs.
+
+Run from the top directory as: `python -m pychip8 disasm ./roms/ROMNAME`
+"""
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+from pychip8 import cli, cpu
+
+#Bumped whenever the analysis changes, so stale cache files are ignored
+ANALYSIS_VERSION = 2
+
+#Assembly syntax of every handler, formatted with the instruction fields
+_MNEMONICS = {
+    '_op_0000': 'HALT',
+    '_op_00e0': 'CLS',
+    '_op_00ee': 'RET',
+    '_op_00cn': 'SCD   {n}',
+    '_op_00fb': 'SCR',
+    '_op_00fc': 'SCL',
+    '_op_00fd': 'EXIT',
+    '_op_00fe': 'LOW',
+    '_op_00ff': 'HIGH',
+    '_op_1nnn': 'JP    {nnn:#05x}',
+    '_op_2nnn': 'CALL  {nnn:#05x}',
+    '_op_3xnn': 'SE    V{x:X}, {nn:#04x}',
+    '_op_4xnn': 'SNE   V{x:X}, {nn:#04x}',
+    '_op_5xy0': 'SE    V{x:X}, V{y:X}',
+    '_op_6xnn': 'LD    V{x:X}, {nn:#04x}',
+    '_op_7xnn': 'ADD   V{x:X}, {nn:#04x}',
+    '_op_8xy0': 'LD    V{x:X}, V{y:X}',
+    '_op_8xy1': 'OR    V{x:X}, V{y:X}',
+    '_op_8xy2': 'AND   V{x:X}, V{y:X}',
+    '_op_8xy3': 'XOR   V{x:X}, V{y:X}',
+    '_op_8xy4': 'ADD   V{x:X}, V{y:X}',
+    '_op_8xy5': 'SUB   V{x:X}, V{y:X}',
+    '_op_8xy6': 'SHR   V{x:X}, V{y:X}',
+    '_op_8xy7': 'SUBN  V{x:X}, V{y:X}',
+    '_op_8xye': 'SHL   V{x:X}, V{y:X}',
+    '_op_9xy0': 'SNE   V{x:X}, V{y:X}',
+    '_op_annn': 'LD    I, {nnn:#05x}',
+    '_op_bnnn': 'JP    V0, {nnn:#05x}',
+    '_op_cxnn': 'RND   V{x:X}, {nn:#04x}',
+    '_op_dxyn': 'DRW   V{x:X}, V{y:X}, {n}',
+    '_op_ex9e': 'SKP   V{x:X}',
+    '_op_exa1': 'SKNP  V{x:X}',
+    '_op_fx07': 'LD    V{x:X}, DT',
+    '_op_fx0a': 'LD    V{x:X}, K',
+    '_op_fx15': 'LD    DT, V{x:X}',
+    '_op_fx18': 'LD    ST, V{x:X}',
+    '_op_fx1e': 'ADD   I, V{x:X}',
+    '_op_fx29': 'LD    F, V{x:X}',
+    '_op_fx30': 'LD    HF, V{x:X}',
+    '_op_fx33': 'LD    B, V{x:X}',
+    '_op_fx55': 'LD    [I], V{x:X}',
+    '_op_fx65': 'LD    V{x:X}, [I]',
+    '_op_fx75': 'LD    R, V{x:X}',
+    '_op_fx85': 'LD    V{x:X}, R',
+}
+
+#Instructions that skip the next one on some condition
+_SKIPS = {
+    '_op_3xnn', '_op_4xnn', '_op_5xy0', '_op_9xy0', '_op_ex9e', '_op_exa1',
+}
+#Instructions after which execution never falls through
+_NO_FALLTHROUGH = {
+    '_op_0000', '_op_00ee', '_op_00fd', '_op_1nnn', '_op_bnnn',
+}
+
+def fields(word: int) -> dict:
+    """Every operand field of an instruction word, by name.
+    """
+    return {name: field(word) for name, field in cpu._OPERAND_FIELDS.items()}
+
+def mnemonic(name: str, word: int) -> str:
+    return _MNEMONICS[name].format(**fields(word))
+
+
+class RomAnalysis:
+    """Control flow of a ROM, found by following every reachable branch.
+
+    Addresses reached only through Bnnn, whose target depends on V0,
+    are not followed; Bnnn instructions are listed in indirect_jumps.
+
+    Attributes:
+        rom_sha1: Hex SHA-1 of the ROM.
+        rom_size: Length of the ROM in bytes.
+        instructions: Address -> (word, handler name) of every reachable
+            instruction.
+        blocks: Start address -> (end address, successor addresses) of
+            every basic block, end being one past its last instruction.
+        subroutines: Entry address -> addresses of the calls to it.
+        jump_targets: Addresses reached by 1nnn.
+        indirect_jumps: Addresses of Bnnn instructions.
+        data_regions: (start, end) ranges of the ROM never executed.
+        self_modifying: (store address, start, end) of every Fx33/Fx55
+            found to write over reachable instructions.
+    """
+
+    def __init__(self, rom_sha1: str, rom_size: int):
+        self.rom_sha1 = rom_sha1
+        self.rom_size = rom_size
+        self.instructions = {}
+        self.blocks = {}
+        self.subroutines = {}
+        self.jump_targets = set()
+        self.indirect_jumps = []
+        self.data_regions = []
+        self.self_modifying = []
+
+    def to_dict(self) -> dict:
+        return {
+            'version': ANALYSIS_VERSION,
+            'rom_sha1': self.rom_sha1,
+            'rom_size': self.rom_size,
+            'instructions': [
+                [address, word, name]
+                for address, (word, name) in sorted(self.instructions.items())
+            ],
+            'blocks': [
+                [start, end, successors]
+                for start, (end, successors) in sorted(self.blocks.items())
+            ],
+            'subroutines': [
+                [entry, callers]
+                for entry, callers in sorted(self.subroutines.items())
+            ],
+            'jump_targets': sorted(self.jump_targets),
+            'indirect_jumps': self.indirect_jumps,
+            'data_regions': self.data_regions,
+            'self_modifying': self.self_modifying,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'RomAnalysis':
+        if data.get('version') != ANALYSIS_VERSION:
+            raise ValueError('analysis made by another version')
+        analysis = cls(data['rom_sha1'], data['rom_size'])
+        analysis.instructions = {
+            address: (word, name) for address, word, name in data['instructions']
+        }
+        analysis.blocks = {
+            start: (end, successors) for start, end, successors in data['blocks']
+        }
+        analysis.subroutines = dict(
+            (entry, callers) for entry, callers in data['subroutines']
+        )
+        analysis.jump_targets = set(data['jump_targets'])
+        analysis.indirect_jumps = data['indirect_jumps']
+        analysis.data_regions = [tuple(region) for region in data['data_regions']]
+        analysis.self_modifying = [tuple(write) for write in data['self_modifying']]
+        return analysis
+
+    def uses_hires(self) -> bool:
+        """Whether reachable code switches to the SUPER-CHIP 128x64 screen.
+        """
+        return any(
+            name == '_op_00ff' for _, name in self.instructions.values()
+        )
+
+    def listing(self, rom_data: bytes) -> str:
+        """Assembly listing, with labels, block boundaries and data.
+        """
+        lines = []
+        regions = {start: end for start, end in self.data_regions}
+        address = 0x200
+        end_of_rom = 0x200 + self.rom_size
+        while address < end_of_rom:
+            if address in regions:
+                data = rom_data[address-0x200:regions[address]-0x200]
+                for offset in range(0, len(data), 8):
+                    chunk = data[offset:offset+8]
+                    lines.append(
+                        f'{address + offset:#05x}  DB    '
+                        + ', '.join(f'{byte:#04x}' for byte in chunk)
+                    )
+                address = regions[address]
+                continue
+            if address in self.subroutines:
+                lines += ['', f'sub_{address:03x}:']
+            elif address in self.blocks:
+                lines.append('')
+            if address in self.jump_targets:
+                lines.append(f'label_{address:03x}:')
+            word, name = self.instructions.get(address, (None, None))
+            if word is None:
+                #Odd leftover byte between instructions and data
+                lines.append(f'{address:#05x}  DB    {rom_data[address-0x200]:#04x}')
+                address += 1
+                continue
+            lines.append(f'{address:#05x}  {word:04x}  {mnemonic(name, word)}')
+            address += 2
+        return '\n'.join(lines).lstrip('\n')
+
+    def __repr__(self):
+        return (
+            f'RomAnalysis(instructions={len(self.instructions)!r}, '
+            f'blocks={len(self.blocks)!r}, '
+            f'subroutines={len(self.subroutines)!r})'
+        )
+
+
+def analyze(rom_data: bytes) -> RomAnalysis:
+    """Follows every branch of the ROM from 0x200 and builds its CFG.
+    """
+    chip = cpu.Cpu()
+    chip.load_rom(rom_data)
+    analysis = RomAnalysis(hashlib.sha1(rom_data).hexdigest(), len(rom_data))
+    last_address = len(chip._memory) - 2
+
+    #Successors of each instruction
+    successors = {}
+    pending = [0x200]
+    while pending:
+        address = pending.pop()
+        if address in analysis.instructions or address > last_address:
+            continue
+        word = chip._fetch_opcode(address)
+        try:
+            handler, _ = chip._decode(word)
+        except KeyError:
+            continue
+        name = handler.__name__
+        analysis.instructions[address] = (word, name)
+        nnn = word & 0x0FFF
+
+        following = []
+        if name not in _NO_FALLTHROUGH:
+            following.append(address + 2)
+        if name in _SKIPS:
+            following.append(address + 4)
+        elif name == '_op_1nnn':
+            following.append(nnn)
+            analysis.jump_targets.add(nnn)
+        elif name == '_op_2nnn':
+            following.append(nnn)
+            analysis.subroutines.setdefault(nnn, []).append(address)
+        elif name == '_op_bnnn':
+            analysis.indirect_jumps.append(address)
+        successors[address] = following
+        pending.extend(following)
+
+    #Every successor of a block end starts a block of its own
+    leaders = {0x200}
+    for address, following in successors.items():
+        if following != [address + 2]:
+            leaders.update(following)
+
+    for start in sorted(leaders):
+        if start not in analysis.instructions:
+            continue
+        address = start
+        while True:
+            following = successors[address]
+            address += 2
+            if following != [address] or address in leaders:
+                break
+            if address not in successors:
+                #Falls into an invalid word
+                break
+        analysis.blocks[start] = (address, following)
+
+    analysis.data_regions = _data_regions(analysis)
+    analysis.self_modifying = _self_modifying_writes(analysis)
+    for callers in analysis.subroutines.values():
+        callers.sort()
+    analysis.indirect_jumps.sort()
+    return analysis
+
+def _data_regions(analysis: RomAnalysis) -> list:
+    """Ranges of the ROM not covered by any reachable instruction.
+    """
+    covered = bytearray(analysis.rom_size)
+    for address in analysis.instructions:
+        for offset in (address - 0x200, address - 0x1FF):
+            if 0 <= offset < len(covered):
+                covered[offset] = 1
+    regions = []
+    start = None
+    for offset, flag in enumerate(covered):
+        if not flag and start is None:
+            start = offset
+        elif flag and start is not None:
+            regions.append((0x200 + start, 0x200 + offset))
+            start = None
+    if start is not None:
+        regions.append((0x200 + start, 0x200 + analysis.rom_size))
+    return regions
+
+def _self_modifying_writes(analysis: RomAnalysis) -> list:
+    """Stores into reachable code, where I is known within the block.
+    """
+    code = set()
+    for address in analysis.instructions:
+        code.update((address, address + 1))
+    writes = []
+    for start, (end, _) in analysis.blocks.items():
+        i_reg = None
+        for address in range(start, end, 2):
+            word, name = analysis.instructions[address]
+            x = (word & 0x0F00) >> 8
+            written = None
+            if name == '_op_annn':
+                i_reg = word & 0x0FFF
+            elif name == '_op_fx33' and i_reg is not None:
+                written = (i_reg, i_reg + 3)
+            elif name in ('_op_fx55', '_op_fx65') and i_reg is not None:
+                if name == '_op_fx55':
+                    written = (i_reg, i_reg + x + 1)
+                i_reg = (i_reg + x + 1) & 0xFFFF
+            elif name in ('_op_fx1e', '_op_fx29'):
+                i_reg = None
+            if written and code.intersection(range(*written)):
+                writes.append((address,) + written)
+    return sorted(writes)
+
+
+def cache_dir() -> Path:
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'pychip8' / 'analysis'
+
+def load_or_analyze(rom_data: bytes, directory: Path = None) -> RomAnalysis:
+    """Returns the analysis of a ROM, from the cache when possible.
+
+    The cache holds one JSON file per ROM, named after its SHA-1. Cache
+    files that cannot be read or written are silently skipped.
+    """
+    directory = Path(directory) if directory is not None else cache_dir()
+    path = directory / f'{hashlib.sha1(rom_data).hexdigest()}.json'
+    try:
+        return RomAnalysis.from_dict(json.loads(path.read_text()))
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    analysis = analyze(rom_data)
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(analysis.to_dict()))
+    except OSError:
+        pass
+    return analysis
+
+def warm_decode_cache(chip: cpu.Cpu, analysis: RomAnalysis):
+    """Decodes every reachable instruction of a freshly loaded ROM.
+
+    Words are read from the Cpu memory, not the analysis, so a stale
+    analysis can only waste work, never change what runs.
+    """
+    for address in analysis.instructions:
+        if chip._decode_cache[address] is None:
+            try:
+                chip._predecode(address)
+            except KeyError:
+                pass
+
+
+def main(cli_args: list=None) -> int:
+    args = cli.DisasmInterface(cli_args).parsed_args
+    rom_data = Path(args['rom']).read_bytes()
+    if args['no_cache']:
+        analysis = analyze(rom_data)
+    else:
+        analysis = load_or_analyze(rom_data)
+
+    if args['json']:
+        print(json.dumps(analysis.to_dict(), indent=1))
+        return 0
+    print(analysis.listing(rom_data))
+    print(
+        f'\n{len(analysis.instructions)} instructions in '
+        f'{len(analysis.blocks)} blocks, {len(analysis.subroutines)} '
+        f'subroutines, {len(analysis.data_regions)} data regions',
+        file=sys.stderr
+    )
+    for address, start, end in analysis.self_modifying:
+        print(
+            f'Self-modifying: {address:#05x} writes {start:#05x}-{end - 1:#05x}',
+            file=sys.stderr
+        )
+    for address in analysis.indirect_jumps:
+        print(f'Indirect jump at {address:#05x} not followed', file=sys.stderr)
+    return 0
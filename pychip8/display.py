@@ -4,9 +4,20 @@ from itertools import product
 import numpy as np
 import sdl2
 
-class Display:
+from pychip8 import backends, packed
+
+class Display(backends.DisplayBackend):
     """Manager class to handle graphical output.
 
+    update_pixel_grid only records the new game state, present then
+    uploads and shows it once per frame. Frames equal to the last one
+    presented are skipped, and only the rows that changed are uploaded.
+
+    The window keeps its size when a SUPER-CHIP program switches to the
+    128x64 screen: _original_width and _original_height follow the
+    screen, and the texture is recreated at the new size and stretched
+    over the window.
+
     Args:
         display_scale: Sets the scale factor of the graphics window.
     
@@ -21,10 +32,7 @@ class Display:
         self._display_scale = display_scale
         self._width = self._display_scale * Display._original_width
         self._height = self._display_scale * Display._original_height
-        self._pixels = np.zeros(
-            Display._original_width*Display._original_height,
-            dtype = np.uint32
-        )
+        self._pending = None
 
         if sdl2.SDL_Init(sdl2.SDL_INIT_VIDEO) < 0:
             raise sdl2.ext.SDLError()
@@ -44,33 +52,75 @@ class Display:
         if not self._renderer:
             raise sdl2.ext.SDLError()
 
+        self._texture = None
+        self._create_texture(Display._original_height, Display._original_width)
+
+        sdl2.SDL_RenderClear(self._renderer)
+        sdl2.SDL_RenderPresent(self._renderer)
+    
+    def _create_texture(self, height: int, width: int):
+        """Replaces the texture by a blank one of the given screen size.
+        """
+        if self._texture is not None:
+            sdl2.SDL_DestroyTexture(self._texture)
+        self._original_width, self._original_height = width, height
+        self._pixels = np.zeros(width*height, dtype = np.uint32)
+        #Screen last presented
+        self._presented = np.zeros((height, width), dtype = np.bool)
+
         self._texture = sdl2.SDL_CreateTexture(
             self._renderer,
             sdl2.SDL_PIXELFORMAT_ARGB8888,
             sdl2.SDL_TEXTUREACCESS_STREAMING,
-            Display._original_width, Display._original_height
+            width, height
         )
         if not self._texture:
             raise sdl2.ext.SDLError()
-
-        sdl2.SDL_RenderClear(self._renderer)
-        sdl2.SDL_RenderPresent(self._renderer)
-    
-    def update_pixel_grid(self, pixel_buffer: np.array):
-        """Updates graphical output to show the current game state.
-        """
-        
-        self._pixels[:] = pixel_buffer[:] * 0xFF00FF00
+        #present only uploads changes, so start from a known blank texture
         sdl2.SDL_UpdateTexture(
             self._texture,
             None,
             self._pixels.ctypes.data_as(ctypes.c_void_p),
-            ctypes.c_int(4*Display._original_width)
+            ctypes.c_int(4*width)
         )
 
+    def update_pixel_grid(self, pixel_buffer: np.array):
+        """Records the current game state, to be shown by present.
+        """
+        self._pending = pixel_buffer
+
+    def present(self):
+        """Uploads the rows changed since the last present and shows them.
+        """
+        if self._pending is None:
+            return
+        shape = backends.screen_shape(self._pending)
+        resized = shape != (self._original_height, self._original_width)
+        if resized:
+            self._create_texture(*shape)
+        screen = self._pending.reshape(shape)
+        self._pending = None
+        rows = backends.dirty_rows(self._presented, screen)
+        if rows is None and not resized:
+            return
+        if rows is not None:
+            self._upload_rows(screen, *rows)
+
         sdl2.SDL_RenderClear(self._renderer)
         sdl2.SDL_RenderCopy(self._renderer, self._texture, None, None)
         sdl2.SDL_RenderPresent(self._renderer)
 
+    def _upload_rows(self, screen: np.array, start: int, end: int):
+        self._presented[start:end] = screen[start:end]
+        width = self._original_width
+        pixels = self._pixels[start*width:end*width]
+        pixels[:] = packed.argb_pixels(np.packbits(screen[start:end]))
+        sdl2.SDL_UpdateTexture(
+            self._texture,
+            sdl2.SDL_Rect(0, start, width, end - start),
+            pixels.ctypes.data_as(ctypes.c_void_p),
+            ctypes.c_int(4*width)
+        )
+
     def __repr__(self):
         return f'Display({self._width!r}, {self._height!r})'
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""Runs every ROM of a directory headless, in parallel.
+
+Run from the top directory as: `python -m pychip8 farm ./roms`
+"""
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+from pychip8 import cli, cpu, headless
+
+def framebuffer_hash(pixel_buffer: np.array) -> str:
+    """SHA-1 of the screen, bit-packed so equal screens hash equally.
+    """
+    return hashlib.sha1(np.packbits(pixel_buffer).tobytes()).hexdigest()
+
+def run_rom(
+    path: str, cycles: int, frames: int = None, recompile: bool = False
+) -> dict:
+    """Runs one ROM headless and summarises how it ended.
+
+    Returns:
+        A JSON-serialisable dict. halt_reason is None when the ROM used up
+        its budget, error is set when it could not be loaded at all.
+    """
+    start = perf_counter()
+    result = {'rom': path}
+    try:
+        rom_data = Path(path).read_bytes()
+        chip = cpu.Cpu()
+        chip.load_rom(rom_data)
+    except (OSError, ValueError) as err:
+        result['error'] = f'{type(err).__name__}: {err}'
+        result['wall_time'] = perf_counter() - start
+        return result
+
+    runner = headless.HeadlessRunner(chip, recompile=recompile)
+    runner.run(max_cycles=cycles, max_frames=frames)
+    result.update(
+        rom_sha1=hashlib.sha1(rom_data).hexdigest(),
+        cycles=runner.cycles,
+        frames=runner.frames,
+        halt_reason=runner.halt_reason,
+        framebuffer_sha1=framebuffer_hash(chip.pixel_buffer),
+        wall_time=perf_counter() - start,
+    )
+    return result
+
+def find_roms(rom_dir: str) -> list:
+    return sorted(
+        str(path) for path in Path(rom_dir).rglob('*') if path.is_file()
+    )
+
+def farm(
+    roms: list, output, cycles: int, frames: int = None,
+    workers: int = None, recompile: bool = False
+) -> int:
+    """Runs roms across a process pool, writing one JSON line per ROM.
+
+    Lines are written as workers finish, not in input order. Only a few
+    ROMs per worker are queued at any time, so huge corpora do not pile
+    up pending futures.
+
+    Returns:
+        The number of ROMs run.
+    """
+    workers = workers or os.cpu_count() or 1
+    pending = set()
+    done_count = 0
+    roms = iter(roms)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            for rom in roms:
+                pending.add(
+                    executor.submit(run_rom, rom, cycles, frames, recompile)
+                )
+                if len(pending) >= 4 * workers:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                output.write(json.dumps(future.result()) + '\n')
+                done_count += 1
+            output.flush()
+    return done_count
+
+def main(cli_args: list=None) -> int:
+    args = cli.FarmInterface(cli_args).parsed_args
+    roms = find_roms(args['rom_dir'])
+
+    start = perf_counter()
+    if args['output'] == '-':
+        count = farm(
+            roms, sys.stdout, args['cycles'], args['frames'],
+            args['workers'], args['recompile']
+        )
+    else:
+        with open(args['output'], 'w') as f_out:
+            count = farm(
+                roms, f_out, args['cycles'], args['frames'],
+                args['workers'], args['recompile']
+            )
+    print(
+        f'{count} ROMs in {perf_counter() - start:.2f} s', file=sys.stderr
+    )
+    return 0
@@ -0,0 +1,768 @@
+"""Differential fuzzing of two CPU engines against each other.
+
+Run from the top directory as: `python -m pychip8 fuzz cpu reference`
+
+Programs are random instruction streams, or ROMs of the corpus with a few
+instructions, bytes or chunks mutated. Each batch of programs runs on both
+engines in lockstep, with the same random key presses, and the machine
+states are compared after every frame. The first program to diverge is
+replayed one instruction at a time to find the instruction that diverged,
+then minimized by turning as much of it as possible into no-ops.
+"""
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+from pychip8 import batch, cli, cpu, disasm, farm, idle, packed, reference, translator
+
+#Instruction patterns of the generated streams, x and y are registers,
+#n, nn and nnn immediate values
+_CHIP8_PATTERNS = [
+    '00E0', '00EE', '1nnn', '2nnn', '3xnn', '4xnn', '5xy0', '6xnn', '7xnn',
+    '8xy0', '8xy1', '8xy2', '8xy3', '8xy4', '8xy5', '8xy6', '8xy7', '8xyE',
+    '9xy0', 'Annn', 'Bnnn', 'Cxnn', 'Dxyn', 'Ex9E', 'ExA1', 'Fx07', 'Fx0A',
+    'Fx15', 'Fx18', 'Fx1E', 'Fx29', 'Fx33', 'Fx55', 'Fx65',
+]
+_SUPERCHIP_PATTERNS = [
+    '00Cn', '00FB', '00FC', '00FD', '00FE', '00FF', 'Fx30', 'Fx75', 'Fx85',
+]
+#8000, V0 = V0, changes nothing
+_NOP = 0x8000
+#Opcode family -> fields its instructions may leave half written when
+#they stop the program, as engines fail at different points: cpu.Cpu wraps
+#the stack pointer of a RET with an empty stack before failing, the batch
+#engines stop first, and reference.ReferenceCpu sets VF for a sprite past
+#the end of memory before failing
+_FAULT_FIELDS = {
+    0x0: {'SP'}, 0xD: {'VF', 'screen'}, 0xF: {'V', 'VF', 'I', 'memory'},
+}
+#Chance of each key to be held down during a frame
+_KEY_DENSITY = 0.1
+
+
+class Case:
+    """A program and the seed of the keys held down while it runs.
+    """
+
+    def __init__(self, program: bytes, key_seed: int):
+        self.program = program
+        self.key_seed = key_seed
+
+    def keys(self, frames: int) -> np.array:
+        """(frames, 16) array of bools, the keys held down in each frame.
+        """
+        rng = np.random.default_rng(self.key_seed)
+        return rng.random((frames, 16)) < _KEY_DENSITY
+
+    def __repr__(self):
+        return f'Case(program={self.program.hex()!r}, key_seed={self.key_seed!r})'
+
+
+class Generator:
+    """Makes random and mutated programs.
+
+    Args:
+        corpus: ROMs mutated into programs, random streams only if empty.
+        superchip: Also generate SUPER-CHIP instructions.
+        seed: Seed of the programs and key presses.
+    """
+
+    def __init__(self, corpus: list, superchip: bool, seed: int = None):
+        self._corpus = [rom for rom in corpus if len(rom) >= 2]
+        self._patterns = _CHIP8_PATTERNS
+        if superchip:
+            self._patterns = _CHIP8_PATTERNS + _SUPERCHIP_PATTERNS
+        self._rng = np.random.default_rng(seed)
+
+    def case(self) -> Case:
+        if self._corpus and self._rng.random() < 0.5:
+            program = self._mutated()
+        else:
+            length = int(self._rng.integers(8, 128))
+            program = b''.join(
+                self._instruction(length).to_bytes(2, 'big')
+                for _ in range(length)
+            )
+        return Case(program, int(self._rng.integers(1 << 32)))
+
+    def _instruction(self, length: int) -> int:
+        """A random instruction, jumping within a program of length words.
+        """
+        rng = self._rng
+        pattern = self._patterns[rng.integers(len(self._patterns))]
+        word = int(pattern.replace('x', '0').replace('y', '0').replace('n', '0'), 16)
+        if 'x' in pattern:
+            word |= int(rng.integers(16)) << 8
+        if 'y' in pattern:
+            word |= int(rng.integers(16)) << 4
+        if pattern.endswith('nnn'):
+            if pattern[0] in '12B' and rng.random() < 0.8:
+                word |= 0x200 + 2*int(rng.integers(length))
+            else:
+                word |= int(rng.integers(0x1000))
+        elif pattern.endswith('nn'):
+            word |= int(rng.integers(0x100))
+        elif pattern.endswith('n'):
+            word |= int(rng.integers(16))
+        return word
+
+    def _mutated(self) -> bytes:
+        rng = self._rng
+        program = bytearray(self._corpus[rng.integers(len(self._corpus))])
+        length = len(program) // 2
+        for _ in range(int(rng.integers(1, 9))):
+            kind = rng.integers(3)
+            if kind == 0:
+                #Another instruction
+                at = 2*int(rng.integers(length))
+                program[at:at+2] = self._instruction(length).to_bytes(2, 'big')
+            elif kind == 1:
+                #One bit of an operand or of data
+                at = int(rng.integers(len(program)))
+                program[at] ^= 1 << int(rng.integers(8))
+            else:
+                #A chunk of another ROM pasted over
+                other = self._corpus[rng.integers(len(self._corpus))]
+                size = 2*int(rng.integers(1, 9))
+                start = 2*int(rng.integers(max(1, (len(other) - size) // 2)))
+                at = 2*int(rng.integers(length))
+                chunk = other[start:start+size]
+                program[at:at+len(chunk)] = chunk
+        return bytes(program[:0xE00])
+
+
+class _Chips:
+    """One cpu.Cpu per program.
+    """
+
+    #Runs one instruction at a time, not only whole frames
+    steppable = True
+    #Draws the Cxnn numbers from the random stream of cpu.Cpu(seed)
+    shares_rng = True
+    superchip = True
+
+    def __init__(self, programs: list, seed: int):
+        self.chips = []
+        for program in programs:
+            chip = self._new_chip(seed)
+            chip.load_rom(program)
+            self.chips.append(chip)
+        self.halted = np.zeros(len(programs), dtype=np.bool)
+
+    def _new_chip(self, seed: int):
+        return cpu.Cpu(seed)
+
+    def step(self):
+        for index, chip in enumerate(self.chips):
+            if not self.halted[index]:
+                try:
+                    chip.run_cycle()
+                except Exception:
+                    self.halted[index] = True
+
+    def run(self, index: int, count: int):
+        chip = self.chips[index]
+        try:
+            for _ in range(count):
+                chip.run_cycle()
+        except Exception:
+            self.halted[index] = True
+
+    def words(self) -> np.array:
+        """The instruction each program is about to run.
+        """
+        words = np.zeros(len(self.chips), dtype=np.int32)
+        for index, chip in enumerate(self.chips):
+            pc = _scalar(chip._program_counter)
+            if not self.halted[index] and pc < len(chip._memory) - 1:
+                words[index] = int(chip._memory[pc]) << 8 | int(chip._memory[pc+1])
+        return words
+
+    def v(self, index: int, x: int) -> int:
+        return int(self.chips[index]._v_regs[x])
+
+    def set_v(self, index: int, x: int, value: int):
+        self.chips[index]._v_regs[x] = value
+
+    def press(self, keys: np.array):
+        for chip, pressed in zip(self.chips, keys):
+            chip.key_presses[:] = pressed
+
+    def tick(self):
+        for chip in self.chips:
+            chip.decrease_timers()
+
+    def state(self, index: np.array) -> dict:
+        """Field name -> array with one row per program in index.
+        """
+        chips = [self.chips[i] for i in index.tolist()]
+        fields = {
+            'V': [bytes(chip._v_regs[:15]) for chip in chips],
+            'VF': [int(chip._v_regs[15]) for chip in chips],
+            'I': [_scalar(chip._i_reg) for chip in chips],
+            'PC': [_scalar(chip._program_counter) for chip in chips],
+            'SP': [_scalar(chip._stack_pointer) for chip in chips],
+            'stack': [[int(addr) for addr in chip._stack] for chip in chips],
+            'DT': [_scalar(chip._delay_timer) for chip in chips],
+            'ST': [_scalar(chip._sound_timer) for chip in chips],
+            'memory': [bytes(chip._memory) for chip in chips],
+            'screen': [self._screen(chip) for chip in chips],
+            'resolution': [np.size(chip.pixel_buffer) for chip in chips],
+            'halted': self.halted[index],
+        }
+        if self.superchip:
+            fields['RPL'] = [bytes(chip._rpl_flags) for chip in chips]
+        return {name: _rows(values) for name, values in fields.items()}
+
+    def _screen(self, chip) -> bytes:
+        return chip._packed_screen().ljust(cpu._PACKED_SCREEN_SIZE, b'\0')
+
+
+class _PackedChips(_Chips):
+    """One packed.PackedCpu per program.
+    """
+
+    def _new_chip(self, seed: int):
+        return packed.PackedCpu(seed)
+
+
+class _ReferenceChips(_Chips):
+    """One reference.ReferenceCpu per program.
+    """
+
+    shares_rng = False
+    superchip = False
+
+    def _new_chip(self, seed: int):
+        return reference.ReferenceCpu()
+
+    def _screen(self, chip) -> bytes:
+        return np.packbits(chip.pixel_buffer).tobytes().ljust(
+            cpu._PACKED_SCREEN_SIZE, b'\0'
+        )
+
+
+class _SkippingChips(_Chips):
+    """One cpu.Cpu per program, run a frame at a time by idle.IdleSkipper.
+    """
+
+    steppable = False
+
+    def __init__(self, programs: list, seed: int):
+        super().__init__(programs, seed)
+        self._runners = [self._new_runner(chip) for chip in self.chips]
+
+    def _new_runner(self, chip: cpu.Cpu):
+        return idle.IdleSkipper(chip)
+
+    def run_frame(self, budget: int) -> np.array:
+        """Runs a frame of every program.
+
+        Returns:
+            The instructions each program ran or skipped.
+        """
+        counts = np.zeros(len(self.chips), dtype=np.int64)
+        for index, runner in enumerate(self._runners):
+            if self.halted[index]:
+                continue
+            before = runner.cycles
+            try:
+                runner.run(budget)
+            except Exception:
+                self.halted[index] = True
+            counts[index] = runner.cycles - before
+        return counts
+
+
+class _TranslatedChips(_SkippingChips):
+    """One cpu.Cpu per program, run whole blocks at a time by
+    translator.BlockTranslator.
+    """
+
+    def _new_runner(self, chip: cpu.Cpu):
+        return translator.BlockTranslator(chip)
+
+
+class _Batch:
+    """All the programs in one batch.BatchCpu.
+    """
+
+    steppable = True
+    shares_rng = False
+    superchip = False
+
+    def __init__(self, programs: list, seed: int):
+        self.batch = self._new_batch(len(programs), seed)
+        for index, program in enumerate(programs):
+            self.batch.load_rom(program, index)
+        self.halted = self.batch.halted
+
+    def _new_batch(self, count: int, seed: int):
+        return batch.BatchCpu(count, seed)
+
+    def step(self):
+        self.batch.step()
+
+    def words(self) -> np.array:
+        pc = np.minimum(self.batch._program_counter, 4094)
+        rows = np.arange(pc.size)
+        memory = self.batch._memory
+        return memory[rows, pc].astype(np.int32) << 8 | memory[rows, pc+1]
+
+    def v(self, index: int, x: int) -> int:
+        return int(self.batch._v_regs[index, x])
+
+    def set_v(self, index: int, x: int, value: int):
+        self.batch._v_regs[index, x] = value
+
+    def press(self, keys: np.array):
+        self.batch.key_presses[:] = keys
+
+    def tick(self):
+        self.batch.decrease_timers()
+
+    def state(self, index: np.array) -> dict:
+        chips = self.batch
+        pixels = chips.pixel_buffer[index].reshape(len(index), -1)
+        screen = np.zeros((len(index), cpu._PACKED_SCREEN_SIZE), dtype=np.uint8)
+        screen[:, :pixels.shape[1] // 8] = np.packbits(pixels, axis=1)
+        return {
+            'V': chips._v_regs[index, :15], 'VF': chips._v_regs[index, 15],
+            'I': chips._i_reg[index],
+            'PC': chips._program_counter[index],
+            'SP': chips._stack_pointer[index], 'stack': chips._stack[index],
+            'DT': chips._delay_timer[index], 'ST': chips._sound_timer[index],
+            'memory': chips._memory[index], 'screen': screen,
+            'resolution': np.full(len(index), pixels.shape[1]),
+            'halted': self.halted[index],
+        }
+
+
+class _PackedBatch(_Batch):
+    """All the programs in one packed.PackedBatchCpu.
+    """
+
+    def _new_batch(self, count: int, seed: int):
+        return packed.PackedBatchCpu(count, seed)
+
+
+ENGINES = {
+    'reference': _ReferenceChips,
+    'cpu': _Chips,
+    'packed': _PackedChips,
+    'idle': _SkippingChips,
+    'translator': _TranslatedChips,
+    'batch': _Batch,
+    'packed-batch': _PackedBatch,
+}
+
+def _superchip_words(words: np.array) -> np.array:
+    """Bool per word, set for SUPER-CHIP instructions.
+
+    Like the engines, family 0 is decoded from its low byte alone.
+    """
+    family, low = words >> 12, words & 0xFF
+    return (
+        (family == 0x0) & ((low & 0xF0 == 0xC0) | (low >= 0xFB))
+        | (family == 0xF) & ((low == 0x30) | (low == 0x75) | (low == 0x85))
+    )
+
+def _scalar(register) -> int:
+    """A register of cpu.Cpu, an int, or of reference.ReferenceCpu, an array.
+    """
+    if type(register) is int:
+        return register
+    return int(register[0])
+
+def _rows(values) -> np.array:
+    """One row per program, byte strings turned into byte rows.
+    """
+    if len(values) and isinstance(values[0], bytes):
+        return np.frombuffer(b''.join(values), dtype=np.uint8).reshape(len(values), -1)
+    return np.asarray(values, dtype=np.int64).reshape(len(values), -1)
+
+def check_pair(first: str, second: str):
+    """Raises a ValueError when the two engines cannot run in lockstep.
+
+    Engines that only run whole frames run against a stepping engine with
+    the same Cxnn numbers, which then runs as many instructions as they
+    did. Other pairs run one instruction at a time, and Cxnn results of
+    the first engine are copied into the second.
+    """
+    engines = ENGINES[first], ENGINES[second]
+    if not any(engine.steppable for engine in engines):
+        raise ValueError(f'{first} and {second} both only run whole frames')
+    if not all(engine.steppable for engine in engines):
+        if not all(engine.shares_rng for engine in engines):
+            raise ValueError(
+                f'{first} and {second} draw different random numbers, '
+                'and one of them only runs whole frames'
+            )
+
+
+class Divergence:
+    """The first difference between two engines running a case.
+
+    Attributes:
+        engines: Names of the two engines.
+        case: The program and key seed that diverged.
+        frame: Frame at the end of which the states first differed.
+        cycle: Instruction within that frame that diverged, None when an
+            engine only runs whole frames.
+        differences: Field name -> (first value, second value).
+    """
+
+    def __init__(self, engines: tuple, case: Case, frame: int, cycle: int,
+                 differences: dict):
+        self.engines = engines
+        self.case = case
+        self.frame = frame
+        self.cycle = cycle
+        self.differences = differences
+
+    def report(self) -> str:
+        """Describes the divergence and lists the program.
+        """
+        first, second = self.engines
+        where = f'frame {self.frame}'
+        if self.cycle is not None:
+            where += f', instruction {self.cycle}'
+        lines = [
+            f'{first} and {second} diverge at {where} '
+            f'(key seed {self.case.key_seed})',
+        ]
+        for name, (value_a, value_b) in self.differences.items():
+            lines.append(f'  {name}: {value_a} != {value_b}')
+        lines.append(f'program: {self.case.program.hex()}')
+        program = self.case.program
+        decoder = cpu.Cpu()
+        for offset in range(0, len(program) - 1, 2):
+            word = program[offset] << 8 | program[offset+1]
+            if word == _NOP:
+                continue
+            try:
+                handler, _ = decoder._decode(word)
+                text = disasm.mnemonic(handler.__name__, word)
+            except KeyError:
+                text = 'DW'
+            lines.append(f'  {0x200 + offset:#05x}  {word:04x}  {text}')
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return (
+            f'Divergence(engines={self.engines!r}, frame={self.frame!r}, '
+            f'cycle={self.cycle!r}, differences={list(self.differences)!r})'
+        )
+
+
+def _diverged(state_a: dict, state_b: dict) -> np.array:
+    """Bool per program, set where the two states differ.
+    """
+    count = len(state_a['halted'])
+    unchecked = _unchecked(state_a, state_b)
+    diverged = np.zeros(count, dtype=np.bool)
+    for name in state_a.keys() & state_b.keys():
+        rows_a = np.asarray(state_a[name]).reshape(count, -1)
+        rows_b = np.asarray(state_b[name]).reshape(count, -1)
+        if rows_a.shape != rows_b.shape:
+            diverged[:] = True
+        else:
+            diverged |= (rows_a != rows_b).any(axis=1) & ~unchecked[name]
+    return diverged
+
+def _unchecked(state_a: dict, state_b: dict) -> dict:
+    """Field name -> bool per program, set where the field is not compared.
+
+    Both engines stopping a program on the same instruction is a match,
+    whatever that instruction left in its _FAULT_FIELDS.
+    """
+    count = len(state_a['halted'])
+    stopped = (
+        np.asarray(state_a['halted'], dtype=np.bool).ravel()
+        & np.asarray(state_b['halted'], dtype=np.bool).ravel()
+        & (np.ravel(state_a['PC']) == np.ravel(state_b['PC']))
+    )
+    pc = np.minimum(np.ravel(state_a['PC']), 4095)
+    families = np.asarray(state_a['memory'])[np.arange(count), pc] >> 4
+    unchecked = {}
+    for name in state_a:
+        faulty = [family for family, fields in _FAULT_FIELDS.items() if name in fields]
+        unchecked[name] = stopped & np.isin(families, faulty)
+    return unchecked
+
+def _differences(state_a: dict, state_b: dict, index: int) -> dict:
+    """Field name -> (first value, second value) of the fields that differ.
+    """
+    differences = {}
+    count = len(state_a['halted'])
+    unchecked = _unchecked(state_a, state_b)
+    for name in sorted(state_a.keys() & state_b.keys()):
+        if unchecked[name][index]:
+            continue
+        row_a = np.asarray(state_a[name]).reshape(count, -1)[index]
+        row_b = np.asarray(state_b[name]).reshape(count, -1)[index]
+        if row_a.shape == row_b.shape and (row_a == row_b).all():
+            continue
+        if name == 'memory':
+            addresses = np.flatnonzero(row_a != row_b)[:8]
+            differences[name] = tuple(
+                {f'{addr:#05x}': int(row[addr]) for addr in addresses}
+                for row in (row_a, row_b)
+            )
+        elif name == 'screen':
+            differences[name] = (
+                f'{int(np.unpackbits(row_a).sum())} pixels',
+                f'{int(np.unpackbits(row_b).sum())} pixels',
+            )
+        elif row_a.size == 1:
+            differences[name] = (int(row_a[0]), int(row_b[0]))
+        else:
+            differences[name] = (row_a.tolist(), row_b.tolist())
+    return differences
+
+def run_pair(
+    first: str, second: str, cases: list, frames: int,
+    cycles_per_frame: int = 10, seed: int = 0, per_instruction: bool = False
+):
+    """Runs cases on two engines in lockstep until one diverges.
+
+    Args:
+        per_instruction: Compare after every instruction instead of every
+            frame, when both engines step single instructions.
+
+    Returns:
+        (divergence, instructions): the first Divergence, None if every
+        case matched, and the number of instructions run on each engine.
+    """
+    check_pair(first, second)
+    programs = [case.program for case in cases]
+    engine_a = ENGINES[first](programs, seed)
+    engine_b = ENGINES[second](programs, seed)
+    #The frame engine, if any, sets the pace
+    swapped = not engine_a.steppable
+    if swapped:
+        engine_a, engine_b = engine_b, engine_a
+    keys = np.stack([case.keys(frames) for case in cases])
+    superchip = engine_a.superchip and engine_b.superchip
+    shared_rng = engine_a.shares_rng and engine_b.shares_rng
+    instructions = 0
+
+    #Programs not yet stopped on both engines, the only ones compared
+    live = np.arange(len(cases))
+
+    def compare(frame, cycle):
+        state_a, state_b = engine_a.state(live), engine_b.state(live)
+        diverged = _diverged(state_a, state_b)
+        if not diverged.any():
+            return None
+        index = int(np.flatnonzero(diverged)[0])
+        differences = _differences(state_a, state_b, index)
+        if swapped:
+            differences = {
+                name: values[::-1] for name, values in differences.items()
+            }
+        return Divergence(
+            (first, second), cases[live[index]], frame, cycle, differences
+        )
+
+    for frame in range(frames):
+        engine_a.press(keys[:, frame])
+        engine_b.press(keys[:, frame])
+        if engine_b.steppable:
+            for cycle in range(cycles_per_frame):
+                if not (superchip and shared_rng):
+                    words = engine_a.words()
+                if not superchip:
+                    #Programs jumping into SUPER-CHIP code stop on both
+                    stop = _superchip_words(words)
+                    engine_a.halted |= stop
+                    engine_b.halted |= stop
+                instructions += int((~engine_a.halted).sum())
+                engine_a.step()
+                engine_b.step()
+                #Each engine draws its own Cxnn numbers
+                if not shared_rng:
+                    random = (words >> 12 == 0xC) & ~engine_a.halted
+                    for index in np.flatnonzero(random).tolist():
+                        x = int(words[index]) >> 8 & 0xF
+                        engine_b.set_v(index, x, engine_a.v(index, x))
+                if per_instruction:
+                    found = compare(frame, cycle)
+                    if found is not None:
+                        return found, instructions
+        else:
+            halted = engine_b.halted.copy()
+            counts = engine_b.run_frame(cycles_per_frame)
+            instructions += int(counts.sum())
+            #The instruction that stopped a program is not counted as run
+            counts += engine_b.halted & ~halted
+            for index, count in enumerate(counts.tolist()):
+                if count:
+                    engine_a.run(index, count)
+        engine_a.tick()
+        engine_b.tick()
+        found = compare(frame, None)
+        if found is not None:
+            return found, instructions
+        live = np.flatnonzero(~(engine_a.halted & engine_b.halted))
+        if live.size == 0:
+            break
+    return None, instructions
+
+def minimize(divergence: Divergence, cycles_per_frame: int = 10,
+             seed: int = 0) -> Divergence:
+    """Turns as much of the diverging program as possible into no-ops.
+
+    Runs of words are replaced by 8000, halving the run length down to
+    single words, then the end of the program is cut the same way, as
+    long as the engines still diverge by the same frame. The result is replayed one
+    instruction at a time when both engines allow it.
+    """
+    first, second = divergence.engines
+    frames = divergence.frame + 1
+    key_seed = divergence.case.key_seed
+
+    def diverges(program: bytes) -> bool:
+        found, _ = run_pair(
+            first, second, [Case(program, key_seed)], frames,
+            cycles_per_frame, seed
+        )
+        return found is not None
+
+    program = bytearray(divergence.case.program)
+    nop = _NOP.to_bytes(2, 'big')
+    words = len(program) // 2
+    run = max(1, words // 2)
+    while True:
+        for start in range(0, words, run):
+            end = min(start + run, words)
+            if program[2*start:2*end] == nop * (end - start):
+                continue
+            candidate = bytearray(program)
+            candidate[2*start:2*end] = nop * (end - start)
+            if diverges(bytes(candidate)):
+                program = candidate
+        if run == 1:
+            break
+        run //= 2
+    #Then cut the end, halving the cut down to a single word
+    cut = len(program) // 4
+    while cut >= 1:
+        if len(program) > 2*cut and diverges(bytes(program[:-2*cut])):
+            del program[-2*cut:]
+        else:
+            cut //= 2
+
+    case = Case(bytes(program), key_seed)
+    steppable = all(ENGINES[name].steppable for name in (first, second))
+    found, _ = run_pair(
+        first, second, [case], frames, cycles_per_frame, seed,
+        per_instruction=steppable
+    )
+    return found or divergence
+
+def fuzz_batch(
+    first: str, second: str, corpus: list, count: int, frames: int,
+    cycles_per_frame: int = 10, seed: int = None
+):
+    """Generates count cases and runs them on two engines.
+
+    Returns:
+        (divergence, instructions): the minimized first Divergence, None if
+        every case matched, and the number of instructions run.
+    """
+    superchip = ENGINES[first].superchip and ENGINES[second].superchip
+    generator = Generator(corpus, superchip, seed)
+    cases = [generator.case() for _ in range(count)]
+    cpu_seed = 0 if seed is None else seed
+    found, instructions = run_pair(
+        first, second, cases, frames, cycles_per_frame, cpu_seed
+    )
+    if found is not None:
+        found = minimize(found, cycles_per_frame, cpu_seed)
+    return found, instructions
+
+def fuzz(
+    first: str, second: str, corpus: list, cases: int, batch_size: int = 256,
+    frames: int = 100, cycles_per_frame: int = 10, workers: int = None,
+    seed: int = 0
+):
+    """Runs batches of cases across a process pool until one diverges.
+
+    Batch number k is generated from seed + k, so any batch can be
+    reproduced on its own with fuzz_batch.
+
+    Returns:
+        (divergence, cases run, instructions run)
+    """
+    check_pair(first, second)
+    workers = workers or os.cpu_count() or 1
+    batches = iter(range(-(-cases // batch_size)))
+    pending = {}
+    found = None
+    done_cases = 0
+    instructions = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while found is None:
+            for number in batches:
+                count = min(batch_size, cases - number*batch_size)
+                future = executor.submit(
+                    fuzz_batch, first, second, corpus, count, frames,
+                    cycles_per_frame, seed + number
+                )
+                pending[future] = count
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                done_cases += pending.pop(future)
+                divergence, ran = future.result()
+                instructions += ran
+                found = found or divergence
+        for future in pending:
+            future.cancel()
+    return found, done_cases, instructions
+
+def load_corpus(paths: list) -> list:
+    """ROM bytes of the files in paths and of every file in its directories.
+    """
+    corpus = []
+    for path in paths:
+        if Path(path).is_dir():
+            corpus += [Path(rom).read_bytes() for rom in farm.find_roms(path)]
+        elif Path(path).is_file():
+            corpus.append(Path(path).read_bytes())
+    return corpus
+
+def main(cli_args: list=None) -> int:
+    args = cli.FuzzInterface(cli_args).parsed_args
+    try:
+        check_pair(args['first'], args['second'])
+    except ValueError as err:
+        print(err, file=sys.stderr)
+        return 2
+    corpus = load_corpus(args['corpus'])
+
+    start = perf_counter()
+    divergence, cases, instructions = fuzz(
+        args['first'], args['second'], corpus, args['cases'], args['batch'],
+        args['frames'], workers=args['workers'], seed=args['seed']
+    )
+    elapsed = perf_counter() - start
+    print(
+        f'{cases} programs, {instructions} instructions in {elapsed:.1f} s '
+        f'({60 * instructions / elapsed / 1e6:.1f}M per minute)',
+        file=sys.stderr
+    )
+    if divergence is None:
+        return 0
+    print(divergence.report())
+    if args['repro'] is not None:
+        Path(args['repro']).write_bytes(divergence.case.program)
+    return 1
@@ -0,0 +1,110 @@
+from time import perf_counter
+
+from pychip8 import backends, cpu, idle, translator
+
+class HeadlessRunner:
+    """Runs a Cpu as fast as possible, without a window.
+
+    Timers tick every cycles_per_frame instructions, so programs waiting on
+    the delay timer still make progress. With recompile hot basic blocks
+    run as compiled functions, cut short where the frame ends. Otherwise
+    idle loops are skipped to the end of their frame, see
+    idle.IdleSkipper, and count as run.
+
+    Args:
+        chip: The Cpu to run, with its ROM already loaded.
+        display: Display backend, frames are dropped by default.
+        key_input: Input backend, no key is ever pressed by default.
+        cycles_per_frame: Instructions run between two timer ticks.
+        recompile: Run through a translator.BlockTranslator.
+        block_starts: Addresses to translate up front when recompiling.
+        skip_idle: Skip idle loops when not recompiling.
+        audio: Audio backend told about the sound timer every frame,
+            silent by default.
+
+    Attributes:
+        cycles: Instructions run so far.
+        idle_cycles: Instructions of idle loops skipped so far.
+        frames: Timer ticks so far.
+        elapsed: Wall time spent in run, in seconds.
+        halt_reason: Why the program stopped, None if it did not.
+    """
+
+    def __init__(
+        self, chip: cpu.Cpu, display: backends.DisplayBackend = None,
+        key_input: backends.InputBackend = None, cycles_per_frame: int = 10,
+        recompile: bool = False, skip_idle: bool = True,
+        block_starts=(), audio: backends.AudioBackend = None
+    ):
+        self._cpu = chip
+        self._display = display or backends.NullDisplay()
+        self._key_input = key_input or backends.NullKeyInput(chip.key_presses)
+        self._audio = audio or backends.NullAudio()
+        self._cycles_per_frame = cycles_per_frame
+        self._translator = None
+        self._skipper = None
+        if recompile:
+            self._translator = translator.BlockTranslator(chip)
+            self._translator.prepare(block_starts)
+        elif skip_idle:
+            self._skipper = idle.IdleSkipper(chip)
+
+        self.cycles = 0
+        self.frames = 0
+        self.elapsed = 0.0
+        self.halt_reason = None
+
+    def run(self, max_cycles: int = None, max_frames: int = None):
+        """Runs until a budget is spent, the program halts or input exits.
+
+        Exceptions raised by the program, like the ValueError at the end
+        of code, stop the run and are kept in halt_reason.
+        """
+        chip = self._cpu
+        start = perf_counter()
+        try:
+            while max_cycles is None or self.cycles < max_cycles:
+                if max_frames is not None and self.frames >= max_frames:
+                    break
+                self._key_input.process_events()
+                budget = self._cycles_per_frame
+                if max_cycles is not None:
+                    budget = min(budget, max_cycles - self.cycles)
+                engine = self._translator or self._skipper
+                if engine is None:
+                    for _ in range(budget):
+                        chip.run_cycle()
+                        self.cycles += 1
+                else:
+                    before = engine.cycles
+                    try:
+                        engine.run(budget)
+                    finally:
+                        self.cycles += engine.cycles - before
+                if chip.draw_flag:
+                    chip.draw_flag = False
+                    self._display.update_pixel_grid(chip.pixel_buffer)
+                self._display.present()
+                self._audio.update_sound(chip._sound_timer > 0)
+                chip.decrease_timers()
+                self.frames += 1
+                if self._key_input.update_exit_status():
+                    break
+        except Exception as err:
+            self.halt_reason = f'{type(err).__name__}: {str(err).strip()}'
+        finally:
+            self.elapsed += perf_counter() - start
+
+    @property
+    def idle_cycles(self) -> int:
+        return self._skipper.idle_cycles if self._skipper else 0
+
+    @property
+    def instructions_per_second(self) -> float:
+        return self.cycles / self.elapsed if self.elapsed > 0 else float('inf')
+
+    def __repr__(self):
+        return (
+            f'HeadlessRunner(cycles={self.cycles!r}, frames={self.frames!r}, '
+            f'halt_reason={self.halt_reason!r})'
+        )
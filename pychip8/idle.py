@@ -0,0 +1,134 @@
+"""Detection of idle loops, which only end on a timer tick or key change.
+"""
+from pychip8 import cpu
+
+#Instructions that idle loops are made of: they only read the timers and
+#keys, and write nothing but registers, so repeating them with the same
+#timers and keys always gives the same result
+_IDLE_HANDLERS = {
+    '_op_1nnn', '_op_3xnn', '_op_4xnn', '_op_5xy0', '_op_6xnn', '_op_8xy0',
+    '_op_9xy0', '_op_annn', '_op_ex9e', '_op_exa1', '_op_fx07', '_op_fx0a',
+}
+
+class IdleSkipper:
+    """Runs a Cpu, skipping the rest of the frame once it idles.
+
+    Within a frame the timers and keys are constant. A loop made only of
+    _IDLE_HANDLERS instructions that leaves the registers unchanged over
+    one iteration, like a jump to itself, Fx0A with no key pressed or a
+    Fx07/3xnn delay timer poll, would then repeat exactly until the frame
+    ends. The skipper notices such loops at their backward jumps and
+    skips a whole number of iterations, so the state after a frame is
+    exactly the same as if every cycle had run.
+
+    Args:
+        chip: The Cpu to run.
+
+    Attributes:
+        cycles: Instructions run or skipped so far.
+        idle_cycles: Instructions skipped so far.
+    """
+
+    #Longest loop body checked, in instructions
+    _max_loop_length = 16
+
+    def __init__(self, chip: cpu.Cpu):
+        self._cpu = chip
+        #(head, end) address range of each loop seen -> cycles per iteration,
+        #0 for loops not only made of idle handlers
+        self._loops = {}
+        chip._code_write_hooks.append(self._invalidate)
+        self.cycles = 0
+        self.idle_cycles = 0
+
+    def run(self, budget: int):
+        """Runs budget cycles, skipping those spent idling.
+        """
+        chip = self._cpu
+        run_cycle = chip.run_cycle
+        spent = 0
+        done = 0
+        try:
+            while spent < budget:
+                pc = chip._program_counter
+                run_cycle()
+                done += 1
+                spent += 1
+                head = chip._program_counter
+                if head <= pc:
+                    period = self._loop_period(head, pc)
+                    #Worth a try only if an iteration can be skipped
+                    if period and budget - spent >= 2 * period:
+                        spent += self._skip(head, pc, budget - spent)
+        finally:
+            self.cycles += done
+
+    def _loop_period(self, head: int, end: int) -> int:
+        """Cycles per iteration of the loop in memory[head:end+2].
+
+        Until the loop is first run by _skip the period is a guess of 1,
+        and it is 0 when the loop is not only made of idle instructions.
+        """
+        period = self._loops.get((head, end))
+        if period is None:
+            period = self._loops[head, end] = int(self._scan(head, end))
+        return period
+
+    def _scan(self, head: int, end: int) -> bool:
+        if end - head >= 2 * IdleSkipper._max_loop_length:
+            return False
+        chip = self._cpu
+        for address in range(head, end + 1, 2):
+            try:
+                decoded = (
+                    chip._decode_cache[address] or chip._predecode(address)
+                )
+            except (KeyError, IndexError):
+                return False
+            if decoded[0].__name__ not in _IDLE_HANDLERS:
+                return False
+        return True
+
+    def _skip(self, head: int, end: int, remaining: int) -> int:
+        """Runs the loop at head until it repeats itself, then skips it.
+
+        Up to two iterations run for real, the first one may still read
+        registers that later iterations overwrite.
+
+        Returns:
+            The cycles run and skipped, at most remaining.
+        """
+        chip = self._cpu
+        executed = 0
+        try:
+            for _ in range(2):
+                before = bytes(chip._v_regs), chip._i_reg
+                period = 0
+                while executed < remaining:
+                    chip.run_cycle()
+                    executed += 1
+                    period += 1
+                    pc = chip._program_counter
+                    if pc == head or not head <= pc <= end:
+                        break
+                if chip._program_counter != head or executed >= remaining:
+                    return executed
+                self._loops[head, end] = period
+                if (bytes(chip._v_regs), chip._i_reg) == before:
+                    skipped = (remaining - executed) // period * period
+                    self.idle_cycles += skipped
+                    self.cycles += skipped
+                    return executed + skipped
+            return executed
+        finally:
+            self.cycles += executed
+
+    def _invalidate(self, start: int, end: int):
+        """Forgets the loops overlapping memory[start:end].
+        """
+        stale = [
+            loop for loop in self._loops
+            if loop[0] < end and start < loop[1] + 2
+        ]
+        for loop in stale:
+            del self._loops[loop]
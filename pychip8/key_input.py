@@ -1,15 +1,17 @@
-import numpy as np
-import tkinter as tk
-
 import sdl2
 import sdl2.ext
 
-class KeyInput():
+from pychip8 import backends
+
+class KeyInput(backends.InputBackend):
     """Class handling keyboard input.
 
     The Chip8 has a 16-key input in a 4x4 grid.
+    Holding Tab fast-forwards the emulation.
     """
 
+    _fast_forward_key = sdl2.SDLK_TAB
+
     _key_list = [
         sdl2.SDLK_1, sdl2.SDLK_2, sdl2.SDLK_3, sdl2.SDLK_4,
         sdl2.SDLK_q, sdl2.SDLK_w, sdl2.SDLK_e, sdl2.SDLK_r,
@@ -17,10 +19,6 @@ class KeyInput():
         sdl2.SDLK_z, sdl2.SDLK_x, sdl2.SDLK_c, sdl2.SDLK_v,
         ]
 
-    def __init__(self, key_presses: np.array):
-        self._key_array = key_presses
-        self._exit_status = False
-
     def process_events(self):
         events = sdl2.ext.get_events()
         for event in events:
@@ -28,7 +26,9 @@ class KeyInput():
                 self._exit_status = True
             elif event.type in (sdl2.SDL_KEYDOWN, sdl2.SDL_KEYUP):
                 key_sym = event.key.keysym.sym
-                if key_sym in KeyInput._key_list:
+                if key_sym == KeyInput._fast_forward_key:
+                    self.fast_forward = event.type == sdl2.SDL_KEYDOWN
+                elif key_sym in KeyInput._key_list:
                     idx = KeyInput._key_list.index(key_sym)
                     #if a key is pressed
                     if event.type == sdl2.SDL_KEYDOWN:
@@ -37,9 +37,6 @@ class KeyInput():
                     elif event.type == sdl2.SDL_KEYUP:
                         self._key_array[idx] = False
 
-    def update_exit_status(self):
-        return self._exit_status
-
 '''
 class KeyInput():
     """Class handling keyboard input.
@@ -0,0 +1,135 @@
+"""Input movies: key presses recorded per frame, for exact replays.
+
+A run is reproduced exactly by the same ROM, the same Cxnn seed, the same
+instructions per frame and the same key presses on the same frames.
+"""
+import struct
+
+import numpy as np
+
+from pychip8 import backends
+
+#Header: magic, SHA-1 of the ROM, seed, cycles per frame, frames, events
+_HEADER = struct.Struct('<4s20sQHII')
+#Event: frame number, bit mask of the keys held from that frame on
+_EVENT = struct.Struct('<IH')
+_MAGIC = b'C8M1'
+
+def key_mask(key_presses: np.array) -> int:
+    """Packs the 16 key states into an int, key 0 in bit 0.
+    """
+    packed = np.packbits(key_presses, bitorder='little')
+    return int(packed[0]) | int(packed[1]) << 8
+
+class Movie:
+    """Key presses of a run, stored as the frames where they change.
+
+    Attributes:
+        rom_sha1: SHA-1 digest of the ROM the movie was recorded on.
+        seed: Seed of the Cpu random numbers.
+        cycles_per_frame: Instructions run between two timer ticks.
+        frames: Length of the recording, in frames.
+        events: (frame, key mask) pairs, in frame order.
+    """
+
+    def __init__(
+        self, rom_sha1: bytes, seed: int, cycles_per_frame: int,
+        frames: int = 0, events: list = None
+    ):
+        self.rom_sha1 = rom_sha1
+        self.seed = seed
+        self.cycles_per_frame = cycles_per_frame
+        self.frames = frames
+        self.events = events if events is not None else []
+
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(
+            _MAGIC, self.rom_sha1, self.seed, self.cycles_per_frame,
+            self.frames, len(self.events)
+        )
+        return header + b''.join(
+            _EVENT.pack(frame, mask) for frame, mask in self.events
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Movie':
+        magic, rom_sha1, seed, cycles_per_frame, frames, count = (
+            _HEADER.unpack_from(data)
+        )
+        if magic != _MAGIC:
+            raise ValueError('not an input movie')
+        if len(data) != _HEADER.size + count * _EVENT.size:
+            raise ValueError('truncated input movie')
+        events = list(_EVENT.iter_unpack(data[_HEADER.size:]))
+        return cls(rom_sha1, seed, cycles_per_frame, frames, events)
+
+    def save(self, path: str):
+        with open(path, 'wb') as f_out:
+            f_out.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> 'Movie':
+        with open(path, 'rb') as f_in:
+            return cls.from_bytes(f_in.read())
+
+    def __repr__(self):
+        return (
+            f'Movie(seed={self.seed!r}, frames={self.frames!r}, '
+            f'events={len(self.events)!r})'
+        )
+
+
+class MovieRecorder(backends.InputBackend):
+    """Input backend recording the key presses of another one.
+
+    Every call to process_events is one frame, as in the emulator loops.
+
+    Args:
+        key_input: The backend actually reading the keys.
+        movie: The movie to append the key changes to.
+    """
+
+    def __init__(self, key_input: backends.InputBackend, movie: Movie):
+        super().__init__(key_input._key_array)
+        self._key_input = key_input
+        self._last_mask = 0
+        self.movie = movie
+
+    def process_events(self):
+        self._key_input.process_events()
+        self.fast_forward = self._key_input.fast_forward
+        mask = key_mask(self._key_array)
+        if mask != self._last_mask:
+            self.movie.events.append((self.movie.frames, mask))
+            self._last_mask = mask
+        self.movie.frames += 1
+
+    def update_exit_status(self):
+        return self._key_input.update_exit_status()
+
+
+class MoviePlayback(backends.InputBackend):
+    """Input backend replaying a movie, one frame per process_events.
+
+    It asks to exit once every recorded frame has been played.
+    """
+
+    def __init__(self, key_presses: np.array, movie: Movie):
+        super().__init__(key_presses)
+        self._movie = movie
+        self._next_event = 0
+        self.frame = 0
+
+    def process_events(self):
+        events = self._movie.events
+        while (
+            self._next_event < len(events)
+            and events[self._next_event][0] <= self.frame
+        ):
+            mask = events[self._next_event][1]
+            for key in range(16):
+                self._key_array[key] = bool(mask >> key & 1)
+            self._next_event += 1
+        self.frame += 1
+        if self.frame >= self._movie.frames:
+            self._exit_status = True
@@ -0,0 +1,187 @@
+"""Bit-packed framebuffers: one word per screen row, 64 bits wide or 128
+bits on the SUPER-CHIP high resolution screen.
+
+Pixel x of a row is bit width - 1 - x of its word, so the words read left to
+right like the sprite bytes that are drawn into them, and a packed screen
+is byte for byte what np.packbits makes of the bool screen.
+"""
+import numpy as np
+
+from pychip8 import batch, cpu
+
+#Colour of the 8 pixels of every byte, as display.Display draws them
+ARGB_LUT = cpu._SPRITE_PIXELS.astype(np.uint32) * 0xFF00FF00
+
+def unpack_rows(rows: np.array) -> np.array:
+    """Bool pixels of an array of row words, with one more axis of 64.
+    """
+    packed = rows.astype('>u8').view(np.uint8).reshape(rows.shape + (8,))
+    return np.unpackbits(packed, axis=-1).astype(np.bool)
+
+def pack_rows(pixels: np.array) -> np.array:
+    """Row words of an array of bool pixels, rows along the last axis.
+    """
+    packed = np.packbits(pixels.astype(np.bool), axis=-1)
+    return packed.view('>u8')[..., 0].astype(np.uint64)
+
+def argb_pixels(packed: np.array) -> np.array:
+    """ARGB colour of every pixel of a packed screen, flattened.
+    """
+    return ARGB_LUT[np.asarray(packed, dtype=np.uint8)].ravel()
+
+
+class PackedCpu(cpu.Cpu):
+    """Cpu keeping its screen as one row word per row instead of bools.
+
+    Dxyn shifts each sprite byte into place, ANDs it with the row for the
+    collision flag and XORs it in, and 00E0 clears 32 ints. Rows are
+    Python ints, so the 128-bit rows of the SUPER-CHIP screen work the
+    same way, and scrolling is a shift of every row or of the row list.
+
+    Attributes:
+        pixel_buffer: Bool pixels unpacked from the rows on every read.
+            Assigning it replaces the screen, writing into it does not.
+    """
+
+    __slots__ = ('_rows', '_width')
+
+    @property
+    def pixel_buffer(self) -> np.array:
+        return np.unpackbits(
+            np.frombuffer(self._packed_screen(), dtype=np.uint8)
+        ).astype(np.bool)
+
+    @pixel_buffer.setter
+    def pixel_buffer(self, pixels: np.array):
+        self._load_packed_screen(np.packbits(pixels).tobytes())
+
+    def _set_resolution(self, hires: bool):
+        self._hires = hires
+        height, self._width = cpu.HIRES_SHAPE if hires else cpu.LORES_SHAPE
+        self._rows = [0] * height
+        #The base class keeps a 2D view of its bool buffer, we have none
+        self._screen = None
+        self.draw_flag = True
+
+    def _packed_screen(self) -> bytes:
+        row_bytes = self._width // 8
+        return b''.join(row.to_bytes(row_bytes, 'big') for row in self._rows)
+
+    def _load_packed_screen(self, packed: bytes):
+        row_bytes = self._width // 8
+        self._rows = [
+            int.from_bytes(packed[offset:offset+row_bytes], 'big')
+            for offset in range(0, len(self._rows) * row_bytes, row_bytes)
+        ]
+
+    #Clear the screen
+    def _op_00e0(self):
+        self._rows = [0] * len(self._rows)
+        self.draw_flag = True
+
+    #Scroll the screen down by n rows
+    def _op_00cn(self, n):
+        if n:
+            self._rows = [0] * n + self._rows[:-n]
+        self.draw_flag = True
+
+    #Scroll the screen right by 4 columns
+    def _op_00fb(self):
+        self._rows = [row >> 4 for row in self._rows]
+        self.draw_flag = True
+
+    #Scroll the screen left by 4 columns
+    def _op_00fc(self):
+        mask = (1 << self._width) - 1
+        self._rows = [(row << 4) & mask for row in self._rows]
+        self.draw_flag = True
+
+    #Draw sprite at pos (VX,VY) with n bytes start at address in I
+    #Set VF = 1 if (set pixels are unset) else 0
+    def _op_dxyn(self, x, y, n):
+        ireg = self._i_reg
+        rows = self._rows
+        screen_width = self._width
+        screen_height = len(rows)
+        sprite_width = 8
+        if n == 0 and self._hires:
+            n, sprite_width = 16, 16
+        if ireg + n * sprite_width // 8 > len(self._memory):
+            raise IndexError('sprite data past the end of memory')
+        x_pos = self._v_regs[x] % screen_width
+        y_pos = self._v_regs[y] % screen_height
+        #Sprites past the right edge lose their right bits instead of wrapping
+        shift = screen_width - sprite_width - x_pos
+        memory = self._memory
+        row_bytes = sprite_width // 8
+        collision = 0
+        for row in range(y_pos, min(y_pos + n, screen_height)):
+            address = ireg + (row - y_pos) * row_bytes
+            sprite = int.from_bytes(memory[address:address+row_bytes], 'big')
+            sprite = sprite << shift if shift >= 0 else sprite >> -shift
+            collision |= rows[row] & sprite
+            rows[row] ^= sprite
+        self._v_regs[15] = 1 if collision else 0
+        self.draw_flag = True
+
+
+class PackedBatchCpu(batch.BatchCpu):
+    """BatchCpu keeping each screen as 32 row words, 256 bytes instead of
+    2048 per instance.
+
+    Attributes:
+        pixel_buffer: (count, 32, 64) bool pixels unpacked on every read.
+    """
+
+    def __init__(self, count: int, seed: int = None):
+        super().__init__(count, seed)
+        self._rows = np.zeros((count, 32), dtype=np.uint64)
+
+    @property
+    def pixel_buffer(self) -> np.array:
+        return unpack_rows(self._rows)
+
+    @pixel_buffer.setter
+    def pixel_buffer(self, pixels: np.array):
+        self._rows = pack_rows(pixels)
+
+    def _op_00e0(self, index, words):
+        self._rows[index] = 0
+        self.draw_flag[index] = True
+
+    def _op_dxyn(self, index, words):
+        """Draws every sprite of the group at once, one word per row.
+
+        Rows past the sprite height or the bottom of the screen get an
+        empty sprite word, so they change nothing.
+        """
+        height = words & 0x000F
+        ireg = self._i_reg[index]
+        valid = ireg + height <= 4096
+        self._halt(index[~valid], 'sprite data past the end of memory')
+        index, words = index[valid], words[valid]
+        height, ireg = height[valid], ireg[valid]
+        x_pos = self._v_regs[index, (words & 0x0F00) >> 8].astype(np.int64) % 64
+        y_pos = self._v_regs[index, (words & 0x00F0) >> 4].astype(np.int64) % 32
+
+        rows = np.arange(16)
+        addresses = np.minimum(ireg[:, np.newaxis] + rows, 4095)
+        sprite = self._memory[index[:, np.newaxis], addresses].astype(np.uint64)
+        #Sprites past column 56 lose their right bits instead of wrapping
+        shift = np.abs(56 - x_pos).astype(np.uint64)[:, np.newaxis]
+        sprite = np.where(
+            (x_pos <= 56)[:, np.newaxis], sprite << shift, sprite >> shift
+        )
+        screen_y = y_pos[:, np.newaxis] + rows
+        sprite[(rows >= height[:, np.newaxis]) | (screen_y >= 32)] = 0
+        screen_y = np.minimum(screen_y, 31)
+
+        instance = np.broadcast_to(index[:, np.newaxis], sprite.shape)
+        current = self._rows[instance, screen_y]
+        self._v_regs[index, 15] = (current & sprite).any(axis=1)
+        #Masked rows may share a clipped row index, XOR only real ones
+        drawn = sprite != 0
+        self._rows[instance[drawn], screen_y[drawn]] = (
+            current[drawn] ^ sprite[drawn]
+        )
+        self.draw_flag[index] = True
@@ -0,0 +1,204 @@
+"""Opcode-level profiler of cpu.Cpu.
+
+Profiling swaps every handler of the opcode tables for a wrapper that
+counts and times it, so a Cpu that is not profiled runs exactly as before.
+"""
+import json
+import math
+from collections import Counter
+from functools import wraps
+from time import perf_counter_ns
+
+from pychip8 import cpu
+
+#Handlers whose backward targets are loop back-edges
+_JUMPS = {'_op_1nnn', '_op_bnnn'}
+
+#Characters of the text heatmap, from cold to hot
+_HEAT_CHARS = ' .:-=+*#%@'
+
+class Profiler:
+    """Counts, times and locates every instruction a Cpu runs.
+
+    Addresses are read from the program counter when each handler runs,
+    so the hot-PC map is only exact for interpreted runs: translated
+    blocks update the program counter once per block.
+
+    Args:
+        chip: The Cpu to profile.
+
+    Attributes:
+        handler_counts: Executions per handler name.
+        handler_times: Nanoseconds spent per handler name.
+        pc_counts: Executions per instruction address.
+        back_edges: Executions per (jump address, target) of backward jumps.
+        attached: Whether the profiling tables are in place.
+    """
+
+    def __init__(self, chip: cpu.Cpu):
+        self._cpu = chip
+        self._families = {}
+        self.handler_counts = Counter()
+        self.handler_times = Counter()
+        self.pc_counts = Counter()
+        self.back_edges = Counter()
+        self.attached = False
+
+    def attach(self):
+        """Swaps the opcode tables of the Cpu for profiling ones.
+        """
+        if self.attached:
+            return
+        chip = self._cpu
+        for family, entry in chip._opcode_main_table.items():
+            if isinstance(entry, dict):
+                for key, handler in entry.items():
+                    entry[key] = self._wrap(handler, family)
+            else:
+                chip._opcode_main_table[family] = self._wrap(entry, family)
+        chip._flush_decode_cache()
+        self.attached = True
+
+    def detach(self):
+        """Puts the original opcode tables back, keeping the counts.
+        """
+        if not self.attached:
+            return
+        self._cpu._setup_opcode_table()
+        self._cpu._flush_decode_cache()
+        self.attached = False
+
+    def _wrap(self, handler, family: int):
+        """Returns a profiling wrapper of handler.
+
+        The wrapper keeps the signature of handler, which Cpu._decode
+        reads to extract the operands.
+        """
+        chip = self._cpu
+        name = handler.__name__
+        self._families[name] = family
+        counts = self.handler_counts
+        times = self.handler_times
+        pc_counts = self.pc_counts
+        back_edges = self.back_edges
+        is_jump = name in _JUMPS
+
+        @wraps(handler)
+        def profiled(*operands):
+            address = chip._program_counter
+            start = perf_counter_ns()
+            try:
+                handler(*operands)
+            finally:
+                times[name] += perf_counter_ns() - start
+                counts[name] += 1
+                pc_counts[address] += 1
+            if is_jump:
+                target = (chip._program_counter + 2) & 0xFFFF
+                if target <= address:
+                    back_edges[address, target] += 1
+        return profiled
+
+    @property
+    def family_counts(self) -> Counter:
+        """Executions per opcode family, keyed by its hex digit.
+        """
+        counts = Counter()
+        for name, count in self.handler_counts.items():
+            counts[f'{self._families[name]:X}'] += count
+        return counts
+
+    def to_dict(self, top: int = 32) -> dict:
+        """JSON-serialisable summary of the profile.
+
+        Args:
+            top: Number of hottest addresses and back-edges to keep.
+        """
+        handlers = {
+            name[len('_op_'):]: {
+                'count': count,
+                'time_ns': self.handler_times[name],
+                'mean_ns': self.handler_times[name] / count,
+            }
+            for name, count in self.handler_counts.most_common()
+        }
+        return {
+            'instructions': sum(self.handler_counts.values()),
+            'families': dict(self.family_counts.most_common()),
+            'handlers': handlers,
+            'hot_pcs': [
+                {'address': address, 'count': count}
+                for address, count in self.pc_counts.most_common(top)
+            ],
+            'back_edges': [
+                {'from': source, 'to': target, 'count': count}
+                for (source, target), count in self.back_edges.most_common(top)
+            ],
+        }
+
+    def heatmap(self, width: int = 64) -> str:
+        """Text map of executions over the program memory.
+
+        Each character covers one instruction, that is two addresses,
+        and each row covers width addresses starting at its label.
+        Heat levels grow with the logarithm of the count, so a single idle
+        loop does not flatten the rest of the map.
+        """
+        if not self.pc_counts:
+            return ''
+        scale = (len(_HEAT_CHARS) - 2) / math.log(max(self.pc_counts.values()) + 1)
+        start = min(self.pc_counts) // width * width
+        end = max(self.pc_counts) + 1
+        lines = []
+        for row in range(start, end, width):
+            cells = []
+            for address in range(row, row + width, 2):
+                count = (
+                    self.pc_counts.get(address, 0)
+                    + self.pc_counts.get(address + 1, 0)
+                )
+                level = 0
+                if count:
+                    level = 1 + int(scale * math.log(count + 1))
+                cells.append(_HEAT_CHARS[level])
+            lines.append(f'{row:03X} |{"".join(cells)}|')
+        return '\n'.join(lines)
+
+    def report(self, top: int = 10) -> str:
+        """Human readable report of the profile.
+        """
+        summary = self.to_dict(top)
+        total = summary['instructions'] or 1
+        lines = [f'{summary["instructions"]} instructions', '', 'family     count      %']
+        for family, count in summary['families'].items():
+            lines.append(f'{family:<6}{count:>10}{100 * count / total:>7.1f}')
+
+        lines += ['', 'handler     count      %   total ms   mean ns']
+        for name, stats in summary['handlers'].items():
+            lines.append(
+                f'{name:<6}{stats["count"]:>10}{100 * stats["count"] / total:>7.1f}'
+                f'{stats["time_ns"] / 1e6:>11.2f}{stats["mean_ns"]:>10.0f}'
+            )
+
+        lines += ['', 'hot address     count']
+        for entry in summary['hot_pcs']:
+            lines.append(f'{entry["address"]:>#11x}{entry["count"]:>10}')
+
+        lines += ['', 'back-edge           count']
+        for entry in summary['back_edges']:
+            edge = f'{entry["from"]:#05x} -> {entry["to"]:#05x}'
+            lines.append(f'{edge:<15}{entry["count"]:>10}')
+
+        lines += ['', self.heatmap()]
+        return '\n'.join(lines)
+
+    def save(self, path: str):
+        """Writes the profile to path, as JSON if it ends in .json,
+        as the text report otherwise.
+        """
+        with open(path, 'w') as f_out:
+            if str(path).endswith('.json'):
+                json.dump(self.to_dict(), f_out, indent=2)
+                f_out.write('\n')
+            else:
+                f_out.write(self.report() + '\n')
@@ -0,0 +1,327 @@
+"""Streaming capture of the screen, and its export to GIF or PNG files.
+
+A capture starts with a header giving the screen size, followed by one
+record per frame that differs from the previous one: the number of frames
+since the last record, then the screen packed to one bit per pixel. A
+size record switches the following screens to a larger size, and a final
+record without a screen gives the frames shown after the last one.
+
+Export as: `python -m pychip8 export capture.c8v capture.gif`
+"""
+import queue
+import struct
+import sys
+import threading
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from pychip8 import backends, cli
+
+#Header: magic, screen width and height
+_HEADER = struct.Struct('<4sHH')
+_MAGIC = b'C8V1'
+#Record: kind, frames since the previous record
+_RECORD = struct.Struct('<BI')
+_FRAME, _END, _SIZE = 1, 0, 2
+#Size record payload: screen width and height
+_SIZE_PAYLOAD = struct.Struct('<HH')
+
+#Colours of unlit and lit pixels, as in display.Display
+_PALETTE = bytes([0x00, 0x00, 0x00, 0x00, 0xFF, 0x00])
+
+class FrameRecorder(backends.DisplayBackend):
+    """Display writing every changed frame to a capture file.
+
+    Frames are packed on the emulator thread, where present is called
+    once per emulated frame, even when several run per frame shown, and
+    written by a background thread. Frames smaller than the capture, like
+    the 64x32 screen in a 128x64 capture of a SUPER-CHIP program, are
+    scaled up to fill it. Larger frames switch the capture to their size,
+    with a size record. The queue between them is bounded: the emulator
+    only waits if the disk falls that many changed frames behind.
+
+    Args:
+        path: File to write the capture to.
+        shape: (height, width) of the screen.
+        queue_size: Changed frames that may wait to be written.
+
+    Attributes:
+        frames: Emulated frames presented so far.
+        written: Changed frames queued for writing so far.
+    """
+
+    def __init__(self, path: str, shape=(32, 64), queue_size: int = 1024):
+        self._file = open(path, 'wb')
+        self._file.write(_HEADER.pack(_MAGIC, shape[1], shape[0]))
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = threading.Thread(
+            target=self._write_records, name='pychip8-recorder', daemon=True
+        )
+        self._writer.start()
+        self._pixel_buffer = None
+        self._shape = tuple(shape)
+        self._last = bytes(shape[0] * shape[1] // 8)
+        self._last_frame = 0
+        self.frames = 0
+        self.written = 0
+
+    def update_pixel_grid(self, pixel_buffer: np.array):
+        self._pixel_buffer = pixel_buffer
+
+    def present(self):
+        if self._pixel_buffer is not None:
+            screen = self._pixel_buffer.reshape(
+                backends.screen_shape(self._pixel_buffer)
+            )
+            self._pixel_buffer = None
+            if screen.shape != self._shape:
+                factor = self._shape[0] // screen.shape[0]
+                if factor:
+                    screen = scale_screens(screen, factor)
+                else:
+                    self._resize(screen.shape)
+            packed = np.packbits(screen).tobytes()
+            if packed != self._last:
+                delta = self.frames - self._last_frame
+                self._queue.put(_RECORD.pack(_FRAME, delta) + packed)
+                self._last = packed
+                self._last_frame = self.frames
+                self.written += 1
+        self.frames += 1
+
+    def _resize(self, shape):
+        """Switches the capture to the larger shape from this frame on.
+        """
+        self._queue.put(
+            _RECORD.pack(_SIZE, 0) + _SIZE_PAYLOAD.pack(shape[1], shape[0])
+        )
+        self._shape = tuple(shape)
+        #The first frame at the new size is always written
+        self._last = None
+
+    def close(self):
+        """Writes the end record and waits for the file to be complete.
+        """
+        if self._file.closed:
+            return
+        self._queue.put(_RECORD.pack(_END, self.frames - self._last_frame))
+        self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+
+    def _write_records(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                return
+            self._file.write(record)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return (
+            f'FrameRecorder(frames={self.frames!r}, '
+            f'written={self.written!r})'
+        )
+
+
+def read_capture(path: str):
+    """Loads a whole capture.
+
+    Screens captured before a size record are scaled up to the largest
+    size of the capture.
+
+    Returns:
+        (screens, starts, length): the changed screens as an (N, height,
+        width) bool array, the frame each one is first shown on, and the
+        total number of frames.
+    """
+    data = Path(path).read_bytes()
+    magic, width, height = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError('not a screen capture')
+
+    #Packed screens of each run of records at the same size
+    runs = [((height, width), [])]
+    starts = []
+    frame = 0
+    offset = _HEADER.size
+    while offset < len(data):
+        kind, delta = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        frame += delta
+        if kind == _END:
+            break
+        if kind == _SIZE:
+            width, height = _SIZE_PAYLOAD.unpack_from(data, offset)
+            offset += _SIZE_PAYLOAD.size
+            runs.append(((height, width), []))
+            continue
+        screen_size = width * height // 8
+        starts.append(frame)
+        runs[-1][1].append(data[offset:offset+screen_size])
+        offset += screen_size
+    else:
+        #The run was cut short before the end record
+        frame += 1
+
+    height, width = runs[-1][0]
+    screens = [np.zeros((0, height, width), dtype=np.bool)]
+    for (run_height, run_width), packed in runs:
+        run = np.unpackbits(
+            np.frombuffer(b''.join(packed), dtype=np.uint8)
+        ).astype(np.bool).reshape(-1, run_height, run_width)
+        screens.append(scale_screens(run, height // run_height))
+    return np.concatenate(screens), np.array(starts, dtype=np.int64), frame
+
+
+def scale_screens(screens: np.array, scale: int) -> np.array:
+    """Scales a stack of screens up by scale in both directions.
+    """
+    return screens.repeat(scale, axis=-2).repeat(scale, axis=-1)
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    body = kind + data
+    return (
+        struct.pack('>I', len(data)) + body
+        + struct.pack('>I', zlib.crc32(body))
+    )
+
+def encode_png(screen: np.array) -> bytes:
+    """Encodes a 2D bool screen as a two-colour palette PNG.
+    """
+    height, width = screen.shape
+    #Every row starts with filter type 0
+    rows = np.zeros((height, width + 1), dtype=np.uint8)
+    rows[:, 1:] = screen
+    return b''.join((
+        b'\x89PNG\r\n\x1a\n',
+        _png_chunk(
+            b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 3, 0, 0, 0)
+        ),
+        _png_chunk(b'PLTE', _PALETTE),
+        _png_chunk(b'IDAT', zlib.compress(rows.tobytes())),
+        _png_chunk(b'IEND', b''),
+    ))
+
+def export_png(path: str, out_dir: str, scale: int = 4) -> int:
+    """Writes each changed screen of a capture as a PNG file.
+
+    Files are named after the frame the screen is first shown on.
+
+    Returns:
+        The number of files written.
+    """
+    screens, starts, _ = read_capture(path)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for screen, start in zip(scale_screens(screens, scale), starts):
+        (out_dir / f'frame_{start:07d}.png').write_bytes(encode_png(screen))
+    return len(starts)
+
+
+def _lzw_uncompressed(pixels: np.array) -> bytes:
+    """LZW stream of 1-bit pixels that a GIF decoder accepts.
+
+    With a minimum code size of 2 the codes are 3 bits wide, and a clear
+    code every two pixels keeps the decoder table from growing past that,
+    so the stream is built with array operations instead of a real LZW
+    dictionary. It is larger than compressed LZW, but frames only hold
+    the rectangle that changed.
+    """
+    clear, end = 4, 5
+    pixels = pixels.ravel().astype(np.uint8)
+    pairs = pixels.size // 2
+    codes = np.empty((pairs, 3), dtype=np.uint8)
+    codes[:, 0] = clear
+    codes[:, 1:] = pixels[:2*pairs].reshape(-1, 2)
+    codes = np.concatenate((
+        codes.ravel(), [clear] * (pixels.size % 2), pixels[2*pairs:], [end]
+    )).astype(np.uint8)
+    bits = (codes[:, np.newaxis] >> np.arange(3, dtype=np.uint8)) & 1
+    data = np.packbits(bits.ravel(), bitorder='little').tobytes()
+    blocks = [
+        bytes([len(data[i:i+255])]) + data[i:i+255]
+        for i in range(0, len(data), 255)
+    ]
+    return bytes([2]) + b''.join(blocks) + b'\x00'
+
+def _changed_box(previous: np.array, current: np.array):
+    """Smallest (top, left, bottom, right) box holding every change.
+    """
+    changed = previous != current
+    rows = np.flatnonzero(changed.any(axis=1))
+    if rows.size == 0:
+        return 0, 0, 1, 1
+    columns = np.flatnonzero(changed.any(axis=0))
+    return rows[0], columns[0], rows[-1] + 1, columns[-1] + 1
+
+def export_gif(
+    path: str, out_path: str, scale: int = 4, frame_rate: float = 60.0
+) -> int:
+    """Writes a capture as a looping animated GIF.
+
+    GIF delays count hundredths of a second and viewers slow down delays
+    under two, so screens shown for less than that are merged into the
+    next one.
+
+    Returns:
+        The number of GIF frames written.
+    """
+    screens, starts, length = read_capture(path)
+    ticks = np.round(np.append(starts, length) * 100 / frame_rate).astype(int)
+    #Keep the last screen of every run shorter than two hundredths
+    keep = [
+        index for index in range(len(starts))
+        if index == len(starts) - 1 or ticks[index + 1] - ticks[index] >= 2
+    ]
+    height, width = screens.shape[1] * scale, screens.shape[2] * scale
+
+    parts = [
+        b'GIF89a',
+        struct.pack('<HHBBB', width, height, 0x80, 0, 0),
+        _PALETTE,
+        #Loop forever
+        b'!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00',
+    ]
+    previous = np.zeros((height, width), dtype=np.bool)
+    shown = 0
+    for position, index in enumerate(keep):
+        screen = scale_screens(screens[index], scale)
+        top, left, bottom, right = _changed_box(previous, screen)
+        if position == 0:
+            top, left, bottom, right = 0, 0, height, width
+        end_tick = ticks[-1]
+        if position + 1 < len(keep):
+            end_tick = ticks[keep[position + 1]]
+        delay = int(end_tick - shown)
+        shown = end_tick
+        parts += [
+            #Graphic control: keep the previous frame under this one
+            struct.pack('<4BHBB', 0x21, 0xF9, 4, 0x04, delay, 0, 0),
+            struct.pack(
+                '<BHHHHB', 0x2C, left, top, right - left, bottom - top, 0
+            ),
+            _lzw_uncompressed(screen[top:bottom, left:right]),
+        ]
+        previous = screen
+    parts.append(b';')
+    Path(out_path).write_bytes(b''.join(parts))
+    return len(keep)
+
+
+def main(cli_args: list=None) -> int:
+    args = cli.ExportInterface(cli_args).parsed_args
+    if args['output'].lower().endswith('.gif'):
+        count = export_gif(args['capture'], args['output'], args['scale'])
+    else:
+        count = export_png(args['capture'], args['output'], args['scale'])
+    print(f'{count} frames written to {args["output"]}', file=sys.stderr)
+    return 0
@@ -0,0 +1,91 @@
+"""Rewind buffer of Cpu save states.
+"""
+from collections import deque
+
+import numpy as np
+
+class RewindBuffer:
+    """Bounded history of save states, newest last.
+
+    Every keyframe_interval-th state is kept whole as a keyframe. The
+    states in between are compared against their keyframe and only the
+    bytes that differ are kept, with their positions, so any state comes
+    back from one keyframe and one delta. When the buffer grows past max_bytes
+    the oldest keyframe is dropped along with its deltas.
+
+    Args:
+        max_bytes: Memory budget of the stored states.
+        keyframe_interval: States per keyframe, counting the keyframe.
+    """
+
+    def __init__(self, max_bytes: int = 4 << 20, keyframe_interval: int = 60):
+        self._max_bytes = max_bytes
+        self._keyframe_interval = keyframe_interval
+        #[keyframe array, [(positions, values), ...]] per keyframe
+        self._groups = deque()
+        self._count = 0
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def push(self, state: bytes):
+        """Appends a state, as made by Cpu.save_state.
+        """
+        frame = np.frombuffer(state, dtype=np.uint8)
+        if (
+            not self._groups
+            or len(self._groups[-1][1]) + 1 >= self._keyframe_interval
+            or len(frame) != len(self._groups[-1][0])
+        ):
+            self._groups.append([frame.copy(), []])
+            self.nbytes += frame.nbytes
+        else:
+            keyframe = self._groups[-1][0]
+            positions = np.flatnonzero(frame != keyframe).astype(np.uint16)
+            values = frame[positions]
+            self._groups[-1][1].append((positions, values))
+            self.nbytes += positions.nbytes + values.nbytes
+        self._count += 1
+
+        while self.nbytes > self._max_bytes and len(self._groups) > 1:
+            self._drop_oldest()
+
+    def pop(self) -> bytes:
+        """Removes the newest state and returns it.
+
+        Raises:
+            IndexError: When the buffer is empty.
+        """
+        if not self._groups:
+            raise IndexError('pop from an empty rewind buffer')
+        keyframe, deltas = self._groups[-1]
+        self._count -= 1
+        if not deltas:
+            self._groups.pop()
+            self.nbytes -= keyframe.nbytes
+            return keyframe.tobytes()
+        positions, values = deltas.pop()
+        self.nbytes -= positions.nbytes + values.nbytes
+        frame = keyframe.copy()
+        frame[positions] = values
+        return frame.tobytes()
+
+    def rewind(self, steps: int = 1) -> bytes:
+        """Drops steps - 1 states and pops the one before them.
+        """
+        for _ in range(steps - 1):
+            self.pop()
+        return self.pop()
+
+    def clear(self):
+        self._groups.clear()
+        self._count = 0
+        self.nbytes = 0
+
+    def _drop_oldest(self):
+        keyframe, deltas = self._groups.popleft()
+        self._count -= 1 + len(deltas)
+        self.nbytes -= keyframe.nbytes + sum(
+            positions.nbytes + values.nbytes for positions, values in deltas
+        )
@@ -0,0 +1,60 @@
+from time import perf_counter, sleep
+
+class FrameScheduler:
+    """Paces the emulator loop to a fixed frame rate.
+
+    Each frame ends with a single call to wait, which sleeps until the
+    next frame deadline. Deadlines are spaced exactly one period apart
+    rather than measured from the end of the last sleep, so oversleeping
+    one frame is made up on the next and the rate does not drift. The last
+    spin seconds before a deadline are busy-waited, since sleep wakes up
+    late by up to a scheduler tick.
+
+    Args:
+        frame_rate: Frames per second.
+        spin: Seconds before each deadline spent busy-waiting.
+        max_lag: Frames the loop may fall behind before it stops trying
+            to catch up, as after a pause in a debugger.
+
+    Attributes:
+        turbo: When set, wait returns at once and the loop runs uncapped.
+        late_frames: Frames that ended past their deadline.
+    """
+
+    def __init__(
+        self, frame_rate: float = 60.0, spin: float = 0.0005,
+        max_lag: int = 5, clock=perf_counter, sleeper=sleep
+    ):
+        self._period = 1.0 / frame_rate
+        self._spin = spin
+        self._max_lag = max_lag * self._period
+        self._clock = clock
+        self._sleep = sleeper
+        self._deadline = None
+        self.turbo = False
+        self.late_frames = 0
+
+    def wait(self):
+        """Blocks until the end of the current frame.
+        """
+        now = self._clock()
+        if self._deadline is None or self.turbo:
+            self._deadline = now + self._period
+            return
+        remaining = self._deadline - now
+        if remaining < 0:
+            self.late_frames += 1
+            if -remaining > self._max_lag:
+                self._deadline = now
+        else:
+            if remaining > self._spin:
+                self._sleep(remaining - self._spin)
+            while self._clock() < self._deadline:
+                pass
+        self._deadline += self._period
+
+    def __repr__(self):
+        return (
+            f'FrameScheduler(frame_rate={1.0 / self._period!r}, '
+            f'turbo={self.turbo!r})'
+        )
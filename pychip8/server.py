@@ -0,0 +1,301 @@
+"""Hosts many headless sessions in one asyncio process.
+
+Run from the top directory as: `python -m pychip8 serve --socket ./pychip8.sock`
+
+Every connection is one session. Clients send one JSON command per line:
+
+    {"cmd": "load", "rom": "<base64 ROM>", "seed": 1}
+    {"cmd": "key", "key": 5, "down": true}
+    {"cmd": "step", "frames": 10}
+    {"cmd": "run"}, {"cmd": "pause"}, {"cmd": "quit"}
+
+Every command gets a JSON reply. After each frame that changed the screen
+the session also sends a delta: the frame number, screen height, bytes per
+row and number of rows, then each changed row as its index followed by
+its pixels packed to one bit each. Every message starts with its kind and
+payload length, see read_message and apply_delta for the client side.
+"""
+import asyncio
+import base64
+import json
+import struct
+import sys
+
+import numpy as np
+
+from pychip8 import backends, cli, cpu, idle
+
+#Message: kind, payload length
+_MESSAGE = struct.Struct('<BI')
+REPLY, DELTA = 1, 2
+#Delta: frame number, screen height, bytes per row, changed rows
+_DELTA = struct.Struct('<IBBB')
+
+class Session:
+    """One emulator and the screen its client was last sent.
+
+    Args:
+        writer: Stream to the client.
+        cycles_per_frame: Instructions run between two timer ticks.
+        max_buffered: Bytes left unsent to the client past which deltas
+            are held back. The next delta sent then covers every row
+            changed in between, so a slow client skips frames instead of
+            growing the server memory.
+
+    Attributes:
+        chip: The Cpu, None until a ROM is loaded.
+        frame: Frames run since the ROM was loaded.
+        halt_reason: Why the program stopped, None while it runs.
+    """
+
+    def __init__(
+        self, writer: asyncio.StreamWriter, cycles_per_frame: int = 10,
+        max_buffered: int = 1 << 16
+    ):
+        self._writer = writer
+        self._cycles_per_frame = cycles_per_frame
+        self._max_buffered = max_buffered
+        self._skipper = None
+        self._sent = None
+        self.chip = None
+        self.frame = 0
+        self.halt_reason = None
+
+    def load(self, rom_data: bytes, seed: int = None):
+        self.chip = cpu.Cpu(seed)
+        self.chip.load_rom(rom_data)
+        self._skipper = idle.IdleSkipper(self.chip)
+        #Blank and of no shape, so the first delta holds every row
+        self._sent = np.zeros((0, 0), dtype=np.uint8)
+        self.chip.draw_flag = True
+        self.frame = 0
+        self.halt_reason = None
+
+    def press(self, key: int, down: bool):
+        #Negative keys would index key_presses from the end
+        if not 0 <= key < 16:
+            raise ValueError('key must be 0-F')
+        self.chip.key_presses[key] = down
+
+    def run_frame(self):
+        """Runs one frame worth of instructions and ticks the timers.
+        """
+        if self.halt_reason is not None:
+            return
+        try:
+            self._skipper.run(self._cycles_per_frame)
+        except Exception as err:
+            self.halt_reason = f'{type(err).__name__}: {str(err).strip()}'
+            return
+        self.chip.decrease_timers()
+        self.frame += 1
+
+    def send(self, kind: int, payload: bytes):
+        self._writer.write(_MESSAGE.pack(kind, len(payload)) + payload)
+
+    def send_delta(self):
+        """Sends the rows changed since the last delta, if any.
+        """
+        chip = self.chip
+        if not chip.draw_flag:
+            return
+        if self._writer.transport.get_write_buffer_size() > self._max_buffered:
+            return
+        chip.draw_flag = False
+        height, width = backends.screen_shape(chip.pixel_buffer)
+        packed = np.packbits(chip.pixel_buffer).reshape(height, width // 8)
+        if packed.shape != self._sent.shape:
+            self._sent = packed
+            changed = np.arange(height)
+        else:
+            changed = np.flatnonzero((packed != self._sent).any(axis=1))
+            if changed.size == 0:
+                return
+            self._sent[changed] = packed[changed]
+        rows = np.empty((changed.size, 1 + width // 8), dtype=np.uint8)
+        rows[:, 0] = changed
+        rows[:, 1:] = packed[changed]
+        self.send(
+            DELTA,
+            _DELTA.pack(self.frame, height, width // 8, changed.size)
+            + rows.tobytes()
+        )
+
+    def __repr__(self):
+        return (
+            f'Session(frame={self.frame!r}, '
+            f'halt_reason={self.halt_reason!r})'
+        )
+
+
+class SessionServer:
+    """Serves sessions, running the live ones at frame_rate.
+
+    Sessions are stepped one frame at a time, yielding to the event loop
+    between slices of sessions, so commands keep being answered while
+    thousands of them run. Idle loops are skipped, see idle.IdleSkipper,
+    so sessions waiting on a key or a timer cost little.
+
+    Args:
+        cycles_per_frame: Instructions run between two timer ticks.
+        frame_rate: Frames per second of the live sessions.
+
+    Attributes:
+        sessions: Sessions of the open connections.
+    """
+
+    #Sessions stepped between two yields to the event loop
+    _slice_size = 64
+
+    def __init__(self, cycles_per_frame: int = 10, frame_rate: int = 60):
+        self._cycles_per_frame = cycles_per_frame
+        self._frame_time = 1 / frame_rate
+        self._live = set()
+        self._ticker = None
+        self.sessions = set()
+
+    async def start(
+        self, path: str = None, host: str = '127.0.0.1', port: int = 0
+    ) -> asyncio.AbstractServer:
+        """Listens on the Unix socket at path, or on host and port.
+        """
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle, path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        self._ticker = asyncio.ensure_future(self._tick())
+        return server
+
+    def stop(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Serves one connection, one command per line.
+        """
+        session = Session(writer, self._cycles_per_frame)
+        self.sessions.add(session)
+        try:
+            async for line in reader:
+                try:
+                    command = json.loads(line)
+                    reply = await self._command(session, command)
+                except (ValueError, KeyError, TypeError, IndexError) as err:
+                    reply = {'error': f'{type(err).__name__}: {err}'}
+                session.send(REPLY, json.dumps(reply).encode())
+                await writer.drain()
+                if reply.get('quit'):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions.discard(session)
+            self._live.discard(session)
+            writer.close()
+
+    async def _command(self, session: Session, command: dict) -> dict:
+        cmd = command['cmd']
+        if cmd == 'quit':
+            return {'quit': True}
+        if cmd == 'load':
+            session.load(base64.b64decode(command['rom']), command.get('seed'))
+            session.send_delta()
+            return {'frame': 0}
+        if session.chip is None:
+            raise ValueError('no ROM loaded')
+
+        if cmd == 'key':
+            session.press(int(command['key']), bool(command.get('down', True)))
+        elif cmd == 'step':
+            for _ in range(int(command.get('frames', 1))):
+                session.run_frame()
+                session.send_delta()
+                #Long steps must not hold up the other sessions
+                await asyncio.sleep(0)
+        elif cmd == 'run':
+            self._live.add(session)
+        elif cmd == 'pause':
+            self._live.discard(session)
+        else:
+            raise ValueError(f'unknown command {cmd!r}')
+        return {'frame': session.frame, 'halt_reason': session.halt_reason}
+
+    async def _tick(self):
+        """Runs one frame of every live session per frame time.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            deadline += self._frame_time
+            live = list(self._live)
+            for start in range(0, len(live), SessionServer._slice_size):
+                for session in live[start:start + SessionServer._slice_size]:
+                    session.run_frame()
+                    session.send_delta()
+                    if session.halt_reason is not None:
+                        self._live.discard(session)
+                await asyncio.sleep(0)
+            #A late tick starts the next one right away, without catching up
+            deadline = max(deadline, loop.time())
+            await asyncio.sleep(deadline - loop.time())
+
+    def __repr__(self):
+        return (
+            f'SessionServer(sessions={len(self.sessions)!r}, '
+            f'live={len(self._live)!r})'
+        )
+
+
+async def read_message(reader: asyncio.StreamReader):
+    """Reads one message from the server.
+
+    Returns:
+        (kind, payload): REPLY with the decoded JSON reply, or DELTA with
+        the raw delta for apply_delta.
+    """
+    kind, length = _MESSAGE.unpack(await reader.readexactly(_MESSAGE.size))
+    payload = await reader.readexactly(length)
+    if kind == REPLY:
+        return kind, json.loads(payload)
+    return kind, payload
+
+def apply_delta(screen: np.array, delta: bytes):
+    """Applies a delta to a client copy of the screen.
+
+    Args:
+        screen: (height, width) bool screen, None before the first delta.
+
+    Returns:
+        (frame, screen): screen is a new array when the resolution changed,
+        otherwise screen updated in place.
+    """
+    frame, height, row_bytes, count = _DELTA.unpack_from(delta)
+    rows = np.frombuffer(
+        delta, dtype=np.uint8, offset=_DELTA.size
+    ).reshape(count, 1 + row_bytes)
+    if screen is None or screen.shape != (height, 8 * row_bytes):
+        screen = np.zeros((height, 8 * row_bytes), dtype=np.bool)
+    screen[rows[:, 0]] = np.unpackbits(rows[:, 1:], axis=1).astype(np.bool)
+    return frame, screen
+
+
+async def serve(args: dict):
+    server = SessionServer(max(1, args['ips'] // 60))
+    listener = await server.start(args['socket'], args['host'], args['port'])
+    for sock in listener.sockets:
+        print(f'Serving on {sock.getsockname()}', file=sys.stderr)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.stop()
+
+def main(cli_args: list=None) -> int:
+    args = cli.ServeInterface(cli_args).parsed_args
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,155 @@
+"""Runs the Cpu on a worker thread, apart from rendering and input.
+
+The worker publishes finished frames into a TripleBuffer and reads the
+keys from a KeyHandoff, so a stalled event pump or a slow present only
+delays what is shown, never the emulation itself.
+"""
+import threading
+
+import numpy as np
+
+from pychip8 import backends, cpu, idle, movie, scheduler
+
+#Bit of each key in the masks of KeyHandoff
+_KEY_BITS = np.arange(16)
+
+class TripleBuffer:
+    """Hands frames from one writer thread to one reader thread.
+
+    The writer always has a buffer of its own to fill, and the reader
+    always gets the newest complete frame, so neither waits on the other
+    beyond swapping two indices.
+
+    Args:
+        shape: Shape of the frames.
+        dtype: Type of the frames.
+    """
+
+    def __init__(self, shape, dtype=np.bool):
+        self._buffers = [np.zeros(shape, dtype=dtype) for _ in range(3)]
+        self._write, self._ready, self._read = 0, 1, 2
+        self._fresh = False
+        self._lock = threading.Lock()
+
+    def publish(self, frame: np.array):
+        """Copies frame in and makes it the newest complete one.
+
+        A frame of another shape, after a SUPER-CHIP resolution switch,
+        gets a new buffer: the write buffer belongs to the writer alone.
+        """
+        if self._buffers[self._write].shape != frame.shape:
+            self._buffers[self._write] = frame.copy()
+        else:
+            self._buffers[self._write][:] = frame
+        with self._lock:
+            self._write, self._ready = self._ready, self._write
+            self._fresh = True
+
+    def latest(self):
+        """Returns the newest frame not read yet, None if there is none.
+
+        The frame stays valid until the next call.
+        """
+        with self._lock:
+            if not self._fresh:
+                return None
+            self._read, self._ready = self._ready, self._read
+            self._fresh = False
+        return self._buffers[self._read]
+
+
+class KeyHandoff(backends.InputBackend):
+    """Input backend fed from another thread.
+
+    The input thread publishes the whole key state as one int, and the
+    worker copies the last one published into key_presses on each
+    process_events. Rebinding an attribute is atomic, so no lock is needed
+    and the keys only ever change between two frames.
+    """
+
+    def __init__(self, key_presses: np.array):
+        super().__init__(key_presses)
+        self._mask = 0
+
+    def publish(self, key_input: backends.InputBackend):
+        """Passes on the keys, exit request and fast-forward of key_input.
+        """
+        self._mask = movie.key_mask(key_input._key_array)
+        self.fast_forward = key_input.fast_forward
+        self._exit_status = key_input.update_exit_status()
+
+    def process_events(self):
+        self._key_array[:] = (self._mask >> _KEY_BITS) & 1
+
+
+class CpuWorker(threading.Thread):
+    """Thread running a Cpu frame by frame, at 60 frames per second.
+
+    Args:
+        chip: The Cpu to run, with its ROM already loaded.
+        frames: Where finished frames are published.
+        key_input: Input backend read at the start of every frame.
+        cycles_per_frame: Instructions run between two timer ticks.
+        turbo: Run uncapped.
+        fast_forward_frames: Frames run per paced frame while the
+            fast-forward key is held.
+        audio: Audio backend told about the sound timer every frame.
+        capture: Display given every frame run, like a
+            recorder.FrameRecorder, on top of those published.
+        skip_idle: Skip idle loops, off while profiling so every
+            instruction is counted.
+
+    Attributes:
+        error: The exception that stopped the Cpu, if any.
+    """
+
+    def __init__(
+        self, chip: cpu.Cpu, frames: TripleBuffer,
+        key_input: backends.InputBackend, cycles_per_frame: int,
+        turbo: bool = False, fast_forward_frames: int = 4,
+        audio: backends.AudioBackend = None,
+        capture: backends.DisplayBackend = None, skip_idle: bool = True
+    ):
+        super().__init__(name='pychip8-cpu', daemon=True)
+        self._cpu = chip
+        self._frames = frames
+        self._key_input = key_input
+        self._cycles_per_frame = cycles_per_frame
+        self._fast_forward_frames = fast_forward_frames
+        self._audio = audio or backends.NullAudio()
+        self._capture = capture or backends.NullDisplay()
+        self._skipper = idle.IdleSkipper(chip) if skip_idle else None
+        self._pacer = scheduler.FrameScheduler()
+        self._pacer.turbo = turbo
+        self._stop_event = threading.Event()
+        self.error = None
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        chip = self._cpu
+        try:
+            while not self._stop_event.is_set():
+                frames = 1
+                if self._key_input.fast_forward:
+                    frames = self._fast_forward_frames
+                for _ in range(frames):
+                    self._key_input.process_events()
+                    if self._skipper is None:
+                        for _ in range(self._cycles_per_frame):
+                            chip.run_cycle()
+                    else:
+                        self._skipper.run(self._cycles_per_frame)
+                    if chip.draw_flag:
+                        chip.draw_flag = False
+                        self._frames.publish(chip.pixel_buffer)
+                        self._capture.update_pixel_grid(chip.pixel_buffer)
+                    self._capture.present()
+                    self._audio.update_sound(chip._sound_timer > 0)
+                    chip.decrease_timers()
+                if self._key_input.update_exit_status():
+                    break
+                self._pacer.wait()
+        except Exception as err:
+            self.error = err
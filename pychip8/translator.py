@@ -0,0 +1,461 @@
+from pychip8 import cpu
+
+#Python statements equivalent to the Cpu handlers of the same name.
+#`v` is the V register bytearray and `chip` the Cpu running the block.
+_INLINE_TEMPLATES = {
+    '_op_6xnn': ['v[{x}] = {nn}'],
+    '_op_7xnn': ['v[{x}] = (v[{x}] + {nn}) & 0xFF'],
+    '_op_8xy0': ['v[{x}] = v[{y}]'],
+    '_op_8xy1': ['v[{x}] |= v[{y}]'],
+    '_op_8xy2': ['v[{x}] &= v[{y}]'],
+    '_op_8xy3': ['v[{x}] ^= v[{y}]'],
+    '_op_8xy4': [
+        'flag = v[{x}] > 0xFF - v[{y}]',
+        'v[15] = flag',
+        'v[{x}] = (v[{x}] + v[{y}]) & 0xFF',
+    ],
+    '_op_8xy5': [
+        'flag = v[{x}] < v[{y}]',
+        'v[15] = not flag',
+        'v[{x}] = (v[{x}] - v[{y}]) & 0xFF',
+    ],
+    '_op_8xy6': ['v[15] = v[{y}] & 0x0F', 'v[{x}] = v[{y}] >> 1'],
+    '_op_8xy7': [
+        'flag = v[{y}] < v[{x}]',
+        'v[15] = not flag',
+        'v[{x}] = (v[{y}] - v[{x}]) & 0xFF',
+    ],
+    '_op_8xye': ['v[15] = v[{y}] & 0xF0', 'v[{x}] = (v[{y}] << 1) & 0xFF'],
+    '_op_annn': ['chip._i_reg = {nnn}'],
+    '_op_fx07': ['v[{x}] = chip._delay_timer'],
+    '_op_fx15': ['chip._delay_timer = v[{x}]'],
+    '_op_fx18': ['chip._sound_timer = v[{x}]'],
+    '_op_fx1e': ['chip._i_reg = (chip._i_reg + v[{x}]) & 0xFFFF'],
+    '_op_fx29': ['chip._i_reg = (5*v[{x}]) & 0xFF'],
+}
+
+#Conditions under which the skips of the same name skip an instruction.
+#Keys past F raise, so the program counter is set before reading them.
+_SKIP_CONDITIONS = {
+    '_op_3xnn': ('v[{x}] == {nn}', False),
+    '_op_4xnn': ('v[{x}] != {nn}', False),
+    '_op_5xy0': ('v[{x}] == v[{y}]', False),
+    '_op_9xy0': ('v[{x}] != v[{y}]', False),
+    '_op_ex9e': ('chip.key_presses[v[{x}]]', True),
+    '_op_exa1': ('not chip.key_presses[v[{x}]]', True),
+}
+
+#Handlers that end a block: they may move the program counter,
+#wait for input, halt or write into memory
+_BLOCK_ENDS = {
+    '_op_0000', '_op_00ee', '_op_00fd', '_op_1nnn', '_op_2nnn', '_op_3xnn',
+    '_op_4xnn', '_op_5xy0', '_op_9xy0', '_op_bnnn', '_op_ex9e', '_op_exa1',
+    '_op_fx0a', '_op_fx33', '_op_fx55',
+}
+
+def _arguments(operands: tuple) -> str:
+    return ', '.join(str(operand) for operand in operands)
+
+class BlockTranslator:
+    """Dynamic recompiler running cpu.Cpu code one basic block at a time.
+
+    A block starts at the program counter and runs up to the first
+    instruction in _BLOCK_ENDS. Its instructions are turned into the source
+    of a single Python function, with operands inlined as constants, which
+    is compiled once and cached. Skips and the instruction they skip run
+    within the block, and jumps back into it loop inside the function, so
+    typical polling and counting loops never leave it.
+
+    A block is entered at any of its instructions and runs at most the
+    number it is given, so a frame ends after exactly as many instructions
+    as when interpreting. Writes into memory drop every block overlapping
+    the written range.
+
+    Compiling a block costs as much as interpreting thousands of
+    instructions, so code is interpreted until jumps, calls, returns or
+    skips have landed on it _translate_after times, and blocks leave
+    before instructions that were never interpreted.
+
+    Args:
+        chip: The Cpu the blocks run on.
+
+    Attributes:
+        cycles: Instructions run so far, including those of a block
+            that raised part way through.
+    """
+
+    #Longest run of instructions translated into a single block
+    _max_block_length = 32
+    #Instructions whose guards are skipped together
+    _guard_chunk = 8
+    #Landings on an address, interpreted, before it is translated
+    _translate_after = 64
+
+    def __init__(self, chip: cpu.Cpu):
+        self._chip = chip
+        #Start address -> block
+        self._blocks = {}
+        #Address -> (block, index of the instruction at that address)
+        self._entries = {}
+        #Start address -> end address of every cached block
+        self._block_ends = {}
+        #Address -> start addresses of the blocks covering it
+        self._block_owners = [[] for _ in range(len(chip._memory))]
+        #Address -> times a jump, call, return or skip landed there
+        #without a block to run, since its last translation
+        self._heat = {}
+        #Address -> 1 once interpreted
+        self._seen = bytearray(len(chip._memory))
+        #Instructions a block ran before the one that raised
+        self._fault_count = 0
+        chip._code_write_hooks.append(self._invalidate)
+        self.cycles = 0
+
+    def run(self, budget: int) -> int:
+        """Runs budget instructions, cutting the last block short if needed.
+
+        Returns:
+            The number of instructions executed.
+        """
+        chip = self._chip
+        entries = self._entries
+        heat = self._heat
+        seen = self._seen
+        executed = 0
+        try:
+            while executed < budget:
+                pc = chip._program_counter
+                entry = entries.get(pc)
+                if entry is not None:
+                    block, index = entry
+                    executed += block(index, budget - executed)
+                    continue
+                #Code run only a few times is not worth compiling
+                heat[pc] = heat.get(pc, 0) + 1
+                if heat[pc] >= BlockTranslator._translate_after:
+                    heat[pc] = 0
+                    self._translate(pc, seen)
+                    continue
+                #Interpreted up to where control lands elsewhere, the only
+                #places blocks are looked up from
+                while executed < budget:
+                    seen[pc] = 1
+                    chip.run_cycle()
+                    executed += 1
+                    pc += 2
+                    if chip._program_counter != pc:
+                        break
+        except Exception:
+            executed += self._fault_count
+            self._fault_count = 0
+            raise
+        finally:
+            self.cycles += executed
+        return executed
+
+    def prepare(self, starts):
+        """Translates the blocks at starts ahead of running them.
+
+        Starts are only hints, like the block boundaries of a
+        disasm.RomAnalysis: a wrong one costs a translation, never
+        correctness, since blocks are compiled from memory.
+        """
+        for address in starts:
+            if address not in self._entries:
+                self._translate(address)
+
+    def _decoded(self, pc: int):
+        """(handler, operands) of the instruction at pc, None if invalid.
+
+        Shares the decoding of the interpreter, cached per word.
+        """
+        chip = self._chip
+        if pc > len(chip._memory) - 2:
+            return None
+        try:
+            return chip._decode_cache[pc] or chip._predecode(pc)
+        except KeyError:
+            #Leave invalid words to run_cycle, which raises for them
+            return None
+
+    def _translate(self, address: int, seen=None) -> tuple:
+        """Compiles the block starting at address and caches it.
+
+        The function takes the index of its first instruction and the
+        most instructions to run, n counting those run. Every instruction
+        at index i is guarded by `start <= i`, so entering at an index or
+        jumping back to it skips those before, and by `n == stop`, where
+        the block leaves with the program counter at that instruction.
+
+        Compiling costs far more than interpreting, so given the seen flags
+        of interpreted addresses, the block leaves before any instruction
+        never run.
+
+        Returns:
+            The (block, 0) entry of address.
+        """
+        namespace = {
+            'chip': self._chip, 'translator': self, 'leave': self._leave
+        }
+        body = []
+        #Indices the block can be entered at or jump back to
+        entries = []
+        index = 0
+        ended = False
+        while index < BlockTranslator._max_block_length:
+            if index and seen is not None and not seen[address + 2*index]:
+                break
+            #Code compiled already is left to its own block
+            if index and address + 2*index in self._entries:
+                break
+            decoded = self._decoded(address + 2*index)
+            if decoded is None:
+                break
+            entries.append(index)
+            handler, operands = decoded
+            if handler.__name__ not in _BLOCK_ENDS:
+                body.append((index, self._guarded(address, index, self._statements(
+                    handler, operands, index, namespace, address + 2*index
+                ) + ['n += 1'])))
+                index += 1
+                continue
+            skipped = None
+            condition = self._skip_condition(
+                handler, operands, address + 2*index
+            )
+            if condition is not None and index + 1 < self._max_block_length:
+                skipped = self._decoded(address + 2*index + 2)
+            if skipped is None:
+                body.append((index, self._guarded(address, index, self._terminator(
+                    handler, operands, index, namespace, address, entries
+                ))))
+                index += 1
+                ended = True
+                break
+            #The skip and the instruction it skips, the block goes on after.
+            #A taken skip moves start past the skipped instruction, so it
+            #is guarded out like the instructions before an entry.
+            lines, test = condition
+            body.append((index, self._guarded(address, index, lines + [
+                'n += 1',
+                f'if {test}:',
+                f'    start = {index + 2}',
+            ])))
+            index += 1
+            skipped_handler, skipped_operands = skipped
+            if seen is not None and not seen[address + 2*index]:
+                #Left to the interpreter until it runs, entering the block
+                #there would run nothing
+                skipped_lines = [
+                    f'chip._program_counter = {address + 2*index}',
+                    'return n',
+                ]
+            elif skipped_handler.__name__ in _BLOCK_ENDS:
+                entries.append(index)
+                skipped_lines = self._terminator(
+                    skipped_handler, skipped_operands, index, namespace,
+                    address, entries
+                )
+            else:
+                entries.append(index)
+                skipped_lines = self._statements(
+                    skipped_handler, skipped_operands, index, namespace,
+                    address + 2*index
+                ) + ['n += 1']
+            body.append((index, self._guarded(address, index, skipped_lines)))
+            index += 1
+
+        if index == 0:
+            return self._run_single_cycle, 0
+        lines = [
+            'def block(start, stop):',
+            '    v = chip._v_regs',
+            '    n = 0',
+            '    try:',
+            '        while True:',
+        ]
+        #Guards go by chunks, so entering late in the block or looping back
+        #there skips the instructions before in a few comparisons
+        for first in range(0, len(body), BlockTranslator._guard_chunk):
+            chunk = body[first:first + BlockTranslator._guard_chunk]
+            lines.append(f'            if start <= {chunk[-1][0]}:')
+            lines += [
+                '                ' + line
+                for _, unit in chunk for line in unit
+            ]
+        if not ended:
+            lines += [
+                f'            chip._program_counter = {address + 2*index}',
+                '            return n',
+            ]
+        lines += [
+            '    except BaseException:',
+            '        translator._fault_count = n',
+            '        raise',
+        ]
+
+        code = compile('\n'.join(lines), f'<block 0x{address:03x}>', 'exec')
+        exec(code, namespace)
+        block = namespace['block']
+        end = address + 2*index
+        self._blocks[address] = block
+        self._block_ends[address] = end
+        for covered in range(address, end):
+            self._block_owners[covered].append(address)
+        for entry in entries:
+            self._entries[address + 2*entry] = (block, entry)
+        return block, 0
+
+    def _exit_check(self, address: int, index: int) -> list:
+        """Leaves the block before the instruction at index once stop
+        instructions ran.
+        """
+        return [f'if n == stop: return leave({address + 2*index}, n)']
+
+    def _leave(self, pc: int, executed: int) -> int:
+        """Stops a block at pc, once its budget is spent.
+        """
+        self._chip._program_counter = pc
+        return executed
+
+    def _guarded(self, address: int, index: int, lines: list) -> list:
+        return [f'if start <= {index}:'] + [
+            '    ' + line
+            for line in self._exit_check(address, index) + lines
+        ]
+
+    def _skip_condition(self, handler, operands: tuple, pc: int):
+        """(lines, condition) of an unmodified Cpu skip at pc, the lines
+        running before the condition is read. None for anything else.
+        """
+        name = handler.__name__
+        func = getattr(handler, '__func__', None)
+        if name not in _SKIP_CONDITIONS or func is not getattr(cpu.Cpu, name):
+            return None
+        template, reads_keys = _SKIP_CONDITIONS[name]
+        fields = dict(zip(cpu._method_operands(func), operands))
+        lines = [f'chip._program_counter = {pc}'] if reads_keys else []
+        return lines, template.format(**fields)
+
+    def _terminator(
+        self, handler, operands: tuple, index: int, namespace: dict,
+        address: int, entries: list
+    ) -> list:
+        """Source lines running the block ending instruction at index.
+
+        Jumps back to an entry of the block loop within it, and unmodified
+        Cpu jumps, calls, returns and skips are inlined, as are key waits
+        while no key is pressed. Anything else is called through its bound
+        method with the program counter at its own address, as run_cycle
+        would.
+        """
+        pc = address + 2*index
+        name = handler.__name__
+        func = getattr(handler, '__func__', None)
+        if name == '_op_1nnn' and func is cpu.Cpu._op_1nnn:
+            target, = operands
+            if target == pc:
+                #Jumps to themselves repeat for the rest of the budget
+                return [f'chip._program_counter = {pc}', 'return stop']
+            offset = target - address
+            if offset % 2 == 0 and offset // 2 in entries:
+                return ['n += 1', f'start = {offset // 2}', 'continue']
+            return [
+                f'chip._program_counter = {target}', 'n += 1', 'return n'
+            ]
+        if name == '_op_2nnn' and func is cpu.Cpu._op_2nnn:
+            target, = operands
+            #Set first, a full stack raises at the call
+            return [
+                f'chip._program_counter = {pc}',
+                f'chip._stack[chip._stack_pointer] = {pc}',
+                'chip._stack_pointer = (chip._stack_pointer + 1) & 0xFF',
+                f'chip._program_counter = {target}',
+                'n += 1',
+                'return n',
+            ]
+        if name == '_op_00ee' and func is cpu.Cpu._op_00ee:
+            return [
+                f'chip._program_counter = {pc}',
+                'chip._stack_pointer = (chip._stack_pointer - 1) & 0xFF',
+                'chip._program_counter = (',
+                '    chip._stack[chip._stack_pointer] + 2',
+                ') & 0xFFFF',
+                'n += 1',
+                'return n',
+            ]
+        condition = self._skip_condition(handler, operands, pc)
+        if condition is not None:
+            lines, test = condition
+            return lines + [
+                f'chip._program_counter = {pc + 4} if {test} else {pc + 2}',
+                'n += 1',
+                'return n',
+            ]
+        waits = []
+        if name == '_op_fx0a' and func is cpu.Cpu._op_fx0a:
+            #Keys only change between frames, a wait without one lasts
+            #for the rest of the budget
+            waits = [
+                'if not chip.key_presses.any():',
+                f'    chip._program_counter = {pc}',
+                '    return stop',
+            ]
+        namespace[f'h{index}'] = handler
+        return waits + [
+            f'chip._program_counter = {pc}',
+            f'h{index}({_arguments(operands)})',
+            'chip._program_counter = (chip._program_counter + 2) & 0xFFFF',
+            'n += 1',
+            'return n',
+        ]
+
+    def _statements(
+        self, handler, operands: tuple, index: int, namespace: dict, pc: int
+    ) -> list:
+        """Source lines running the non-terminating instruction at pc.
+
+        Unmodified Cpu handlers with a template are inlined, anything else
+        is called through its bound method, with the program counter at
+        the instruction in case the handler raises.
+        """
+        name = handler.__name__
+        template = _INLINE_TEMPLATES.get(name)
+        func = getattr(handler, '__func__', None)
+        if template is not None and func is getattr(cpu.Cpu, name):
+            fields = dict(zip(cpu._method_operands(func), operands))
+            return [line.format(**fields) for line in template]
+        namespace[f'h{index}'] = handler
+        return [
+            f'chip._program_counter = {pc}',
+            f'h{index}({_arguments(operands)})',
+        ]
+
+    def _run_single_cycle(self, start: int, stop: int) -> int:
+        self._chip.run_cycle()
+        return 1
+
+    def _invalidate(self, start: int, end: int):
+        """Drops the blocks overlapping memory[start:end].
+        """
+        for address in range(max(start, 0), min(end, len(self._block_owners))):
+            owners = self._block_owners[address]
+            while owners:
+                self._drop(owners.pop())
+
+    def _drop(self, address: int):
+        end = self._block_ends.pop(address, None)
+        if end is None:
+            return
+        block = self._blocks.pop(address)
+        for covered in range(address, min(end, len(self._block_owners))):
+            owners = self._block_owners[covered]
+            if address in owners:
+                owners.remove(address)
+            #Addresses may have been taken over by a block translated later
+            entry = self._entries.get(covered)
+            if entry is not None and entry[0] is block:
+                del self._entries[covered]
+
+    def __repr__(self):
+        return f'BlockTranslator(blocks={len(self._block_ends)!r})'
@@ -0,0 +1,296 @@
+"""Runs many emulators in worker processes behind a reset/step interface.
+
+Observations, rewards, done flags and actions all live in one shared
+memory block, so a step only sends a one-word command to each worker and
+waits for its reply: no screen is ever pickled.
+
+    with VecEnv(Path('roms/PONG').read_bytes(), 64, score=RegisterScore(0xE)) as env:
+        observations = env.reset()
+        while training:
+            observations, rewards, dones = env.step(policy(observations))
+"""
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from pychip8 import cpu, idle
+
+#Register each ROM draws its score from
+SCORE_REGISTERS = {'PONG': 0xE, 'BRIX': 0x5, 'TETRIS': 0xA}
+
+class RegisterScore:
+    """Score read from a V register, picklable for the workers.
+    """
+
+    def __init__(self, register: int):
+        self._register = register
+
+    def __call__(self, chip: cpu.Cpu) -> float:
+        return float(chip._v_regs[self._register])
+
+    def __repr__(self):
+        return f'RegisterScore({self._register!r})'
+
+
+def _views(buffer, count: int) -> dict:
+    """Name -> array over its part of the shared buffer.
+    """
+    height, width = cpu.LORES_SHAPE
+    #Widest items first, so every array stays aligned
+    shapes = {
+        'rewards': ((count,), np.float32),
+        'observations': ((count, height, width), np.bool),
+        'actions': ((count, 16), np.bool),
+        'dones': ((count,), np.bool),
+    }
+    arrays = {}
+    offset = 0
+    for name, (shape, dtype) in shapes.items():
+        array = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+        offset += array.nbytes
+        arrays[name] = array
+    return arrays
+
+def _buffer_size(count: int) -> int:
+    height, width = cpu.LORES_SHAPE
+    return count * (4 + height*width + 16 + 1)
+
+
+class _Env:
+    """One emulator of a worker, writing into its row of the shared arrays.
+    """
+
+    def __init__(
+        self, index: int, arrays: dict, rom_data: bytes,
+        seed_sequence: np.random.SeedSequence, frame_skip: int,
+        cycles_per_frame: int, score
+    ):
+        self._observation = arrays['observations'][index]
+        self._actions = arrays['actions'][index]
+        self._dones = arrays['dones'][index:index+1]
+        self._rewards = arrays['rewards'][index:index+1]
+        self._rom_data = rom_data
+        self._rng = None
+        if seed_sequence is not None:
+            self._rng = np.random.default_rng(seed_sequence)
+        self._frame_skip = frame_skip
+        self._cycles_per_frame = cycles_per_frame
+        self._score = score
+        self._last_score = 0.0
+        self._chip = None
+        self._skipper = None
+
+    def reset(self):
+        seed = None
+        if self._rng is not None:
+            seed = int(self._rng.integers(1 << 32))
+        self._chip = cpu.Cpu(seed)
+        self._chip.load_rom(self._rom_data)
+        self._skipper = idle.IdleSkipper(self._chip)
+        self._observation[:] = False
+        if self._score is not None:
+            self._last_score = self._score(self._chip)
+        self._observe()
+
+    def step(self):
+        """Runs frame_skip frames with the keys of the action held down.
+
+        A program that stops ends the episode. The emulator then starts
+        over, and the observation is the first one of the next episode.
+        """
+        chip = self._chip
+        chip.key_presses[:] = self._actions
+        done = False
+        for _ in range(self._frame_skip):
+            try:
+                self._skipper.run(self._cycles_per_frame)
+            except Exception:
+                done = True
+                break
+            chip.decrease_timers()
+        reward = 0.0
+        if self._score is not None:
+            score = self._score(chip)
+            reward = score - self._last_score
+            self._last_score = score
+        self._rewards[0] = reward
+        self._dones[0] = done
+        if done:
+            self.reset()
+        else:
+            self._observe()
+
+    def _observe(self):
+        chip = self._chip
+        if not chip.draw_flag:
+            return
+        chip.draw_flag = False
+        if chip._screen.shape == self._observation.shape:
+            self._observation[:] = chip._screen
+        else:
+            #SUPER-CHIP high resolution, every other pixel
+            self._observation[:] = chip._screen[::2, ::2]
+
+
+def _work(
+    connection, name: str, count: int, indices: list, rom_data: bytes,
+    seed_sequences: list, frame_skip: int, cycles_per_frame: int, score
+):
+    """Worker process loop, runs the envs in indices on every command.
+    """
+    memory = shared_memory.SharedMemory(name)
+    try:
+        arrays = _views(memory.buf, count)
+        envs = [
+            _Env(
+                index, arrays, rom_data, seed_sequence, frame_skip,
+                cycles_per_frame, score
+            )
+            for index, seed_sequence in zip(indices, seed_sequences)
+        ]
+        arrays = None
+        while True:
+            command = connection.recv()
+            if command == 'close':
+                break
+            for env in envs:
+                getattr(env, command)()
+            connection.send(None)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        #The views must go before the buffer they point into
+        arrays = envs = None
+        memory.close()
+        connection.close()
+
+
+class VecEnv:
+    """count emulators of one ROM, spread over worker processes.
+
+    The arrays returned by reset and step are views of the shared memory:
+    they are overwritten in place by the next step, so copy them to keep
+    them around.
+
+    Args:
+        rom_data: The ROM every emulator runs.
+        count: Number of emulators.
+        workers: Worker processes, one per core by default.
+        frame_skip: Frames each action is held for in a step.
+        cycles_per_frame: Instructions run between two timer ticks.
+        score: Picklable callable giving the score of a Cpu, like
+            RegisterScore. Rewards are its change over a step, and zero
+            without it.
+        seed: Seed of the Cxnn random numbers, random by default.
+
+    Attributes:
+        observations: (count, 32, 64) array of bools, one screen per emulator.
+        rewards: (count,) float32 array, the rewards of the last step.
+        dones: (count,) array of bools, set for the episodes the last
+            step ended.
+    """
+
+    def __init__(
+        self, rom_data: bytes, count: int, workers: int = None,
+        frame_skip: int = 4, cycles_per_frame: int = 10, score=None,
+        seed: int = None
+    ):
+        self._count = count
+        self._memory = shared_memory.SharedMemory(
+            create=True, size=_buffer_size(count)
+        )
+        arrays = _views(self._memory.buf, count)
+        self.observations = arrays['observations']
+        self.rewards = arrays['rewards']
+        self.dones = arrays['dones']
+        self._actions = arrays['actions']
+
+        seed_sequences = [None] * count
+        if seed is not None:
+            seed_sequences = np.random.SeedSequence(seed).spawn(count)
+        workers = min(count, workers or multiprocessing.cpu_count() or 1)
+        self._connections = []
+        self._processes = []
+        for indices in np.array_split(np.arange(count), workers):
+            indices = indices.tolist()
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_work, daemon=True,
+                args=(
+                    child, self._memory.name, count, indices, rom_data,
+                    [seed_sequences[index] for index in indices],
+                    frame_skip, cycles_per_frame, score
+                ),
+            )
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def _command(self, command: str):
+        for connection in self._connections:
+            connection.send(command)
+        for connection in self._connections:
+            connection.recv()
+
+    def reset(self) -> np.array:
+        """Starts every emulator over.
+
+        Returns:
+            observations
+        """
+        self._actions[:] = False
+        self.rewards[:] = 0
+        self.dones[:] = False
+        self._command('reset')
+        return self.observations
+
+    def step(self, actions: np.array):
+        """Runs frame_skip frames of every emulator.
+
+        Args:
+            actions: (count, 16) array of bools, the keys held down by each
+                emulator, or (count,) array of ints, the one key held down
+                by each, none where negative.
+
+        Returns:
+            (observations, rewards, dones)
+        """
+        actions = np.asarray(actions)
+        if actions.ndim == 1:
+            self._actions[:] = False
+            held = np.flatnonzero(actions >= 0)
+            self._actions[held, actions[held]] = True
+        else:
+            self._actions[:] = actions
+        self._command('step')
+        return self.observations, self.rewards, self.dones
+
+    def close(self):
+        if self._memory is None:
+            return
+        for connection in self._connections:
+            try:
+                connection.send('close')
+            except OSError:
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self.observations = self.rewards = self.dones = self._actions = None
+        self._memory.close()
+        self._memory.unlink()
+        self._memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return (
+            f'VecEnv(count={self._count!r}, '
+            f'workers={len(self._processes)!r})'
+        )
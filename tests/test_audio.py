@@ -0,0 +1,51 @@
+import tempfile
+import unittest
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from pychip8 import audio
+from pychip8.cpu import Cpu
+from pychip8.headless import HeadlessRunner
+
+class TestAudio(unittest.TestCase):
+    def test_square_wave_chunks(self):
+        tone = audio.SquareWave(max_chunk=735)
+        chunks = [tone.next_chunk(735) for _ in range(4)]
+        for chunk in chunks:
+            self.assertIs(chunk.base, tone.samples)
+        joined = np.concatenate(chunks)
+        self.assertTrue((joined[tone.period:] == joined[:-tone.period]).all())
+        self.assertEqual(set(joined[:tone.period].tolist()), {
+            int(audio.VOLUME * 0x7FFF), -int(audio.VOLUME * 0x7FFF)
+        })
+
+    def test_wave_follows_sound_timer(self):
+        #Waits two frames on the delay timer, then beeps for 3 frames
+        program = bytes([
+            0x60, 0x02, 0xF0, 0x15,  #200: DT = 2
+            0xF1, 0x07,              #204: V1 = DT
+            0x31, 0x00,              #206: skip if V1 == 0
+            0x12, 0x04,              #208: jump 204
+            0x62, 0x03, 0xF2, 0x18,  #20A: ST = 3
+            0x12, 0x0E,              #20E: jump 20E
+        ])
+        chip = Cpu()
+        chip.load_rom(program)
+        with tempfile.TemporaryDirectory() as out_dir:
+            path = Path(out_dir, 'beep.wav')
+            with audio.WaveRecorder(path) as beep:
+                HeadlessRunner(chip, audio=beep).run(max_frames=8)
+            with wave.open(str(path)) as wav:
+                samples = np.frombuffer(
+                    wav.readframes(wav.getnframes()), dtype=np.int16
+                )
+        self.assertEqual(beep.frames, 8)
+        self.assertEqual(beep.sounding_frames, 3)
+        #The beep starts on the frame that ran Fx18
+        sounding = (samples.reshape(8, -1) != 0).any(axis=1)
+        self.assertEqual(sounding.tolist(), [False] * 2 + [True] * 3 + [False] * 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+
+from pychip8 import backends
+
+class TestDirtyRows(unittest.TestCase):
+    def test_dirty_rows(self):
+        previous = np.zeros((32, 64), dtype=np.bool)
+        current = previous.copy()
+        self.assertIsNone(backends.dirty_rows(previous, current))
+        current[3, 10] = True
+        current[7, 0] = True
+        self.assertEqual(backends.dirty_rows(previous, current), (3, 8))
+        current[31, 63] = True
+        self.assertEqual(backends.dirty_rows(previous, current), (3, 32))
+
+class TestMemoryBackends(unittest.TestCase):
+    def test_memory_display(self):
+        display = backends.MemoryDisplay()
+        pixels = np.zeros(64*32, dtype=np.bool)
+        display.update_pixel_grid(pixels)
+        pixels[0] = True
+        display.present()
+        self.assertEqual(display.frame_count, 1)
+        self.assertFalse(display.frame.any())
+
+    def test_memory_key_input(self):
+        keys = np.zeros(16, dtype=np.bool)
+        key_input = backends.MemoryKeyInput(keys)
+        key_input.press(0xA)
+        key_input.press(3)
+        self.assertFalse(keys.any())
+        key_input.process_events()
+        self.assertEqual(np.flatnonzero(keys).tolist(), [3, 0xA])
+        key_input.release(3)
+        key_input.request_exit()
+        self.assertFalse(key_input.update_exit_status())
+        key_input.process_events()
+        self.assertEqual(np.flatnonzero(keys).tolist(), [0xA])
+        self.assertTrue(key_input.update_exit_status())
+
+    def test_null_backends(self):
+        keys = np.zeros(16, dtype=np.bool)
+        key_input = backends.NullKeyInput(keys)
+        key_input.process_events()
+        self.assertFalse(keys.any())
+        self.assertFalse(key_input.update_exit_status())
+        backends.NullDisplay().update_pixel_grid(np.ones(64*32, dtype=np.bool))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from pathlib import Path
+
+from pychip8.batch import BatchCpu
+from pychip8.cpu import Cpu
+from tests.test_cpu import cpu_state
+
+TEST_DIR = Path(__file__).resolve().parent
+
+def instance_state(batch: BatchCpu, index: int):
+    """Machine state of one instance, in the format of cpu_state."""
+    return (
+        batch._memory[index].tobytes(), batch._v_regs[index].tobytes(),
+        int(batch._i_reg[index]), int(batch._program_counter[index]),
+        int(batch._stack_pointer[index]), batch._stack[index].tolist(),
+        int(batch._delay_timer[index]), int(batch._sound_timer[index]),
+        batch.pixel_buffer[index].tobytes(),
+    )
+
+class TestBatchCpu(unittest.TestCase):
+    def test_matches_cpu(self):
+        roms = sorted(TEST_DIR.glob('*.ch8'))
+        batch = BatchCpu(len(roms), seed=0)
+        chips = []
+        for index, rom in enumerate(roms):
+            batch.load_rom(rom.read_bytes(), index)
+            chips.append(Cpu())
+            chips[-1].load_rom(rom.read_bytes())
+
+        for cycle in range(1500):
+            words = [chip._fetch_opcode(chip._program_counter) for chip in chips]
+            batch.step()
+            for index, chip in enumerate(chips):
+                chip.run_cycle()
+                #Cxnn numbers come from different generators
+                if words[index] >> 12 == 0xC:
+                    vx = (words[index] >> 8) & 0xF
+                    chip._v_regs[vx] = batch._v_regs[index, vx]
+            if cycle % 10 == 0:
+                batch.decrease_timers()
+                for chip in chips:
+                    chip.decrease_timers()
+
+        self.assertFalse(batch.halted.any())
+        for index, chip in enumerate(chips):
+            self.assertEqual(instance_state(batch, index), cpu_state(chip))
+
+    def test_halts_instead_of_raising(self):
+        batch = BatchCpu(2)
+        batch.load_rom(bytes([0x00, 0xEE]), 0)
+        batch.load_rom(bytes([0x12, 0x00]), 1)
+        batch.run(10)
+        self.assertEqual(batch.halted.tolist(), [True, False])
+        self.assertEqual(batch.halt_reasons, {0: 'stack underflow'})
+
+if __name__ == '__main__':
+    unittest.main()
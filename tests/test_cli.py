@@ -1,3 +1,5 @@
+import contextlib
+import io
 import unittest
 
 from pychip8.cli import CmdLineInterface 
@@ -19,5 +21,13 @@ class TestCLI(unittest.TestCase):
             CmdLineInterface(test_args).parsed_args, expected_args
         )
 
+    def test_seed_range(self):
+        args = CmdLineInterface(['test_rom', '--seed', str(2**64 - 1)]).parsed_args
+        self.assertEqual(args['seed'], 2**64 - 1)
+        for seed in ('-1', str(2**64)):
+            with self.subTest(seed=seed), self.assertRaises(SystemExit):
+                with contextlib.redirect_stderr(io.StringIO()):
+                    CmdLineInterface(['test_rom', '--seed', seed])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,183 @@
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from pychip8.cpu import Cpu
+from pychip8.reference import ReferenceCpu
+
+TEST_DIR = Path(__file__).resolve().parent
+
+def cpu_state(chip):
+    """Machine state of either engine as plain Python values."""
+    scalar = lambda reg: int(np.ravel(reg)[0])
+    return (
+        bytes(chip._memory), bytes(chip._v_regs), scalar(chip._i_reg),
+        scalar(chip._program_counter), scalar(chip._stack_pointer),
+        [int(addr) for addr in chip._stack],
+        scalar(chip._delay_timer), scalar(chip._sound_timer),
+        chip.pixel_buffer.tobytes(),
+    )
+
+#Draws 16x16 sprites on the SUPER-CHIP screen, one clipped at the corner,
+#scrolls them, saves and restores registers in the RPL flags and draws
+#a big digit
+SUPERCHIP_PROGRAM = bytes([
+    0x00, 0xFF,              #200: high resolution
+    0xA2, 0x28,              #202: I = 228
+    0x60, 0x78, 0x61, 0x3C,  #204: V0 = 120, V1 = 60
+    0xD0, 0x10,              #208: 16x16 sprite at (V0, V1)
+    0x62, 0x10, 0x63, 0x05,  #20A: V2 = 16, V3 = 5
+    0xD2, 0x30,              #20E: 16x16 sprite at (V2, V3)
+    0x00, 0xC3,              #210: scroll down 3
+    0x00, 0xFB,              #212: scroll right 4
+    0x00, 0xFC, 0x00, 0xFC,  #214: scroll left 8
+    0xF2, 0x75,              #218: RPL = V0-V2
+    0x60, 0x00, 0x61, 0x00,  #21A: V0 = 0, V1 = 0
+    0xF2, 0x85,              #21E: V0-V2 = RPL
+    0x64, 0x07,              #220: V4 = 7
+    0xF4, 0x30,              #222: I = big 7
+    0xD4, 0x4A,              #224: 8x10 sprite at (V4, V4)
+    0x12, 0x26,              #226: jump 226
+]) + bytes((0x11 + 7*i) & 0xFF for i in range(32))
+
+class TestCpu(unittest.TestCase):
+    def run_program(self, words: list, cycles: int):
+        chip = Cpu()
+        chip.load_rom(b''.join(word.to_bytes(2, 'big') for word in words))
+        for _ in range(cycles):
+            chip.run_cycle()
+        return chip
+
+    def test_add_with_carry(self):
+        chip = self.run_program([0x60F0, 0x6120, 0x8014], 3)
+        self.assertEqual(chip._v_regs[0], 0x10)
+        self.assertEqual(chip._v_regs[0xF], 1)
+
+    def test_store_registers_increments_i(self):
+        chip = self.run_program([0x6007, 0x6109, 0xA300, 0xF155], 4)
+        self.assertEqual(bytes(chip._memory[0x300:0x302]), b'\x07\x09')
+        self.assertEqual(chip._i_reg, 0x302)
+
+    def test_draw_clips_at_screen_edge(self):
+        #Font digit 0 drawn at (60, 30) only keeps its top-left corner
+        chip = self.run_program([0x603C, 0x611E, 0xA000, 0xD015], 4)
+        screen = chip.pixel_buffer.reshape(32, 64)
+        self.assertEqual(screen.sum(), 6)
+        self.assertTrue(screen[30, 60:].all())
+
+    def test_draw_collision(self):
+        chip = self.run_program([0xA000, 0xD005, 0xD005], 3)
+        self.assertEqual(chip._v_regs[0xF], 1)
+        self.assertFalse(chip.pixel_buffer.any())
+
+    def test_self_modifying_code(self):
+        #Runs 0x20A as V1 = 5, then rewrites it to V1 = 7 and runs it again
+        program = [0x120A, 0, 0, 0, 0, 0x6105, 0x3200, 0x1220,
+                   0x6201, 0x6061, 0x6107, 0xA20A, 0xF155, 0x6100, 0x120A,
+                   0, 0x1220]
+        chip = self.run_program(program, 13)
+        self.assertEqual(chip._v_regs[1], 7)
+        self.assertEqual(chip._program_counter, 0x220)
+
+    def test_save_state_round_trip(self):
+        #Same program as test_self_modifying_code, saved before the rewrite
+        program = [0x120A, 0, 0, 0, 0, 0x6105, 0x3200, 0x1220,
+                   0x6201, 0x6061, 0x6107, 0xA20A, 0xF155, 0x6100, 0x120A,
+                   0, 0x1220]
+        chip = self.run_program(program, 5)
+        state = chip.save_state()
+        self.assertEqual(len(state), 5196)
+        for _ in range(8):
+            chip.run_cycle()
+        after = cpu_state(chip)
+
+        chip.load_state(state)
+        self.assertEqual(chip.save_state(), state)
+        for _ in range(8):
+            chip.run_cycle()
+        self.assertEqual(cpu_state(chip), after)
+        with self.assertRaises(ValueError):
+            chip.load_state(state[:-1])
+
+    def test_end_of_code(self):
+        with self.assertRaises(ValueError):
+            self.run_program([0x0000], 1)
+
+    def test_matches_reference(self):
+        for rom in sorted(TEST_DIR.glob('*.ch8')):
+            with self.subTest(rom=rom.name):
+                rom_data = rom.read_bytes()
+                chip, ref = Cpu(), ReferenceCpu()
+                chip.load_rom(rom_data)
+                ref.load_rom(rom_data)
+                for cycle in range(2000):
+                    pc = chip._program_counter
+                    chip.run_cycle()
+                    ref.run_cycle()
+                    #Both draw their own random number on Cxnn
+                    if chip._memory[pc] >> 4 == 0xC:
+                        vx = chip._memory[pc] & 0xF
+                        chip._v_regs[vx] = ref._v_regs[vx]
+                    if cycle % 10 == 0:
+                        chip.decrease_timers()
+                        ref.decrease_timers()
+                self.assertEqual(cpu_state(chip), cpu_state(ref))
+
+class TestSuperChip(unittest.TestCase):
+    def run_program(self, cycles: int):
+        chip = Cpu()
+        chip.load_rom(SUPERCHIP_PROGRAM)
+        for _ in range(cycles):
+            chip.run_cycle()
+        return chip
+
+    def test_resolution_switch(self):
+        chip = Cpu()
+        chip.load_rom(bytes([0x00, 0xFF, 0x00, 0xFE]))
+        chip.run_cycle()
+        self.assertEqual(chip.pixel_buffer.size, 128*64)
+        chip.run_cycle()
+        self.assertEqual(chip.pixel_buffer.size, 64*32)
+
+    def test_big_sprite_clips_at_screen_edge(self):
+        chip = self.run_program(5)
+        sprite = np.unpackbits(
+            np.frombuffer(SUPERCHIP_PROGRAM[0x28:], dtype=np.uint8)
+        ).reshape(16, 16).astype(bool)
+        screen = chip.pixel_buffer.reshape(64, 128)
+        self.assertEqual(screen.sum(), sprite[:4, :8].sum())
+        self.assertTrue((screen[60:, 120:] == sprite[:4, :8]).all())
+
+    def test_scroll(self):
+        chip = self.run_program(8)
+        before = chip.pixel_buffer.reshape(64, 128).copy()
+        chip.run_cycle()
+        chip.run_cycle()
+        expected = np.zeros_like(before)
+        expected[3:, 4:] = before[:-3, :-4]
+        self.assertTrue((chip.pixel_buffer.reshape(64, 128) == expected).all())
+        chip.run_cycle()
+        chip.run_cycle()
+        expected[:, :-8] = expected[:, 8:].copy()
+        expected[:, -8:] = False
+        self.assertTrue((chip.pixel_buffer.reshape(64, 128) == expected).all())
+
+    def test_rpl_flags_and_big_font(self):
+        chip = self.run_program(19)
+        self.assertEqual(bytes(chip._v_regs[:3]), bytes([120, 60, 16]))
+        self.assertEqual(chip._i_reg, 0x50 + 70)
+        screen = chip.pixel_buffer.reshape(64, 128)
+        self.assertTrue(screen[7, 7:15].all())
+
+    def test_save_state_keeps_resolution(self):
+        chip = self.run_program(19)
+        state = chip.save_state()
+        after = cpu_state(chip)
+        chip._set_resolution(False)
+        chip.load_state(state)
+        self.assertEqual(cpu_state(chip), after)
+        self.assertEqual(chip.save_state(), state)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import io
+import unittest
+
+from pychip8.cpu import Cpu
+from pychip8.debugger import Debugger, DebuggerShell, TraceBuffer
+
+#Counts V0 up by one forever, storing it at 0x300 every time
+PROGRAM = bytes([
+    0x70, 0x01,  #200: V0 += 1
+    0xA3, 0x00,  #202: I = 300
+    0xF0, 0x55,  #204: memory[I] = V0
+    0x12, 0x00,  #206: jump 200
+])
+
+def new_debugger(**kwargs) -> Debugger:
+    chip = Cpu(0)
+    chip.load_rom(PROGRAM)
+    return Debugger(chip, **kwargs)
+
+class TestDebugger(unittest.TestCase):
+    def test_disarmed_tables_are_untouched(self):
+        debugger = new_debugger()
+        chip = debugger._cpu
+        debugger.add_breakpoint(0x204)
+        self.assertTrue(debugger.attached)
+        self.assertIsNot(
+            getattr(chip._opcode_main_table[0x1], '__func__', None), Cpu._op_1nnn
+        )
+        debugger.remove_breakpoint()
+        self.assertFalse(debugger.attached)
+        self.assertIs(chip._opcode_main_table[0x1].__func__, Cpu._op_1nnn)
+        self.assertIs(chip._opcode_main_table[0xF][0x55].__func__, Cpu._op_fx55)
+        self.assertEqual(chip._code_write_hooks.count(debugger._memory_written), 0)
+
+    def test_breakpoint_and_resume(self):
+        debugger = new_debugger()
+        debugger.add_breakpoint(0x204)
+        self.assertEqual(debugger.run(), 'breakpoint 0x204')
+        self.assertEqual(debugger._cpu._program_counter, 0x204)
+        self.assertEqual(debugger.cycles, 2)
+        self.assertEqual(debugger.run(), 'breakpoint 0x204')
+        self.assertEqual(debugger.cycles, 6)
+        self.assertEqual(debugger._cpu._v_regs[0], 2)
+        #Timers tick once every frame of 10 instructions
+        debugger.remove_breakpoint()
+        self.assertIsNone(debugger.run(max_frames=3))
+        self.assertEqual((debugger.cycles, debugger.frames), (30, 3))
+
+    def test_conditional_breakpoint(self):
+        debugger = new_debugger()
+        debugger.add_breakpoint(0x200, 'V0 == 5 and mem[0x300] == 5')
+        self.assertEqual(debugger.run(), 'breakpoint 0x200')
+        self.assertEqual(debugger._cpu._v_regs[0], 5)
+        self.assertEqual(debugger.cycles, 20)
+        with self.assertRaises(SyntaxError):
+            debugger.add_breakpoint(0x200, 'V0 ==')
+
+    def test_watchpoints(self):
+        debugger = new_debugger()
+        debugger.watch_register('I')
+        self.assertEqual(debugger.run(), 'watch I: 0 -> 768 at 0x202')
+        debugger.unwatch('i')
+        debugger.watch_memory(0x300)
+        self.assertEqual(debugger.run(), 'watch memory 0x300: 00 -> 01 at 0x204')
+        self.assertEqual(debugger.step(4), 'watch memory 0x300: 01 -> 02 at 0x204')
+        debugger.unwatch()
+        self.assertFalse(debugger.attached)
+
+    def test_trace_ring(self):
+        debugger = new_debugger(trace_size=3)
+        debugger.start_trace(0x202, 0x208)
+        self.assertIsNone(debugger.step(8))
+        self.assertEqual(debugger.trace.count, 6)
+        records = debugger.trace.last()
+        self.assertEqual(records['pc'].tolist(), [0x202, 0x204, 0x206])
+        self.assertEqual(records['word'].tolist(), [0xA300, 0xF055, 0x1200])
+        self.assertEqual(records['v'][:, 0].tolist(), [2, 2, 2])
+        self.assertEqual(debugger.trace.last(1)['pc'].tolist(), [0x206])
+
+        ring = TraceBuffer(2)
+        self.assertEqual(len(ring.last()), 0)
+
+    def test_halt(self):
+        chip = Cpu(0)
+        chip.load_rom(bytes([0x60, 0x01]))
+        debugger = Debugger(chip)
+        debugger.add_breakpoint(0x300)
+        debugger.run()
+        self.assertIn('END OF CODE', debugger.halt_reason)
+        self.assertEqual(debugger.cycles, 1)
+
+    def test_shell(self):
+        debugger = new_debugger()
+        commands = io.StringIO(
+            'b 206 if V0 == 2\nc\nregs\nwatch 300\ns 4\ntrace on\ns 2\n'
+            'trace 2\nlist 200 2\nmem 300 2\ninfo\nbogus\nbreak zz\nquit\n'
+        )
+        output = io.StringIO()
+        DebuggerShell(debugger, stdin=commands, stdout=output).cmdloop()
+        text = output.getvalue()
+        self.assertIn('breakpoint 0x206', text)
+        self.assertIn('V0=02', text)
+        self.assertIn('watch memory 0x300: 02 -> 03 at 0x204', text)
+        self.assertIn('0x200  7001  ADD', text)
+        self.assertIn('300  03 00', text)
+        self.assertIn('break 0x206 if V0 == 2', text)
+        self.assertIn('*** Unknown syntax: bogus', text)
+        self.assertIn('error: invalid literal', text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from pychip8 import disasm
+from pychip8.cpu import Cpu
+
+TEST_DIR = Path(__file__).resolve().parent
+
+#Calls a subroutine, skips on V0, overwrites its own code and ends in data
+PROGRAM = bytes([
+    0x22, 0x0C,              #200: call 20C
+    0x30, 0x01,              #202: skip if V0 == 1
+    0x60, 0x02,              #204: V0 = 2
+    0xA2, 0x06,              #206: I = 206
+    0xF0, 0x55,              #208: memory[I] = V0
+    0x12, 0x0A,              #20A: jump 20A
+    0x60, 0x01,              #20C: V0 = 1
+    0x00, 0xEE,              #20E: return
+    0xF0, 0x90, 0xF0,        #210: sprite data
+])
+
+class TestDisasm(unittest.TestCase):
+    def test_control_flow(self):
+        analysis = disasm.analyze(PROGRAM)
+        self.assertEqual(
+            sorted(analysis.instructions), list(range(0x200, 0x210, 2))
+        )
+        self.assertEqual(analysis.subroutines, {0x20C: [0x200]})
+        self.assertEqual(analysis.jump_targets, {0x20A})
+        self.assertEqual(analysis.blocks, {
+            0x200: (0x202, [0x202, 0x20C]),
+            0x202: (0x204, [0x204, 0x206]),
+            0x204: (0x206, [0x206]),
+            0x206: (0x20A, [0x20A]),
+            0x20A: (0x20C, [0x20A]),
+            0x20C: (0x210, []),
+        })
+        self.assertEqual(analysis.data_regions, [(0x210, 0x213)])
+        self.assertEqual(analysis.self_modifying, [(0x208, 0x206, 0x207)])
+
+    def test_listing(self):
+        listing = disasm.analyze(PROGRAM).listing(PROGRAM)
+        self.assertIn('0x200  220c  CALL  0x20c', listing)
+        self.assertIn('sub_20c:', listing)
+        self.assertIn('0x210  DB    0xf0, 0x90, 0xf0', listing)
+
+    def test_cache_round_trip(self):
+        rom_data = (TEST_DIR / 'test_opcode.ch8').read_bytes()
+        with tempfile.TemporaryDirectory() as cache:
+            analysis = disasm.load_or_analyze(rom_data, cache)
+            self.assertEqual(len(list(Path(cache).glob('*.json'))), 1)
+            cached = disasm.load_or_analyze(rom_data, cache)
+        self.assertEqual(cached.to_dict(), analysis.to_dict())
+
+    def test_warm_decode_cache(self):
+        chip = Cpu()
+        chip.load_rom(PROGRAM)
+        disasm.warm_decode_cache(chip, disasm.analyze(PROGRAM))
+        for address in range(0x200, 0x210, 2):
+            self.assertIsNotNone(chip._decode_cache[address])
+        self.assertIsNone(chip._decode_cache[0x210])
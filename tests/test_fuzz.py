@@ -0,0 +1,73 @@
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from pychip8 import cpu, fuzz
+
+TEST_DIR = Path(__file__).resolve().parent
+
+class CarrylessCpu(cpu.Cpu):
+    """Cpu with 8xy4 forgetting the carry, for the fuzzer to find."""
+    __slots__ = ()
+
+    def _op_8xy4(self, x, y):
+        self._v_regs[x] = (self._v_regs[x] + self._v_regs[y]) & 0xFF
+
+class CarrylessChips(fuzz._Chips):
+    def _new_chip(self, seed):
+        return CarrylessCpu(seed)
+
+class TestFuzz(unittest.TestCase):
+    def setUp(self):
+        self.corpus = fuzz.load_corpus([TEST_DIR / 'test_opcode.ch8'])
+
+    def test_engines_agree(self):
+        for first, second in [
+            ('cpu', 'reference'), ('cpu', 'batch'), ('packed', 'packed-batch'),
+            ('cpu', 'translator'), ('idle', 'packed'),
+        ]:
+            with self.subTest(first=first, second=second):
+                found, instructions = fuzz.fuzz_batch(
+                    first, second, self.corpus, 32, frames=30, seed=1
+                )
+                self.assertIsNone(found)
+                self.assertGreater(instructions, 1000)
+
+    def test_pairs_that_cannot_run_in_lockstep(self):
+        with self.assertRaises(ValueError):
+            fuzz.check_pair('idle', 'translator')
+        with self.assertRaises(ValueError):
+            fuzz.check_pair('translator', 'batch')
+
+    def test_finds_and_minimizes_divergence(self):
+        engines = dict(fuzz.ENGINES, carryless=CarrylessChips)
+        with mock.patch.object(fuzz, 'ENGINES', engines):
+            found, _ = fuzz.fuzz_batch(
+                'carryless', 'cpu', self.corpus, 64, frames=30, seed=0
+            )
+            self.assertIsNotNone(found)
+            self.assertEqual(list(found.differences), ['VF'])
+            self.assertIsNotNone(found.cycle)
+            #Replaying the minimized program diverges at the same instruction
+            again, _ = fuzz.run_pair(
+                'carryless', 'cpu', [found.case], found.frame + 1,
+                per_instruction=True
+            )
+            self.assertEqual((again.frame, again.cycle), (found.frame, found.cycle))
+
+        program = found.case.program
+        words = [program[at] << 8 | program[at+1] for at in range(0, len(program), 2)]
+        self.assertLessEqual(sum(word != fuzz._NOP for word in words), 4)
+        self.assertIn('ADD   V', found.report())
+
+    def test_parallel_batches(self):
+        found, cases, instructions = fuzz.fuzz(
+            'cpu', 'packed', self.corpus, cases=40, batch_size=16,
+            frames=20, workers=2
+        )
+        self.assertIsNone(found)
+        self.assertEqual(cases, 40)
+        self.assertGreater(instructions, 0)
+
+if __name__ == '__main__':
+    unittest.main()
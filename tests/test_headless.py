@@ -0,0 +1,90 @@
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from pychip8 import backends, farm
+from pychip8.cpu import Cpu
+from pychip8.headless import HeadlessRunner
+
+TEST_DIR = Path(__file__).resolve().parent
+
+class TestHeadlessRunner(unittest.TestCase):
+    def test_cycle_budget(self):
+        chip = Cpu()
+        chip.load_rom((TEST_DIR / 'test_opcode.ch8').read_bytes())
+        display = backends.MemoryDisplay()
+        runner = HeadlessRunner(chip, display)
+        runner.run(max_cycles=1005)
+        self.assertEqual(runner.cycles, 1005)
+        self.assertEqual(runner.frames, 101)
+        self.assertIsNone(runner.halt_reason)
+        self.assertTrue(display.frame.any())
+
+    def test_speed_report(self):
+        chip = Cpu()
+        chip.load_rom((TEST_DIR / 'test_opcode.ch8').read_bytes())
+        runner = HeadlessRunner(chip, skip_idle=False)
+        runner.run(max_cycles=500)
+        self.assertGreater(runner.elapsed, 0)
+        self.assertAlmostEqual(
+            runner.instructions_per_second, runner.cycles / runner.elapsed
+        )
+        self.assertEqual(HeadlessRunner(chip).instructions_per_second, float('inf'))
+
+    def test_end_of_code(self):
+        for recompile in (False, True):
+            with self.subTest(recompile=recompile):
+                chip = Cpu()
+                chip.load_rom(bytes([0x60, 0x01, 0x00, 0x00]))
+                runner = HeadlessRunner(chip, recompile=recompile)
+                runner.run(max_cycles=100)
+                self.assertEqual(runner.cycles, 1)
+                self.assertEqual(runner.halt_reason, 'ValueError: END OF CODE')
+
+    def test_exit_request(self):
+        chip = Cpu()
+        chip.load_rom(bytes([0x12, 0x00]))
+        key_input = backends.MemoryKeyInput(chip.key_presses)
+        key_input.press(5)
+        key_input.request_exit()
+        runner = HeadlessRunner(chip, key_input=key_input)
+        runner.run()
+        self.assertEqual(runner.frames, 1)
+        self.assertTrue(chip.key_presses[5])
+
+    def test_no_gui_imports(self):
+        #Importing the package and running headless must not need a GUI
+        script = (
+            'import sys\n'
+            'from pychip8 import __main__\n'
+            f'__main__.main([{str(TEST_DIR / "test_opcode.ch8")!r}, '
+            "'--headless', '-c', '10'])\n"
+            "print(sorted({m.split('.')[0] for m in sys.modules}))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=TEST_DIR.parent,
+            capture_output=True, text=True, check=True
+        )
+        self.assertIn('10 instructions', result.stderr)
+        self.assertNotIn("'sdl2'", result.stdout)
+        self.assertNotIn("'tkinter'", result.stdout)
+
+class TestFarm(unittest.TestCase):
+    def test_farm_results(self):
+        with tempfile.TemporaryDirectory() as rom_dir:
+            Path(rom_dir, 'END').write_bytes(bytes([0x00, 0x00]))
+            Path(rom_dir, 'BIG').write_bytes(bytes(4000))
+            results = {
+                Path(result['rom']).name: result
+                for result in map(
+                    lambda rom: farm.run_rom(rom, 100), farm.find_roms(rom_dir)
+                )
+            }
+        self.assertEqual(results['END']['halt_reason'], 'ValueError: END OF CODE')
+        self.assertEqual(results['END']['cycles'], 0)
+        self.assertIn('error', results['BIG'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from pathlib import Path
+
+from pychip8 import backends
+from pychip8.cpu import Cpu
+from pychip8.headless import HeadlessRunner
+from tests.test_cpu import cpu_state
+
+TEST_DIR = Path(__file__).resolve().parent
+
+class TestIdleSkipper(unittest.TestCase):
+    def run_rom(self, rom_data: bytes, skip_idle: bool, frames: int):
+        chip = Cpu(seed=0)
+        chip.load_rom(rom_data)
+        key_input = backends.MemoryKeyInput(chip.key_presses)
+        runner = HeadlessRunner(chip, key_input=key_input, skip_idle=skip_idle)
+        runner.run(max_frames=frames)
+        return chip, runner, key_input
+
+    def test_matches_every_cycle_run(self):
+        for rom in sorted(TEST_DIR.glob('*.ch8')):
+            with self.subTest(rom=rom.name):
+                chip, runner, _ = self.run_rom(rom.read_bytes(), False, 500)
+                skip_chip, skip_runner, _ = self.run_rom(rom.read_bytes(), True, 500)
+                self.assertEqual(cpu_state(skip_chip), cpu_state(chip))
+                self.assertEqual(skip_runner.cycles, runner.cycles)
+                self.assertGreater(skip_runner.idle_cycles, 0)
+
+    def test_delay_timer_poll(self):
+        #Sets the delay timer to 5 and polls it until it runs out
+        program = bytes([
+            0x60, 0x05, 0xF0, 0x15,  #200: DT = 5
+            0xF1, 0x07,              #204: V1 = DT
+            0x31, 0x00,              #206: skip if V1 == 0
+            0x12, 0x04,              #208: jump 204
+            0x62, 0x01,              #20A: V2 = 1
+            0x12, 0x0C,              #20C: jump 20C
+        ])
+        chip, runner, _ = self.run_rom(program, True, 7)
+        self.assertEqual(chip._v_regs[2], 1)
+        self.assertEqual(chip._program_counter, 0x20C)
+        self.assertEqual(runner.cycles, 70)
+        self.assertGreater(runner.idle_cycles, 20)
+
+    def test_key_wait(self):
+        chip, runner, key_input = self.run_rom(bytes([0xF3, 0x0A]), True, 3)
+        #The first cycle of each frame runs before the wait is noticed
+        self.assertEqual(runner.idle_cycles, 24)
+        key_input.press(9)
+        runner.run(max_frames=4)
+        self.assertEqual(chip._v_regs[3], 9)
+
+if __name__ == '__main__':
+    unittest.main()
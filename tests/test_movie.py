@@ -0,0 +1,55 @@
+import unittest
+
+from pychip8 import backends, movie
+from pychip8.cpu import Cpu
+from pychip8.headless import HeadlessRunner
+from tests.test_cpu import cpu_state
+
+#Waits for a key, adds a random byte to V2 and draws the key digit
+_PROGRAM = bytes([
+    0xF0, 0x0A,  #200: V0 = key
+    0xC1, 0xFF,  #202: V1 = random
+    0x82, 0x14,  #204: V2 += V1
+    0xF0, 0x29,  #206: I = digit V0
+    0xD2, 0x05,  #208: draw at (V2, V2)
+    0x12, 0x00,  #20A: jump 200
+])
+
+class TestMovie(unittest.TestCase):
+    def test_replay_matches_recording(self):
+        chip = Cpu(seed=1234)
+        chip.load_rom(_PROGRAM)
+        key_input = backends.MemoryKeyInput(chip.key_presses)
+        recorder = movie.MovieRecorder(
+            key_input, movie.Movie(b'\0' * 20, 1234, 10)
+        )
+        runner = HeadlessRunner(chip, key_input=recorder)
+        for frame, key, pressed in [(3, 5, True), (8, 5, False), (12, 0xA, True)]:
+            runner.run(max_frames=frame)
+            (key_input.press if pressed else key_input.release)(key)
+        runner.run(max_frames=20)
+
+        recorded = movie.Movie.from_bytes(recorder.movie.to_bytes())
+        self.assertEqual(recorded.frames, 20)
+        self.assertEqual(recorded.events, [(3, 0x20), (8, 0), (12, 0x400)])
+
+        replay = Cpu(seed=recorded.seed)
+        replay.load_rom(_PROGRAM)
+        runner = HeadlessRunner(
+            replay, key_input=movie.MoviePlayback(replay.key_presses, recorded),
+            cycles_per_frame=recorded.cycles_per_frame
+        )
+        runner.run()
+        self.assertEqual(runner.frames, 20)
+        self.assertEqual(cpu_state(replay), cpu_state(chip))
+
+    def test_seeded_random_numbers(self):
+        first, second = Cpu(seed=7), Cpu(seed=7)
+        for chip in (first, second):
+            chip.load_rom(bytes([0xC0, 0xFF, 0xC1, 0xFF, 0xC2, 0xFF]))
+            for _ in range(3):
+                chip.run_cycle()
+        self.assertEqual(bytes(first._v_regs), bytes(second._v_regs))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from pychip8 import packed
+from pychip8.batch import BatchCpu
+from pychip8.cpu import Cpu
+from tests.test_cpu import SUPERCHIP_PROGRAM, cpu_state
+
+TEST_DIR = Path(__file__).resolve().parent
+
+class TestPacked(unittest.TestCase):
+    def test_pack_round_trip(self):
+        pixels = np.random.default_rng(0).integers(2, size=(3, 32, 64)) == 1
+        rows = packed.pack_rows(pixels)
+        self.assertEqual(rows.shape, (3, 32))
+        self.assertTrue((packed.unpack_rows(rows) == pixels).all())
+        self.assertEqual(
+            packed.argb_pixels([0x81]).tolist(), [0xFF00FF00] + [0] * 6 + [0xFF00FF00]
+        )
+
+    def test_draw_clips_at_screen_edge(self):
+        chip = packed.PackedCpu()
+        chip.load_rom(bytes([0x60, 0x3C, 0x61, 0x1E, 0xA0, 0x00, 0xD0, 0x15]))
+        for _ in range(4):
+            chip.run_cycle()
+        screen = chip.pixel_buffer.reshape(32, 64)
+        self.assertEqual(screen.sum(), 6)
+        self.assertTrue(screen[30, 60:].all())
+
+    def test_matches_cpu(self):
+        for rom in sorted(TEST_DIR.glob('*.ch8')):
+            with self.subTest(rom=rom.name):
+                chip, packed_chip = Cpu(seed=1), packed.PackedCpu(seed=1)
+                for engine in (chip, packed_chip):
+                    engine.load_rom(rom.read_bytes())
+                    for cycle in range(2000):
+                        engine.run_cycle()
+                        if cycle % 10 == 0:
+                            engine.decrease_timers()
+                self.assertEqual(cpu_state(packed_chip), cpu_state(chip))
+                self.assertEqual(packed_chip.save_state(), chip.save_state())
+
+    def test_superchip_matches_cpu(self):
+        chip, packed_chip = Cpu(), packed.PackedCpu()
+        for engine in (chip, packed_chip):
+            engine.load_rom(SUPERCHIP_PROGRAM)
+        for _ in range(19):
+            chip.run_cycle()
+            packed_chip.run_cycle()
+            self.assertEqual(cpu_state(packed_chip), cpu_state(chip))
+        self.assertEqual(packed_chip.save_state(), chip.save_state())
+
+    def test_batch_matches_batch(self):
+        roms = sorted(TEST_DIR.glob('*.ch8'))
+        batches = BatchCpu(len(roms), seed=0), packed.PackedBatchCpu(len(roms), seed=0)
+        for engine in batches:
+            for index, rom in enumerate(roms):
+                engine.load_rom(rom.read_bytes(), index)
+            for cycle in range(1500):
+                engine.step()
+                if cycle % 10 == 0:
+                    engine.decrease_timers()
+        self.assertTrue((batches[0].pixel_buffer == batches[1].pixel_buffer).all())
+        self.assertTrue((batches[0]._v_regs == batches[1]._v_regs).all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from pychip8 import backends, chip8, threaded
+from pychip8.cpu import Cpu
+from pychip8.profiler import Profiler
+from tests.test_cpu import cpu_state
+
+#V0 counts down from 3 in a loop, then the program jumps to itself
+_LOOP = bytes([
+    0x60, 0x03,  #200: V0 = 3
+    0x70, 0xFF,  #202: V0 += 0xFF
+    0x30, 0x00,  #204: skip if V0 == 0
+    0x12, 0x02,  #206: jump 202
+    0x12, 0x08,  #208: jump 208
+])
+
+class TestProfiler(unittest.TestCase):
+    def test_counts(self):
+        chip = Cpu()
+        chip.load_rom(_LOOP)
+        profile = Profiler(chip)
+        profile.attach()
+        for _ in range(12):
+            chip.run_cycle()
+
+        self.assertEqual(
+            dict(profile.handler_counts),
+            {'_op_6xnn': 1, '_op_7xnn': 3, '_op_3xnn': 3, '_op_1nnn': 5}
+        )
+        self.assertEqual(profile.family_counts['1'], 5)
+        self.assertEqual(profile.pc_counts[0x208], 3)
+        self.assertEqual(
+            dict(profile.back_edges), {(0x206, 0x202): 2, (0x208, 0x208): 3}
+        )
+        summary = profile.to_dict()
+        self.assertEqual(summary['instructions'], 12)
+        self.assertEqual(summary['hot_pcs'][0]['count'], 3)
+        self.assertIn('back-edge', profile.report())
+
+    def test_detach_restores_tables(self):
+        chip, plain = Cpu(), Cpu()
+        chip.load_rom(_LOOP)
+        plain.load_rom(_LOOP)
+        profile = Profiler(chip)
+        profile.attach()
+        for _ in range(5):
+            chip.run_cycle()
+        profile.detach()
+        for _ in range(5):
+            chip.run_cycle()
+        for _ in range(10):
+            plain.run_cycle()
+
+        self.assertEqual(cpu_state(chip), cpu_state(plain))
+        self.assertEqual(sum(profile.handler_counts.values()), 5)
+        handler, _ = chip._decode(0x1202)
+        self.assertIs(handler.__func__, Cpu._op_1nnn)
+
+    def test_frame_loops_run_idle_loops(self):
+        #Skipped iterations would never reach the profiler
+        with tempfile.TemporaryDirectory() as out_dir:
+            rom = Path(out_dir, 'SPIN')
+            rom.write_bytes(bytes([0x12, 0x00]))
+            profile_path = Path(out_dir, 'profile.json')
+            instance = chip8.Chip8(
+                [str(rom), '--headless', '--turbo', '--profile', str(profile_path)]
+            )
+            #Run the windowed frame loop on the headless backends
+            instance._args['headless'] = False
+            instance._key_input = backends.MemoryKeyInput(
+                instance._cpu.key_presses
+            )
+            instance._key_input.request_exit()
+            instance.run()
+            summary = json.loads(profile_path.read_text())
+        self.assertEqual(summary['instructions'], 10)
+
+        chip = Cpu()
+        chip.load_rom(bytes([0x12, 0x00]))
+        profile = Profiler(chip)
+        profile.attach()
+        key_input = backends.MemoryKeyInput(chip.key_presses)
+        key_input.fast_forward = True
+        key_input.request_exit()
+        worker = threaded.CpuWorker(
+            chip, threaded.TripleBuffer(chip.pixel_buffer.shape), key_input,
+            10, turbo=True, fast_forward_frames=100, skip_idle=False
+        )
+        worker.start()
+        worker.join(5)
+        self.assertEqual(profile.pc_counts[0x200], 1000)
+
+if __name__ == '__main__':
+    unittest.main()
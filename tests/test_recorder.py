@@ -0,0 +1,77 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from pychip8 import cpu, recorder
+from pychip8.cpu import Cpu
+from pychip8.headless import HeadlessRunner
+from tests.test_cpu import SUPERCHIP_PROGRAM
+
+TEST_DIR = Path(__file__).resolve().parent
+
+class TestRecorder(unittest.TestCase):
+    def test_capture_and_export(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            capture = Path(out_dir, 'run.c8v')
+            chip = Cpu()
+            chip.load_rom((TEST_DIR / 'test_opcode.ch8').read_bytes())
+            with recorder.FrameRecorder(capture) as frames:
+                runner = HeadlessRunner(chip, frames)
+                runner.run(max_frames=120)
+
+            screens, starts, length = recorder.read_capture(capture)
+            self.assertEqual(length, 120)
+            self.assertEqual(len(screens), frames.written)
+            self.assertLess(frames.written, 120)
+            self.assertTrue((screens[-1] == chip._screen).all())
+            self.assertEqual(capture.stat().st_size, 8 + 261 * len(screens) + 5)
+
+            gif_frames = recorder.export_gif(capture, Path(out_dir, 'run.gif'))
+            self.assertGreater(gif_frames, 0)
+            self.assertEqual(Path(out_dir, 'run.gif').read_bytes()[:6], b'GIF89a')
+            count = recorder.export_png(capture, Path(out_dir, 'png'), scale=2)
+            self.assertEqual(count, len(starts))
+            png = Path(out_dir, 'png', f'frame_{starts[0]:07d}.png').read_bytes()
+            self.assertEqual(png[:8], b'\x89PNG\r\n\x1a\n')
+
+    def test_superchip_capture(self):
+        #A 64x32 blank frame, then the program switches to 128x64
+        with tempfile.TemporaryDirectory() as out_dir:
+            capture = Path(out_dir, 'run.c8v')
+            chip = Cpu()
+            chip.load_rom(SUPERCHIP_PROGRAM)
+            with recorder.FrameRecorder(capture, cpu.HIRES_SHAPE) as frames:
+                frames.update_pixel_grid(np.ones(64*32, dtype=bool))
+                frames.present()
+                HeadlessRunner(chip, frames).run(max_frames=3)
+            screens, _, length = recorder.read_capture(capture)
+        self.assertEqual(length, 4)
+        self.assertEqual(screens.shape[1:], cpu.HIRES_SHAPE)
+        self.assertTrue(screens[0].all())
+        self.assertTrue((screens[-1] == chip._screen).all())
+
+    def test_switch_to_high_resolution(self):
+        #Reaches 00FF through Bnnn, where a 64x32 capture cannot see it
+        program = bytes([0x60, 0x00, 0xB2, 0x06, 0x12, 0x04, 0x00, 0xFF,
+                         0x12, 0x08])
+        with tempfile.TemporaryDirectory() as out_dir:
+            capture = Path(out_dir, 'run.c8v')
+            chip = Cpu()
+            chip.load_rom(program)
+            with recorder.FrameRecorder(capture) as frames:
+                frames.update_pixel_grid(np.ones(64*32, dtype=bool))
+                frames.present()
+                runner = HeadlessRunner(chip, frames)
+                runner.run(max_frames=3)
+            screens, starts, length = recorder.read_capture(capture)
+        self.assertIsNone(runner.halt_reason)
+        self.assertEqual(length, 4)
+        self.assertEqual(starts.tolist(), [0, 1])
+        self.assertEqual(screens.shape, (2, *cpu.HIRES_SHAPE))
+        self.assertTrue(screens[0].all())
+        self.assertFalse(screens[1].any())
+
+if __name__ == '__main__':
+    unittest.main()
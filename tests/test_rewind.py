@@ -0,0 +1,42 @@
+import unittest
+from pathlib import Path
+
+from pychip8.cpu import Cpu
+from pychip8.rewind import RewindBuffer
+
+TEST_DIR = Path(__file__).resolve().parent
+
+class TestRewindBuffer(unittest.TestCase):
+    def record(self, rewind: RewindBuffer, frames: int) -> list:
+        chip = Cpu()
+        chip.load_rom((TEST_DIR / 'test_opcode.ch8').read_bytes())
+        states = []
+        for _ in range(frames):
+            for _ in range(10):
+                chip.run_cycle()
+            chip.decrease_timers()
+            states.append(chip.save_state())
+            rewind.push(states[-1])
+        return states
+
+    def test_pops_newest_first(self):
+        rewind = RewindBuffer(keyframe_interval=8)
+        states = self.record(rewind, 30)
+        self.assertEqual(len(rewind), 30)
+        self.assertEqual(rewind.pop(), states[-1])
+        self.assertEqual(rewind.rewind(10), states[-11])
+        while len(rewind):
+            self.assertEqual(rewind.pop(), states[len(rewind)])
+        self.assertEqual(rewind.nbytes, 0)
+        with self.assertRaises(IndexError):
+            rewind.pop()
+
+    def test_memory_budget(self):
+        rewind = RewindBuffer(max_bytes=20000, keyframe_interval=4)
+        states = self.record(rewind, 50)
+        self.assertLessEqual(rewind.nbytes, 20000)
+        self.assertLess(len(rewind), 50)
+        self.assertEqual(rewind.pop(), states[-1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from pychip8.scheduler import FrameScheduler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        #Busy-waiting advances time too
+        self.now += 0.0001
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class TestFrameScheduler(unittest.TestCase):
+    def make(self, **kwargs):
+        clock = FakeClock()
+        pacer = FrameScheduler(60, clock=clock, sleeper=clock.sleep, **kwargs)
+        return clock, pacer
+
+    def test_one_sleep_per_frame_without_drift(self):
+        clock, pacer = self.make()
+        pacer.wait()
+        start = clock.now
+        for _ in range(600):
+            clock.now += 0.004
+            pacer.wait()
+        self.assertEqual(len(clock.sleeps), 600)
+        self.assertAlmostEqual(clock.now - start, 10.0, delta=0.001)
+
+    def test_late_frames_catch_up(self):
+        clock, pacer = self.make()
+        pacer.wait()
+        start = clock.now
+        #One slow frame, made up for by the next ones
+        clock.now += 0.025
+        pacer.wait()
+        for _ in range(9):
+            pacer.wait()
+        self.assertEqual(pacer.late_frames, 1)
+        self.assertAlmostEqual(clock.now - start, 10 / 60, delta=0.001)
+
+    def test_turbo(self):
+        clock, pacer = self.make()
+        pacer.turbo = True
+        for _ in range(100):
+            pacer.wait()
+        self.assertEqual(clock.sleeps, [])
+
+if __name__ == '__main__':
+    unittest.main()
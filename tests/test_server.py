@@ -0,0 +1,90 @@
+import asyncio
+import base64
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from pychip8 import server
+from pychip8.cpu import Cpu
+from pychip8.headless import HeadlessRunner
+
+TEST_DIR = Path(__file__).resolve().parent
+
+class TestSessionServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.server = server.SessionServer()
+        path = str(Path(self._tmp_dir.name, 'pychip8.sock'))
+        self.listener = await self.server.start(path)
+        self.reader, self.writer = await asyncio.open_unix_connection(path)
+        self.screen = None
+        self.frame = None
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        self.server.stop()
+        self.listener.close()
+        await self.listener.wait_closed()
+        self._tmp_dir.cleanup()
+
+    async def command(self, **command) -> dict:
+        """Sends a command, applying the deltas sent until its reply.
+        """
+        self.writer.write(json.dumps(command).encode() + b'\n')
+        while True:
+            kind, payload = await server.read_message(self.reader)
+            if kind == server.REPLY:
+                return payload
+            self.frame, self.screen = server.apply_delta(self.screen, payload)
+
+    async def test_deltas_match_cpu(self):
+        rom_data = (TEST_DIR / 'test_opcode.ch8').read_bytes()
+        await self.command(cmd='load', rom=base64.b64encode(rom_data).decode())
+        self.assertFalse(self.screen.any())
+        reply = await self.command(cmd='step', frames=60)
+        self.assertEqual(reply, {'frame': 60, 'halt_reason': None})
+
+        chip = Cpu()
+        chip.load_rom(rom_data)
+        HeadlessRunner(chip).run(max_frames=60)
+        self.assertTrue((self.screen == chip._screen).all())
+
+    async def test_keys_and_live_run(self):
+        #Waits for a key, then draws its digit
+        program = bytes([
+            0xF0, 0x0A,  #200: V0 = key
+            0xF0, 0x29,  #202: I = digit V0
+            0xD0, 0x05,  #204: draw it at (V0, V0)
+            0x12, 0x06,  #206: jump 206
+        ])
+        await self.command(cmd='load', rom=base64.b64encode(program).decode())
+        await self.command(cmd='step', frames=3)
+        self.assertFalse(self.screen.any())
+        await self.command(cmd='key', key=4, down=True)
+        await self.command(cmd='run')
+        while self.frame is None or not self.screen.any():
+            kind, payload = await server.read_message(self.reader)
+            if kind == server.DELTA:
+                self.frame, self.screen = server.apply_delta(self.screen, payload)
+        reply = await self.command(cmd='pause')
+        self.assertGreater(reply['frame'], 3)
+        #The 4 sprite, 1001 1001 1111 0001 0001, drawn at (4, 4)
+        self.assertEqual(self.screen[4:9, 4:8].sum(), 10)
+
+    async def test_errors(self):
+        reply = await self.command(cmd='step')
+        self.assertEqual(reply, {'error': 'ValueError: no ROM loaded'})
+        reply = await self.command(cmd='load')
+        self.assertIn('KeyError', reply['error'])
+        rom = base64.b64encode(bytes([0x12, 0x00])).decode()
+        await self.command(cmd='load', rom=rom)
+        for key in (-1, 16):
+            reply = await self.command(cmd='key', key=key)
+            self.assertEqual(reply, {'error': 'ValueError: key must be 0-F'})
+        session, = self.server.sessions
+        self.assertFalse(session.chip.key_presses.any())
+        self.assertEqual(len(self.server.sessions), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+
+from pychip8 import backends, threaded
+from pychip8.cpu import Cpu
+
+class TestThreaded(unittest.TestCase):
+    def test_triple_buffer(self):
+        frames = threaded.TripleBuffer((4,))
+        self.assertIsNone(frames.latest())
+        frames.publish(np.array([1, 0, 0, 0], dtype=np.bool))
+        frames.publish(np.array([0, 1, 0, 0], dtype=np.bool))
+        self.assertEqual(frames.latest().tolist(), [False, True, False, False])
+        self.assertIsNone(frames.latest())
+        #Frames change size on a SUPER-CHIP resolution switch
+        frames.publish(np.ones(8, dtype=np.bool))
+        self.assertEqual(frames.latest().tolist(), [True] * 8)
+
+    def test_worker(self):
+        #Waits for a key, then draws its digit and stops
+        chip = Cpu()
+        chip.load_rom(bytes([0xF0, 0x0A, 0xF0, 0x29, 0xD1, 0x15, 0x12, 0x06]))
+        frames = threaded.TripleBuffer(chip.pixel_buffer.shape)
+        handoff = threaded.KeyHandoff(chip.key_presses)
+        worker = threaded.CpuWorker(chip, frames, handoff, 10, turbo=True)
+        ui_input = backends.MemoryKeyInput(np.zeros(16, dtype=np.bool))
+        ui_input.press(1)
+        ui_input.process_events()
+        handoff.publish(ui_input)
+        worker.start()
+        ui_input.request_exit()
+        ui_input.process_events()
+        handoff.publish(ui_input)
+        worker.join(5)
+
+        self.assertFalse(worker.is_alive())
+        self.assertIsNone(worker.error)
+        self.assertEqual(chip._v_regs[0], 1)
+        self.assertTrue(frames.latest().any())
+
+    def test_capture_counts_emulated_frames(self):
+        #Counts V0 up to 30, three instructions an iteration, then stops
+        chip = Cpu()
+        chip.load_rom(bytes([0x70, 0x01, 0x30, 0x1E, 0x12, 0x00, 0x00, 0x00]))
+        frames = threaded.TripleBuffer(chip.pixel_buffer.shape)
+        key_input = backends.MemoryKeyInput(chip.key_presses)
+        key_input.fast_forward = True
+        presents = []
+
+        class Capture(backends.NullDisplay):
+            def present(self):
+                presents.append(chip._program_counter)
+
+        worker = threaded.CpuWorker(
+            chip, frames, key_input, 10, turbo=True, capture=Capture()
+        )
+        worker.start()
+        worker.join(5)
+
+        self.assertIsInstance(worker.error, ValueError)
+        #The 90th instruction stops the ninth frame before it is presented
+        self.assertEqual(len(presents), 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from pychip8.cpu import Cpu
+from pychip8.headless import HeadlessRunner
+from pychip8.translator import BlockTranslator
+from tests.test_cpu import SUPERCHIP_PROGRAM, cpu_state
+
+TEST_DIR = Path(__file__).resolve().parent
+
+def load(chip, program):
+    chip.load_rom(b''.join(word.to_bytes(2, 'big') for word in program))
+
+class TestBlockTranslator(unittest.TestCase):
+    def setUp(self):
+        #Translates code on its second run, after it was seen once
+        patcher = mock.patch.object(BlockTranslator, '_translate_after', 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_self_modifying_code(self):
+        #Runs 0x20A as V1 = 5, then rewrites it to V1 = 7 and runs it again
+        program = [0x120A, 0, 0, 0, 0, 0x6105, 0x3200, 0x1220,
+                   0x6201, 0x6061, 0x6107, 0xA20A, 0xF155, 0x6100, 0x120A,
+                   0, 0x1220]
+        chip = Cpu()
+        load(chip, program)
+        executed = BlockTranslator(chip).run(13)
+        self.assertEqual(executed, 13)
+        self.assertEqual(chip._v_regs[1], 7)
+        self.assertEqual(chip._program_counter, 0x220)
+
+    def test_failing_call_within_block(self):
+        #Fx65 is called mid-block and reads past the end of memory
+        program = bytes([0x60, 0x01, 0xAF, 0xFE, 0xF5, 0x65, 0x61, 0x02])
+        chip = Cpu()
+        chip.load_rom(program)
+        block_translator = BlockTranslator(chip)
+        with self.assertRaises(IndexError):
+            block_translator.run(10)
+        self.assertEqual(block_translator.cycles, 2)
+        self.assertEqual(chip._program_counter, 0x204)
+
+    def test_matches_interpreter(self):
+        for rom in ('test_opcode.ch8', 'test_bc.ch8', 'superchip'):
+            with self.subTest(rom=rom):
+                rom_data = SUPERCHIP_PROGRAM
+                if rom != 'superchip':
+                    rom_data = (TEST_DIR / rom).read_bytes()
+                chip, translated = Cpu(), Cpu()
+                chip.load_rom(rom_data)
+                translated.load_rom(rom_data)
+                block_translator = BlockTranslator(translated)
+                for frame in range(300):
+                    for _ in range(block_translator.run(1)):
+                        chip.run_cycle()
+                    self.assertEqual(cpu_state(chip), cpu_state(translated))
+                    if frame % 5 == 0:
+                        chip.decrease_timers()
+                        translated.decrease_timers()
+
+    def test_frames_match_interpreter(self):
+        #Blocks longer than the rest of a frame must not delay the timers
+        for rom in ('BRIX', 'INVADERS', 'TETRIS'):
+            with self.subTest(rom=rom):
+                rom_data = (TEST_DIR.parent / 'roms' / rom).read_bytes()
+                chip, translated = Cpu(0), Cpu(0)
+                chip.load_rom(rom_data)
+                translated.load_rom(rom_data)
+                HeadlessRunner(chip, skip_idle=False).run(max_frames=600)
+                runner = HeadlessRunner(translated, recompile=True)
+                runner.run(max_frames=600)
+                self.assertEqual(runner.cycles, 6000)
+                self.assertEqual(cpu_state(chip), cpu_state(translated))
+
+    def test_skipped_instruction_run_later(self):
+        #V2 = 5 is skipped until key 0 is pressed, and V0 counts the loops
+        program = [0x6000, 0x7001, 0xE1A1, 0x6205, 0x1202]
+        chip, translated = Cpu(), Cpu()
+        load(chip, program)
+        load(translated, program)
+        block_translator = BlockTranslator(translated)
+        for frame in range(40):
+            if frame == 20:
+                chip.key_presses[0] = translated.key_presses[0] = True
+            self.assertEqual(block_translator.run(7), 7)
+            for _ in range(7):
+                chip.run_cycle()
+            self.assertEqual(cpu_state(chip), cpu_state(translated))
+        self.assertEqual(translated._v_regs[2], 5)
+
+    def test_key_wait(self):
+        program = [0x7101, 0xF00A, 0x1200]
+        chip = Cpu()
+        load(chip, program)
+        block_translator = BlockTranslator(chip)
+        for _ in range(5):
+            self.assertEqual(block_translator.run(10), 10)
+        self.assertEqual(chip._program_counter, 0x202)
+        self.assertEqual(chip._v_regs[1], 1)
+        chip.key_presses[3] = True
+        block_translator.run(3)
+        self.assertEqual(chip._v_regs[0], 3)
+        self.assertEqual(chip._v_regs[1], 2)
+
+if __name__ == '__main__':
+    unittest.main()
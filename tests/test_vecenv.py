@@ -0,0 +1,66 @@
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from pychip8 import vecenv
+from pychip8.cpu import Cpu
+from pychip8.headless import HeadlessRunner
+
+TEST_DIR = Path(__file__).resolve().parent
+
+class TestVecEnv(unittest.TestCase):
+    def test_observations_match_cpu(self):
+        rom_data = (TEST_DIR / 'test_opcode.ch8').read_bytes()
+        with vecenv.VecEnv(rom_data, 3, workers=2, frame_skip=5) as env:
+            observations = env.reset()
+            self.assertEqual(observations.shape, (3, 32, 64))
+            self.assertFalse(observations.any())
+            for _ in range(12):
+                observations, rewards, dones = env.step(np.full(3, -1))
+            self.assertFalse(dones.any())
+
+            chip = Cpu()
+            chip.load_rom(rom_data)
+            HeadlessRunner(chip).run(max_frames=60)
+            self.assertTrue(chip._screen.any())
+            for observation in observations:
+                self.assertTrue((observation == chip._screen).all())
+
+    def test_keys_rewards_and_restart(self):
+        #Adds the pressed key to V5 every frame, stops once V5 reaches 20
+        program = bytes([
+            0xF0, 0x0A,  #200: V0 = key
+            0x85, 0x04,  #202: V5 += V0
+            0x60, 0x01,  #204: V0 = 1
+            0xF0, 0x15,  #206: DT = 1
+            0xF1, 0x07,  #208: V1 = DT
+            0x31, 0x00,  #20A: skip if V1 == 0
+            0x12, 0x08,  #20C: jump 208
+            0x45, 0x14,  #20E: skip if V5 != 20
+            0x00, 0x00,  #210: end of code
+            0x12, 0x00,  #212: jump 200
+        ])
+        score = vecenv.RegisterScore(0x5)
+        with vecenv.VecEnv(program, 2, frame_skip=2, score=score) as env:
+            env.reset()
+            _, rewards, dones = env.step([4, -1])
+            self.assertEqual(rewards.tolist(), [8, 0])
+            actions = np.zeros((2, 16), dtype=np.bool)
+            actions[:, 3] = True
+            _, rewards, _ = env.step(actions)
+            self.assertEqual(rewards.tolist(), [6, 6])
+            _, rewards, dones = env.step(actions)
+            self.assertEqual(rewards.tolist(), [6, 6])
+            self.assertFalse(dones.any())
+            #V5 reached 20, the check stops the program on the next frame
+            _, rewards, dones = env.step(actions)
+            self.assertEqual(dones.tolist(), [True, False])
+            self.assertEqual(rewards.tolist(), [0, 6])
+            #Started over, with the score back to 0
+            _, rewards, dones = env.step(actions)
+            self.assertFalse(dones.any())
+            self.assertEqual(rewards.tolist(), [6, 6])
+
+if __name__ == '__main__':
+    unittest.main()